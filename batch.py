@@ -0,0 +1,263 @@
+""" Validation of many candidate moves at once, with NumPy.
+
+Boards are encoded as arrays of 64 small integers, one per square indexed by
+row * 8 + column: 0 for an empty cell, type + 1 for a White piece and
+-(type + 1) for a Black piece, with types as in pieces.TYPES. A Pawn on the
+row from which it starts may step twice, as it has never moved.
+
+The rules are those of moves.py: the direction of a move or attack is
+looked up in a table built from paths.LINES, the cells between its ends are
+tested against a mask of the occupied cells, and Knights jump as in
+moves.knight. A move is legal only if it doesn't leave the mover's King
+attacked.
+
+This module requires NumPy.
+"""
+
+import numpy as np
+
+import bitboard
+import moves
+from paths import CHANGES, LINES
+from pieces import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from pieces import Pawn, Bishop, Rook, Queen, King
+
+DIRECTIONS = tuple(CHANGES)
+# The number of candidates whose after-move boards are built at once when
+# checking whether a King is left attacked.
+CHUNK = 1 << 16
+
+_CLASSES = {PAWN: Pawn, BISHOP: Bishop, ROOK: Rook, QUEEN: Queen,
+            KING: King}
+_STRAIGHT = np.array([direction in Rook._attack_directions
+                      for direction in DIRECTIONS])
+_SENTINEL = 64
+
+
+def _code(team, piece_type):
+    """ Returns the code of a piece of a team and type. """
+    return piece_type + 1 if team == WHITE else -(piece_type + 1)
+
+
+def _build_tables():
+    """ Returns the tables of directions, cells between, distances and
+    Knight jumps, indexed by origin square * 64 + destination square. """
+    direction = np.full(4096, -1, np.int8)
+    between = np.zeros(4096, np.uint64)
+    rows = np.zeros(4096, np.int8)
+    columns = np.zeros(4096, np.int8)
+    jumps = np.zeros(4096, bool)
+    for origin in range(64):
+        for destination in range(64):
+            pair = origin * 64 + destination
+            initial = divmod(origin, 8)
+            target = divmod(destination, 8)
+            line = LINES[pair]
+            if line is not None:
+                direction[pair] = DIRECTIONS.index(line[0])
+                between[pair] = line[2]
+            rows[pair] = abs(target[0] - initial[0])
+            columns[pair] = abs(target[1] - initial[1])
+            jumps[pair] = bool(moves.knight(initial, target))
+    return direction, between, rows, columns, jumps
+
+
+def _build_permissions():
+    """ Returns the tables of whether the piece of each code, offset by 6,
+    may move and attack in each direction. """
+    allowed_moves = np.zeros((13, len(DIRECTIONS)), bool)
+    allowed_attacks = np.zeros((13, len(DIRECTIONS)), bool)
+    for team in (WHITE, BLACK):
+        for piece_type, cls in _CLASSES.items():
+            piece = cls((0, 0), team)
+            code = _code(team, piece_type) + 6
+            for direction in piece.get_move():
+                allowed_moves[code, DIRECTIONS.index(direction)] = True
+            for direction in piece.get_attack():
+                allowed_attacks[code, DIRECTIONS.index(direction)] = True
+    return allowed_moves, allowed_attacks
+
+
+def _padded(masks, width):
+    """ Returns the squares of each mask as rows of an array, padded with
+    the index of an always empty sentinel cell. """
+    table = np.full((len(masks), width), _SENTINEL, np.intp)
+    for index, mask in enumerate(masks):
+        cells = list(bitboard.squares(mask))
+        table[index, :len(cells)] = cells
+    return table
+
+
+def _ray_cells(square, direction):
+    """ Returns the squares from a square to the edge of the Chessboard in a
+    direction, nearest first. """
+    cells = list(bitboard.squares(bitboard.RAYS[direction][square]))
+    return cells if direction in bitboard.POSITIVE else cells[::-1]
+
+
+_DIRECTION, _BETWEEN, _ROWS, _COLUMNS, _JUMPS = _build_tables()
+_MOVES, _ATTACKS = _build_permissions()
+_PAWN_ROWS = np.array(bitboard.PAWN_ROWS, np.int8)
+
+# The squares from which a piece attacks each square: Knights, Kings, and
+# each team's Pawns.
+_KNIGHTS_FROM = _padded(bitboard.KNIGHT_ATTACKS, 8)
+_KINGS_FROM = _padded(bitboard.KING_ATTACKS, 8)
+_PAWNS_FROM = np.stack([
+    _padded([sum(1 << origin for origin in range(64)
+                 if bitboard.PAWN_ATTACKS[team][origin] >> square & 1)
+             for square in range(64)], 2)
+    for team in (WHITE, BLACK)])
+# The squares along each direction from each square, nearest first.
+_RAYS_FROM = np.full((len(DIRECTIONS), 64, 7), _SENTINEL, np.intp)
+for _index, _direction in enumerate(DIRECTIONS):
+    for _square in range(64):
+        _cells = _ray_cells(_square, _direction)
+        _RAYS_FROM[_index, _square, :len(_cells)] = _cells
+
+
+def encode(black, white):
+    """ Returns the array encoding of the game's pieces.
+
+    Parameters
+    ----------
+    black : list[Piece]
+        The list of current Black pieces.
+    white : list[Piece]
+        The list of current White pieces.
+
+    Returns
+    -------
+    np.ndarray
+        The 64 int8 codes of the cells.
+    """
+    board = np.zeros(64, np.int8)
+    for piece in black + white:
+        row, column = piece.get_position()
+        board[row * 8 + column] = _code(piece.get_team_index(),
+                                        piece.get_type_index())
+    return board
+
+
+def encode_position(position):
+    """ Returns the array encoding of a bitboard.Position. """
+    board = np.zeros(64, np.int8)
+    for square in range(64):
+        contents = position.piece_at(square)
+        if contents is not None:
+            board[square] = _code(*contents)
+    return board
+
+
+def legal_mask(boards, origins, destinations, board_index=None, teams=None,
+               check=True):
+    """ Determines which of many candidate moves are legal.
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        The encoded boards, of shape (boards, 64).
+    origins : np.ndarray
+        The square index from which each candidate moves.
+    destinations : np.ndarray
+        The square index to which each candidate moves or attacks.
+    board_index : np.ndarray
+        The index in boards of each candidate's board. None if there is one
+        board per candidate.
+    teams : np.ndarray
+        The index in pieces.TEAMS of the team whose turn it is on each
+        candidate's board. None to allow either team to move.
+    check : bool
+        Whether moves which leave the mover's King attacked are illegal.
+
+    Returns
+    -------
+    np.ndarray
+        For each candidate, True if it is legal. False otherwise.
+    """
+    boards = np.asarray(boards, np.int8).reshape(-1, 64)
+    origins = np.asarray(origins, np.intp)
+    destinations = np.asarray(destinations, np.intp)
+    if board_index is None:
+        board_index = np.arange(len(origins))
+    board_index = np.asarray(board_index, np.intp)
+
+    occupied = np.packbits(boards != 0, axis=1, bitorder="little") \
+        .view("<u8")[:, 0]
+    pairs = origins * 64 + destinations
+    piece = boards[board_index, origins]
+    target = boards[board_index, destinations]
+    team = np.where(piece > 0, WHITE, BLACK)
+    kind = np.abs(piece.astype(np.int16)) - 1
+    empty = target == 0
+    own = ~empty & ((target > 0) == (piece > 0))
+
+    # A move needs a direction in which the piece moves, and an attack one in
+    # which it attacks, with no piece between the ends.
+    direction = _DIRECTION[pairs]
+    on_line = direction >= 0
+    direction = np.where(on_line, direction, 0)
+    code = piece.astype(np.intp) + 6
+    allowed = np.where(empty, _MOVES[code, direction],
+                       _ATTACKS[code, direction]) & on_line
+    clear = (_BETWEEN[pairs] & occupied[board_index]) == 0
+
+    # Pawns and Kings are limited in how far they go.
+    rows = _ROWS[pairs]
+    columns = _COLUMNS[pairs]
+    unmoved = (columns == 0) & (origins // 8 == _PAWN_ROWS[team])
+    near = np.where(kind == PAWN, rows <= np.where(unmoved, 2, 1),
+                    (kind != KING) | (rows <= 1) & (columns <= 1))
+
+    legal = np.where(kind == KNIGHT, _JUMPS[pairs], allowed & clear & near)
+    legal &= (piece != 0) & ~own
+    if teams is not None:
+        legal &= team == np.asarray(teams)
+    if check:
+        candidates = np.flatnonzero(legal)
+        for start in range(0, len(candidates), CHUNK):
+            chunk = candidates[start:start + CHUNK]
+            legal[chunk] = ~_exposes_king(boards[board_index[chunk]],
+                                          origins[chunk], destinations[chunk],
+                                          piece[chunk], team[chunk])
+    return legal
+
+
+def _exposes_king(boards, origins, destinations, piece, team):
+    """ Determines whether each move leaves the mover's King attacked. The
+    boards are copied before the moves are made on them. """
+    count = len(origins)
+    rows = np.arange(count)
+    after = np.zeros((count, 65), np.int8)
+    after[:, :64] = boards
+    after[rows, destinations] = piece
+    after[rows, origins] = 0
+
+    sign = np.where(team == WHITE, 1, -1).astype(np.int8)
+    kings = after[:, :64] == (KING + 1) * sign[:, None]
+    has_king = kings.any(axis=1)
+    king = kings.argmax(axis=1)
+    enemy = -sign[:, None]
+    column = rows[:, None]
+
+    def enemy_at(squares, *types):
+        """ Returns whether an enemy piece of one of the types is on any of
+        the squares. """
+        cells = after[column, squares]
+        found = np.zeros(cells.shape, bool)
+        for piece_type in types:
+            found |= cells == enemy * (piece_type + 1)
+        return found.any(axis=1)
+
+    attacked = enemy_at(_KNIGHTS_FROM[king], KNIGHT)
+    attacked |= enemy_at(_KINGS_FROM[king], KING)
+    attacked |= enemy_at(_PAWNS_FROM[1 - team, king], PAWN)
+    for index in range(len(DIRECTIONS)):
+        cells = after[column, _RAYS_FROM[index, king]]
+        blocked = cells != 0
+        first = cells[rows, blocked.argmax(axis=1)]
+        sliders = (ROOK, QUEEN) if _STRAIGHT[index] else (BISHOP, QUEEN)
+        for piece_type in sliders:
+            attacked |= blocked.any(axis=1) \
+                & (first == enemy[:, 0] * (piece_type + 1))
+    return attacked & has_king
@@ -0,0 +1,343 @@
+""" Benchmarks of the rules' hot paths and of whole games, without a window.
+
+Each benchmark runs a fixed workload several times and keeps the fastest
+and the median time per operation. The results are written as JSON, and
+compared against the results of an earlier run: a benchmark whose fastest
+time has grown by more than the threshold is a regression, and the command
+exits with status 1.
+
+Benchmarks whose modules can't be imported, such as other.py's without
+PySimpleGUI, are skipped.
+
+Usage: python bench.py [--output FILE] [--baseline FILE] [--threshold T]
+                       [--repeat N] [--only NAME]
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import fen
+import moves
+import server
+from paths import Path, get_line
+
+# The start, a crowded middlegame and a near-empty ending.
+CROWDED = "r1bq1rk1/pp2bppp/2np1n2/2p1p3/2P1P3/2NP1N2/PP2BPPP/R1BQ1RK1 " \
+          "w - - 0 8"
+EMPTY = "4k3/8/8/3q4/8/8/8/4K3 w - - 0 1"
+
+# Games played by the rules of moves.py and pieces.py from the initial
+# position, as origin and destination cells.
+GAMES = (
+    "c2c4 h7h6 a2a3 c7c6 b2b3 f7f5 b1c3 g7g6 a1b1 d7d6 c3e4 c8e6 g2g3 b8d7 "
+    "f2f4 b7b6 e1f2 a8b8 b1a1 b6b5 f2e3 g6g5 e3d4 c6c5 d4d5 g8f6 d5b7 b8c8 "
+    "b7b8 c8b8 d2d3 a7a5 e2e3 f6g4 c4b5 e6g8 e4f2 g4e5 c1b2 g8c4 d1c2 e7e6 "
+    "c2c3 c4b5 b2c1 b8c8 f2d1 d8b6 c3c2 b6c7 b3b4 a5a4 g1h3 e5g4 c1b2 g4e5 "
+    "d1f2 c7a7 b2d4 a7a5 f2e4 e5f7 f1e2 a5b6 a1g1 c8d8 e2f1 b6c7 c2b1 b5c4 "
+    "e4g5 c7b7 d4c3 c4b5 b1a1 d7f6 g5e6 f6g8 a1a2 b5c6",
+    "a2a3 g8f6 b2b3 e7e6 d2d3 f6g8 e1c3 d7d6 f2f3 d8h4 c3d2 h4g3 b3b4 g8h6 "
+    "e2e3 g3e5 b1c3 e5f6 h2h4 f6c3 d1e1 g7g6 h4h5 b8a6 c1b2 c3b4 a1b1 b4a5 "
+    "g1h3 a5b4 b2h8 b4c3 h3f4 a6b4 e3e4 c8d7 f4e2 e6e5 a3b4 a7a5 g2g3 c3c5 "
+    "e2g1 c5c6 h1h4 d7c8 b1b2 c6c3 f1g2 c3b3 d2c3 h6g8 b2b3 a5a4 g2h1 c8e6 "
+    "e1d2 e6b3 f3f4 b7b6 h1f3 e8e7 d2c1 e7e6 c1d2 b3d5 c3a1 g6g5 a1a4 g5f4 "
+    "g3f4 g8e7 d2d1 d5c4 g1e2 e5f4 f3g4 f7f5 a4a5 c7c5",
+    "d2d3 h7h6 b1d2 a7a6 d2b1 g7g5 c1e3 f8g7 d3d4 g7f8 b2b3 g5g4 a2a4 b7b5 "
+    "d1c1 h6h5 b1a3 a6a5 h2h4 c7c6 c1d1 c8a6 e3g5 b5b4 g5e3 a6c8 f2f3 a8a7 "
+    "e1c3 g4f3 c3c6 d8b6 d1d2 c8b7 a3c4 b6b5 c6b7 f7f5 e2f3 b5b6 d2d3 b6d6 "
+    "e3f2 a7a6 a1d1 a6c6 b7c6 e7e6 c6b6 b8c6 b6b5 c6e5 c4e5 h8h7 f2e1 d6d5 "
+    "d3e2 h7g7 d1c1 d5b3 e2d2 b3a4 f3f4 a4a3 g1f3 g7g4 f1e2 g8e7 f3g5 a3g3 "
+    "b5b7 g3e1 d2e1 e7c8 e1f2 f8c5 e2g4 b4b3 c2b3 c8d6"
+)
+
+_rng = random.Random(0)
+# Pairs of distinct cells, the same on every run.
+_PAIRS = [tuple(divmod(square, 8) for square in _rng.sample(range(64), 2))
+          for _ in range(256)]
+
+
+def _sliders(position):
+    """ Returns each Bishop, Rook and Queen of a position with every cell,
+    its direction, and the pieces' lists. """
+    black, white, count = fen.load(position)
+    cases = []
+    for piece in black + white:
+        if piece.get_type() not in ("Bishop", "Rook", "Queen"):
+            continue
+        for square in range(64):
+            destination = divmod(square, 8)
+            direction = moves.get_direction(piece.get_position(),
+                                            destination)
+            if direction is not None:
+                cases.append((piece, piece.get_position(), destination,
+                              direction))
+    return black, white, cases
+
+
+def bench_get_direction():
+    """ moves.get_direction between fixed pairs of cells. """
+    get_direction = moves.get_direction
+
+    def run():
+        for initial, destination in _PAIRS:
+            get_direction(initial, destination)
+    return run, len(_PAIRS)
+
+
+def bench_path():
+    """ paths.Path built between fixed pairs of cells. """
+    cases = [(initial, destination, moves.get_direction(initial,
+                                                        destination))
+             for initial, destination in _PAIRS
+             if get_line(initial, destination) is not None]
+
+    def run():
+        for initial, destination, direction in cases:
+            Path(initial, destination, direction)
+    return run, len(cases)
+
+
+def _bench_validate_path(position):
+    """ moves.validate_path from every slider of a position to every cell.
+    """
+    black, white, cases = _sliders(position)
+    validate_path = moves.validate_path
+
+    def run():
+        for piece, initial, destination, direction in cases:
+            validate_path(piece, black, white, initial, destination,
+                          direction)
+    return run, len(cases)
+
+
+def bench_validate_path_crowded():
+    """ moves.validate_path on a crowded board. """
+    return _bench_validate_path(CROWDED)
+
+
+def bench_validate_path_empty():
+    """ moves.validate_path on a near-empty board. """
+    return _bench_validate_path(EMPTY)
+
+
+def bench_move_round_trip():
+    """ A Queen's Piece.move to each free cell of a crowded board, and
+    back. """
+    black, white, count = fen.load(CROWDED)
+    queen = moves.get_piece(black, white, (7, 3))
+    origin = queen.get_position()
+    destinations = []
+    for square in range(64):
+        destination = divmod(square, 8)
+        if moves.get_piece(black, white, destination) is None \
+                and queen.move(destination, black, white):
+            queen.move(origin, black, white)
+            destinations.append(destination)
+
+    def run():
+        for destination in destinations:
+            queen.move(destination, black, white)
+            queen.move(origin, black, white)
+    return run, 2 * len(destinations)
+
+
+def bench_attack_round_trip():
+    """ A Knight's Piece.attack on a Pawn, the Pawn's capture, and their
+    return. """
+    black, white, count = fen.load(CROWDED)
+    board = moves.get_board(black, white)
+    knight = moves.get_piece(black, white, (5, 5))
+    target = moves.get_piece(black, white, (3, 4))
+    origin = knight.get_position()
+
+    def run():
+        for _ in range(64):
+            knight.attack(target.get_position(), black, white)
+            target.kill(black, white)
+            knight.move(origin, black, white)
+            black.append(target)
+            board.place(target)
+    return run, 64
+
+
+def bench_check_endgame():
+    """ other.check_endgame on a crowded board. """
+    import other
+    black, white, count = fen.load(CROWDED)
+
+    def run():
+        for _ in range(16):
+            moves.get_board(black, white).invalidate()
+            other.check_endgame(black, white)
+    return run, 16
+
+
+def bench_replay():
+    """ Whole games played from fixed move lists, from the initial
+    position. """
+    games = [[(server.parse_cell(move[:2]), server.parse_cell(move[2:]))
+              for move in game.split()] for game in GAMES]
+
+    def run():
+        for game_moves in games:
+            game = server.Game()
+            for initial, destination in game_moves:
+                if not game.play(initial, destination):
+                    raise RuntimeError("An illegal move in a fixed game.")
+    return run, sum(len(game_moves) for game_moves in games)
+
+
+BENCHMARKS = {
+    "get_direction": bench_get_direction,
+    "path": bench_path,
+    "validate_path_crowded": bench_validate_path_crowded,
+    "validate_path_empty": bench_validate_path_empty,
+    "move_round_trip": bench_move_round_trip,
+    "attack_round_trip": bench_attack_round_trip,
+    "check_endgame": bench_check_endgame,
+    "replay": bench_replay
+}
+
+
+def measure(setup, repeat=5, min_time=0.2):
+    """ Times a benchmark.
+
+    Parameters
+    ----------
+    setup : callable
+        Returns the benchmark's workload, as a function, and the number of
+        operations it performs.
+    repeat : int
+        The number of timed runs.
+    min_time : float
+        The time, in seconds, which each run lasts at least, by repeating
+        the workload.
+
+    Returns
+    -------
+    dict
+        The number of operations of each run, and the fastest and median
+        time per operation, in seconds.
+    """
+    run, operations = setup()
+    run()
+    start = time.perf_counter()
+    run()
+    once = time.perf_counter() - start
+    loops = max(1, int(min_time / once)) if once else 1000
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        times.append((time.perf_counter() - start) / (loops * operations))
+    return {"operations": loops * operations, "best": min(times),
+            "median": statistics.median(times)}
+
+
+def run_all(names=None, repeat=5):
+    """ Runs benchmarks.
+
+    Parameters
+    ----------
+    names : list[str]
+        The names of the benchmarks to run. None to run them all.
+    repeat : int
+        The number of timed runs of each.
+
+    Returns
+    -------
+    dict
+        The Python version and platform, and the results of each benchmark
+        by name. Those which couldn't run have the reason in "skipped".
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        try:
+            results[name] = measure(BENCHMARKS[name], repeat)
+        except ImportError as error:
+            results[name] = {"skipped": str(error)}
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results}
+
+
+def compare(current, baseline, threshold=0.1):
+    """ Compares a run's results against a baseline run's.
+
+    Parameters
+    ----------
+    current : dict
+        The run's report, as returned by run_all.
+    baseline : dict
+        The baseline run's report.
+    threshold : float
+        The growth of the fastest time, as a fraction, beyond which a
+        benchmark has regressed.
+
+    Returns
+    -------
+    dict[str, float]
+        The ratio of each benchmark's fastest time to its baseline's, by
+        name, for the benchmarks which both runs completed.
+    list[str]
+        The names of the benchmarks which regressed.
+    """
+    ratios = {}
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {})
+        if "best" not in result or not before.get("best"):
+            continue
+        ratios[name] = result["best"] / before["best"]
+        if ratios[name] > 1 + threshold:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the rules' hot paths and whole games.")
+    parser.add_argument("--output", help="file to which to write the "
+                                         "results, as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to "
+                                           "compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown beyond which a benchmark has "
+                             "regressed (default 0.1, for 10%%)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs of each benchmark (default 5)")
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS),
+                        help="run only this benchmark; repeat for several")
+    args = parser.parse_args(argv)
+
+    report = run_all(args.only, args.repeat)
+    ratios, regressions = {}, []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            ratios, regressions = compare(report, json.load(file),
+                                          args.threshold)
+    for name, result in report["results"].items():
+        if "skipped" in result:
+            print(f"{name:24s} skipped: {result['skipped']}")
+            continue
+        line = f"{name:24s} {result['best'] * 1e6:10.2f} us/op " \
+               f"(median {result['median'] * 1e6:.2f})"
+        if name in ratios:
+            line += f"  {ratios[name]:.2f}x baseline"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,704 @@
+""" Bitboard representation of Chess positions, used for fast analysis.
+
+Each square is indexed by row * 8 + column, so bit 0 is the top-left cell
+(0, 0) and bit 63 is the bottom-right cell (7, 7), as in board.square_of.
+"""
+
+import moves
+import zobrist
+from paths import CHANGES
+from pieces import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from pieces import TEAMS, Pawn, Bishop, Rook, Queen, King
+
+# The change in (row, column) for a single step in each direction.
+STEPS = {direction: (y, x) for direction, (x, y) in CHANGES.items()}
+
+
+def _on_board(row, column):
+    """ Returns whether the given row and column are on the Chessboard. """
+    return 0 <= row < 8 and 0 <= column < 8
+
+
+def _ray(square, direction):
+    """ Returns the mask of cells from a square to the edge of the
+    Chessboard in a given direction, excluding the square itself. """
+    row, column = divmod(square, 8)
+    y, x = STEPS[direction]
+    mask = 0
+    row, column = row + y, column + x
+    while _on_board(row, column):
+        mask |= 1 << (row * 8 + column)
+        row, column = row + y, column + x
+    return mask
+
+
+def _leaper(square, offsets):
+    """ Returns the mask of cells reachable from a square by single jumps of
+    the given (row, column) offsets. """
+    row, column = divmod(square, 8)
+    mask = 0
+    for y, x in offsets:
+        if _on_board(row + y, column + x):
+            mask |= 1 << ((row + y) * 8 + column + x)
+    return mask
+
+
+RAYS = {direction: tuple(_ray(square, direction) for square in range(64))
+        for direction in STEPS}
+# Directions in which the square index increases, so the nearest blocker is
+# the lowest set bit. The nearest blocker in the others is the highest bit.
+POSITIVE = frozenset(direction for direction, (y, x) in STEPS.items()
+                     if y * 8 + x > 0)
+
+KNIGHT_ATTACKS = tuple(
+    sum(1 << target for target in range(64)
+        if moves.knight(divmod(square, 8), divmod(target, 8)))
+    for square in range(64))
+KING_ATTACKS = tuple(
+    _leaper(square, [STEPS[direction]
+                     for direction in King._attack_directions])
+    for square in range(64))
+PAWN_ATTACKS = tuple(
+    tuple(_leaper(square, [STEPS[direction]
+                           for direction in Pawn._team_attacks[team]])
+          for square in range(64))
+    for team in range(len(TEAMS)))
+
+# The change in square index of a Pawn's single step forward, the row from
+# which it may step twice, and the row on which it is promoted.
+PAWN_PUSHES = tuple(STEPS[directions[0]][0] * 8
+                    for directions in Pawn._team_moves)
+PAWN_ROWS = tuple(7 - far + push // 8
+                  for far, push in zip(Pawn._far_rows, PAWN_PUSHES))
+PROMOTION_ROWS = Pawn._far_rows
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+ROOK_DIRECTIONS = tuple(Rook._attack_directions)
+BISHOP_DIRECTIONS = tuple(Bishop._attack_directions)
+QUEEN_DIRECTIONS = tuple(Queen._attack_directions)
+
+# Castling rights, as bits of a single integer.
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+# The castling rights which remain when a piece moves from or to a square.
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[60] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[63] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASKS[56] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASKS[4] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[7] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASKS[0] = 15 & ~BLACK_QUEENSIDE
+CASTLING_MASKS = tuple(CASTLING_MASKS)
+# For each castling right: the King's origin and destination, the cells
+# which must be empty and the cells which mustn't be attacked.
+CASTLES = (
+    (WHITE_KINGSIDE, 60, 62, (61, 62), (60, 61, 62)),
+    (WHITE_QUEENSIDE, 60, 58, (57, 58, 59), (60, 59, 58)),
+    (BLACK_KINGSIDE, 4, 6, (5, 6), (4, 5, 6)),
+    (BLACK_QUEENSIDE, 4, 2, (1, 2, 3), (4, 3, 2))
+)
+
+FILES = "abcdefgh"
+LETTERS = "pnbrqk"
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def slide(square, directions, occupied):
+    """ Returns the mask of cells attacked by a sliding piece.
+
+    Parameters
+    ----------
+    square : int
+        The square from which the piece slides.
+    directions : tuple[str]
+        The directions in which the piece slides.
+    occupied : int
+        The mask of occupied cells, which block the piece.
+
+    Returns
+    -------
+    int
+        The mask of cells attacked, including the first blocker in each
+        direction.
+    """
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            if direction in POSITIVE:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAYS[direction][first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """ Returns the mask of cells attacked by a Rook on a square. """
+    return slide(square, ROOK_DIRECTIONS, occupied)
+
+
+def bishop_attacks(square, occupied):
+    """ Returns the mask of cells attacked by a Bishop on a square. """
+    return slide(square, BISHOP_DIRECTIONS, occupied)
+
+
+def queen_attacks(square, occupied):
+    """ Returns the mask of cells attacked by a Queen on a square. """
+    return slide(square, QUEEN_DIRECTIONS, occupied)
+
+
+def squares(mask):
+    """ Yields the square index of each set bit in a mask, lowest first. """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def square_name(square):
+    """ Returns the algebraic name of a square, such as "e4". """
+    row, column = divmod(square, 8)
+    return f"{FILES[column]}{8 - row}"
+
+
+def parse_square(name):
+    """ Returns the square index of an algebraic square name. """
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+def encode_move(origin, destination, promotion=0):
+    """ Returns a move encoded as an integer.
+
+    Parameters
+    ----------
+    origin : int
+        The square from which the piece moves.
+    destination : int
+        The square to which the piece moves.
+    promotion : int
+        The type to which a Pawn is promoted. 0 if there is no promotion.
+
+    Returns
+    -------
+    int
+        The move, as origin | destination << 6 | promotion << 12.
+    """
+    return origin | destination << 6 | promotion << 12
+
+
+def decode_move(move):
+    """ Returns a move as a tuple[origin, destination, promotion]. """
+    return move & 63, move >> 6 & 63, move >> 12
+
+
+def move_name(move):
+    """ Returns the coordinate notation of a move, such as "e7e8q". """
+    origin, destination, promotion = decode_move(move)
+    name = square_name(origin) + square_name(destination)
+    if promotion:
+        name += LETTERS[promotion]
+    return name
+
+
+class Position(object):
+    def __init__(self, turn=WHITE, castling=0, en_passant=None, halfmove=0,
+                 fullmove=1):
+        """ A Chess position, defined by one bitboard per team and type of
+        piece, and the state needed to generate its legal moves.
+
+        Parameters
+        ----------
+        turn : int
+            The team whose turn it is, WHITE or BLACK.
+        castling : int
+            The castling rights which remain, as bits of WHITE_KINGSIDE,
+            WHITE_QUEENSIDE, BLACK_KINGSIDE and BLACK_QUEENSIDE.
+        en_passant : int
+            The square behind a Pawn which has just stepped twice. None if
+            there is no such square.
+        halfmove : int
+            The number of moves since the last capture or Pawn move.
+        fullmove : int
+            The number of the current full move, starting at 1.
+        """
+        self._pieces = [[0] * 6, [0] * 6]
+        self._occupied = [0, 0]
+        self._mailbox = [None] * 64
+        self._turn = turn
+        self._castling = castling
+        self._en_passant = en_passant
+        self._halfmove = halfmove
+        self._fullmove = fullmove
+        self._history = []
+        self._hash = zobrist.CASTLING[castling]
+        if turn == BLACK:
+            self._hash ^= zobrist.TURN
+        if en_passant is not None:
+            self._hash ^= zobrist.EN_PASSANT[en_passant & 7]
+
+    def __repr__(self):
+        rows = []
+        for row in range(8):
+            cells = []
+            for column in range(8):
+                contents = self.piece_at(row * 8 + column)
+                if contents is None:
+                    cells.append(".")
+                else:
+                    letter = LETTERS[contents[1]]
+                    cells.append(letter.upper() if contents[0] == WHITE
+                                 else letter)
+            rows.append("".join(cells))
+        return "\n".join(rows)
+
+    def add(self, team, piece_type, square):
+        """ Places a piece of a team and type on an empty square. """
+        bit = 1 << square
+        self._pieces[team][piece_type] |= bit
+        self._occupied[team] |= bit
+        self._mailbox[square] = team << 3 | piece_type
+        self._hash ^= zobrist.PIECES[team][piece_type][square]
+
+    def remove(self, team, piece_type, square):
+        """ Removes a piece of a team and type from a square. """
+        bit = 1 << square
+        self._pieces[team][piece_type] &= ~bit
+        self._occupied[team] &= ~bit
+        self._mailbox[square] = None
+        self._hash ^= zobrist.PIECES[team][piece_type][square]
+
+    def get_pieces(self, team, piece_type):
+        """ Returns the bitboard of a team's pieces of a given type. """
+        return self._pieces[team][piece_type]
+
+    def get_occupied(self, team=None):
+        """ Returns the bitboard of a team's pieces, or of all pieces if no
+        team is given. """
+        if team is None:
+            return self._occupied[WHITE] | self._occupied[BLACK]
+        return self._occupied[team]
+
+    def get_turn(self):
+        """ Returns the team whose turn it is, WHITE or BLACK. """
+        return self._turn
+
+    def get_hash(self):
+        """ Returns the 64-bit Zobrist hash of the Position. """
+        return self._hash
+
+    def get_castling(self):
+        """ Returns the castling rights which remain. """
+        return self._castling
+
+    def get_en_passant(self):
+        """ Returns the en passant square. None if there is none. """
+        return self._en_passant
+
+    def get_halfmove(self):
+        """ Returns the number of moves since the last capture or Pawn move.
+        """
+        return self._halfmove
+
+    def get_fullmove(self):
+        """ Returns the number of the current full move. """
+        return self._fullmove
+
+    def get_ply(self):
+        """ Returns the number of moves made since the Position was set up.
+        """
+        return len(self._history)
+
+    def piece_at(self, square):
+        """ Returns the (team, type) of the piece on a square. None if it is
+        empty. """
+        code = self._mailbox[square]
+        if code is None:
+            return None
+        return code >> 3, code & 7
+
+    def king_square(self, team):
+        """ Returns the square of a team's King. None if it has no King. """
+        king = self._pieces[team][KING]
+        if not king:
+            return None
+        return (king & -king).bit_length() - 1
+
+    def attacks_from(self, square):
+        """ Returns the mask of cells attacked by the piece on a square. """
+        contents = self.piece_at(square)
+        if contents is None:
+            return 0
+        team, piece_type = contents
+        occupied = self.get_occupied()
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[team][square]
+        elif piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        elif piece_type == BISHOP:
+            return bishop_attacks(square, occupied)
+        elif piece_type == ROOK:
+            return rook_attacks(square, occupied)
+        elif piece_type == QUEEN:
+            return queen_attacks(square, occupied)
+        return KING_ATTACKS[square]
+
+    def is_attacked(self, square, team):
+        """ Determines whether a square is attacked by any piece of a team.
+
+        Parameters
+        ----------
+        square : int
+            The square being checked.
+        team : int
+            The attacking team, WHITE or BLACK.
+
+        Returns
+        -------
+        bool
+            True if the square is attacked. False otherwise.
+        """
+        boards = self._pieces[team]
+        if PAWN_ATTACKS[1 - team][square] & boards[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[square] & boards[KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & boards[KING]:
+            return True
+        occupied = self._occupied[WHITE] | self._occupied[BLACK]
+        straight = boards[ROOK] | boards[QUEEN]
+        if straight and rook_attacks(square, occupied) & straight:
+            return True
+        diagonal = boards[BISHOP] | boards[QUEEN]
+        if diagonal and bishop_attacks(square, occupied) & diagonal:
+            return True
+        return False
+
+    def get_attacked(self, team):
+        """ Returns the mask of all cells attacked by a team. """
+        boards = self._pieces[team]
+        occupied = self.get_occupied()
+        attacks = 0
+        for square in squares(boards[PAWN]):
+            attacks |= PAWN_ATTACKS[team][square]
+        for square in squares(boards[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[square]
+        for square in squares(boards[BISHOP] | boards[QUEEN]):
+            attacks |= bishop_attacks(square, occupied)
+        for square in squares(boards[ROOK] | boards[QUEEN]):
+            attacks |= rook_attacks(square, occupied)
+        for square in squares(boards[KING]):
+            attacks |= KING_ATTACKS[square]
+        return attacks
+
+    def in_check(self, team=None):
+        """ Determines whether a team's King is attacked. By default, the
+        team is the one whose turn it is. """
+        if team is None:
+            team = self._turn
+        square = self.king_square(team)
+        return square is not None and self.is_attacked(square, 1 - team)
+
+    def generate_pseudo_moves(self):
+        """ Returns the list of moves for the team whose turn it is, without
+        checking whether they leave its King attacked. """
+        us = self._turn
+        them = 1 - us
+        boards = self._pieces[us]
+        own = self._occupied[us]
+        enemy = self._occupied[them]
+        occupied = own | enemy
+        targets = ~own
+        found = []
+        append = found.append
+
+        push = PAWN_PUSHES[us]
+        pawn_row = PAWN_ROWS[us]
+        promotion_row = PROMOTION_ROWS[us]
+        pawn_attacks = PAWN_ATTACKS[us]
+        en_passant = self._en_passant
+        passant_bit = 0 if en_passant is None else 1 << en_passant
+        for origin in squares(boards[PAWN]):
+            destinations = []
+            step = origin + push
+            if not occupied >> step & 1:
+                destinations.append(step)
+                if origin >> 3 == pawn_row \
+                        and not occupied >> (step + push) & 1:
+                    append(origin | (step + push) << 6)
+            destinations.extend(squares(pawn_attacks[origin]
+                                        & (enemy | passant_bit)))
+            for destination in destinations:
+                if destination >> 3 == promotion_row:
+                    for promotion in PROMOTIONS:
+                        append(origin | destination << 6 | promotion << 12)
+                else:
+                    append(origin | destination << 6)
+
+        for origin in squares(boards[KNIGHT]):
+            for destination in squares(KNIGHT_ATTACKS[origin] & targets):
+                append(origin | destination << 6)
+        for origin in squares(boards[BISHOP]):
+            for destination in squares(bishop_attacks(origin, occupied)
+                                       & targets):
+                append(origin | destination << 6)
+        for origin in squares(boards[ROOK]):
+            for destination in squares(rook_attacks(origin, occupied)
+                                       & targets):
+                append(origin | destination << 6)
+        for origin in squares(boards[QUEEN]):
+            for destination in squares(queen_attacks(origin, occupied)
+                                       & targets):
+                append(origin | destination << 6)
+        for origin in squares(boards[KING]):
+            for destination in squares(KING_ATTACKS[origin] & targets):
+                append(origin | destination << 6)
+
+        if self._castling:
+            for right, origin, destination, empty, safe in CASTLES:
+                if not self._castling & right \
+                        or not boards[KING] >> origin & 1:
+                    continue
+                if any(occupied >> square & 1 for square in empty):
+                    continue
+                if any(self.is_attacked(square, them) for square in safe):
+                    continue
+                append(origin | destination << 6)
+        return found
+
+    def generate_moves(self):
+        """ Returns the list of legal moves for the team whose turn it is. """
+        us = self._turn
+        legal = []
+        for move in self.generate_pseudo_moves():
+            self.make_move(move)
+            if not self.in_check(us):
+                legal.append(move)
+            self.unmake_move()
+        return legal
+
+    def make_move(self, move):
+        """ Makes a move, recording how to unmake it.
+
+        Parameters
+        ----------
+        move : int
+            The move, as returned by encode_move. It must be a pseudo-legal
+            move for the team whose turn it is.
+        """
+        origin = move & 63
+        destination = move >> 6 & 63
+        promotion = move >> 12
+        mailbox = self._mailbox
+        code = mailbox[origin]
+        team = code >> 3
+        piece_type = code & 7
+        captured = mailbox[destination]
+        self._history.append((move, captured, self._castling,
+                              self._en_passant, self._halfmove, self._hash))
+
+        if captured is not None:
+            self.remove(captured >> 3, captured & 7, destination)
+        elif piece_type == PAWN and destination == self._en_passant:
+            self.remove(1 - team, PAWN, destination - PAWN_PUSHES[team])
+        self.remove(team, piece_type, origin)
+        self.add(team, promotion or piece_type, destination)
+        if piece_type == KING and abs(destination - origin) == 2:
+            self._castle_rook(team, origin, destination)
+
+        castling = self._castling
+        self._castling &= CASTLING_MASKS[origin] & CASTLING_MASKS[destination]
+        self._hash ^= zobrist.CASTLING[castling] \
+            ^ zobrist.CASTLING[self._castling] ^ zobrist.TURN
+        if self._en_passant is not None:
+            self._hash ^= zobrist.EN_PASSANT[self._en_passant & 7]
+        if piece_type == PAWN and abs(destination - origin) == 16:
+            self._en_passant = (origin + destination) // 2
+            self._hash ^= zobrist.EN_PASSANT[self._en_passant & 7]
+        else:
+            self._en_passant = None
+        if piece_type == PAWN or captured is not None:
+            self._halfmove = 0
+        else:
+            self._halfmove += 1
+        if team == BLACK:
+            self._fullmove += 1
+        self._turn = 1 - team
+
+    def unmake_move(self):
+        """ Unmakes the last move made, restoring the Position before it.
+
+        Returns
+        -------
+        int
+            The move which was unmade.
+        """
+        move, captured, castling, en_passant, halfmove, key = \
+            self._history.pop()
+        origin = move & 63
+        destination = move >> 6 & 63
+        promotion = move >> 12
+        team = 1 - self._turn
+        piece_type = self._mailbox[destination] & 7
+        moved_type = PAWN if promotion else piece_type
+
+        self.remove(team, piece_type, destination)
+        self.add(team, moved_type, origin)
+        if captured is not None:
+            self.add(captured >> 3, captured & 7, destination)
+        elif moved_type == PAWN and destination == en_passant:
+            self.add(1 - team, PAWN, destination - PAWN_PUSHES[team])
+        if moved_type == KING and abs(destination - origin) == 2:
+            self._castle_rook(team, origin, destination, undo=True)
+
+        self._castling = castling
+        self._en_passant = en_passant
+        self._halfmove = halfmove
+        self._hash = key
+        if team == BLACK:
+            self._fullmove -= 1
+        self._turn = team
+        return move
+
+    def _castle_rook(self, team, origin, destination, undo=False):
+        """ Moves the Rook which castles with a King moving from origin to
+        destination, or moves it back if the castling is being undone. """
+        if destination > origin:
+            corner, beside = origin + 3, origin + 1
+        else:
+            corner, beside = origin - 4, origin - 1
+        if undo:
+            corner, beside = beside, corner
+        self.remove(team, ROOK, corner)
+        self.add(team, ROOK, beside)
+
+    def to_fen(self):
+        """ Returns the Forsyth-Edwards Notation of the Position. """
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for column in range(8):
+                contents = self.piece_at(row * 8 + column)
+                if contents is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = LETTERS[contents[1]]
+                text += letter.upper() if contents[0] == WHITE else letter
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        castling = "".join(letter for right, letter in zip((1, 2, 4, 8),
+                                                           "KQkq")
+                           if self._castling & right) or "-"
+        if self._en_passant is None:
+            en_passant = "-"
+        else:
+            en_passant = square_name(self._en_passant)
+        return f"{'/'.join(rows)} {'wb'[self._turn]} {castling} " \
+               f"{en_passant} {self._halfmove} {self._fullmove}"
+
+
+def from_fen(fen):
+    """ Returns the Position described in Forsyth-Edwards Notation.
+
+    Parameters
+    ----------
+    fen : str
+        The Position in Forsyth-Edwards Notation. The move counters may be
+        omitted.
+
+    Returns
+    -------
+    Position
+        The Position described.
+
+    Raises
+    ------
+    ValueError
+        If the notation isn't valid.
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"Invalid FEN: {fen!r}")
+    rows = fields[0].split("/")
+    if len(rows) != 8 or fields[1] not in ("w", "b"):
+        raise ValueError(f"Invalid FEN: {fen!r}")
+    castling = 0
+    for letter in fields[2]:
+        if letter in "KQkq":
+            castling |= 1 << "KQkq".index(letter)
+        elif letter != "-":
+            raise ValueError(f"Invalid FEN: {fen!r}")
+    en_passant = None if fields[3] == "-" else parse_square(fields[3])
+    halfmove = int(fields[4]) if len(fields) > 4 else 0
+    fullmove = int(fields[5]) if len(fields) > 5 else 1
+    position = Position("wb".index(fields[1]), castling, en_passant,
+                        halfmove, fullmove)
+    for row, text in enumerate(rows):
+        column = 0
+        for letter in text:
+            if letter.isdigit():
+                column += int(letter)
+            elif letter.lower() in LETTERS and column < 8:
+                team = WHITE if letter.isupper() else BLACK
+                position.add(team, LETTERS.index(letter.lower()),
+                             row * 8 + column)
+                column += 1
+            else:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+        if column != 8:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+    return position
+
+
+def from_lists(black, white, turn=WHITE, castling=0, fullmove=1):
+    """ Returns the Position of the given pieces.
+
+    The Chess game has no castling or en passant, so by default the Position
+    has no castling rights, and it never has an en passant square.
+
+    Parameters
+    ----------
+    black : list[pieces.Piece]
+        The list of current Black pieces.
+    white : list[pieces.Piece]
+        The list of current White pieces.
+    turn : int
+        The team whose turn it is, WHITE or BLACK.
+    castling : int
+        The castling rights which remain.
+    fullmove : int
+        The number of the current full move, starting at 1.
+
+    Returns
+    -------
+    Position
+        The Position of the pieces.
+    """
+    position = Position(turn, castling, fullmove=fullmove)
+    for piece in black + white:
+        row, column = piece.get_position()
+        position.add(piece.get_team_index(), piece.get_type_index(),
+                     row * 8 + column)
+    return position
+
+
+def generate_moves(position):
+    """ Returns the list of legal moves for the team whose turn it is.
+
+    Parameters
+    ----------
+    position : Position
+        The position from which to generate moves.
+
+    Returns
+    -------
+    list[int]
+        The legal moves, encoded as by encode_move.
+    """
+    return position.generate_moves()
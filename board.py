@@ -0,0 +1,568 @@
+""" Square-indexed representation of the Chessboard. """
+
+import bitboard
+import zobrist
+from pieces import TEAMS, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+from pieces import KING
+from pieces import Pawn, Rook, Knight, Bishop, Queen, King
+
+PLAYING = "playing"
+CHECK = "check"
+CHECKMATE = "checkmate"
+STALEMATE = "stalemate"
+DRAW = "Draw"
+
+_SLIDERS = (BISHOP, ROOK, QUEEN)
+
+
+def square_of(position):
+    """ Returns the square index of a position.
+
+    Parameters
+    ----------
+    position : tuple[int, int]
+        The position as a tuple[row, column].
+
+    Returns
+    -------
+    int
+        The square index, from 0 (top-left) to 63 (bottom-right).
+    """
+    return position[0] * 8 + position[1]
+
+
+def position_of(square):
+    """ Returns the position of a square index as a tuple[row, column]. """
+    return divmod(square, 8)
+
+
+def _key(piece, square):
+    """ Returns the Zobrist key of a piece on a square. """
+    return zobrist.piece_key(piece.get_team_index(), piece.get_type_index(),
+                             square)
+
+
+def _attacks_from(piece, square, occupied):
+    """ Returns the mask of cells attacked by a piece on a square, given the
+    mask of occupied cells. """
+    piece_type = piece.get_type_index()
+    if piece_type == PAWN:
+        return bitboard.PAWN_ATTACKS[piece.get_team_index()][square]
+    elif piece_type == KNIGHT:
+        return bitboard.KNIGHT_ATTACKS[square]
+    elif piece_type == BISHOP:
+        return bitboard.bishop_attacks(square, occupied)
+    elif piece_type == ROOK:
+        return bitboard.rook_attacks(square, occupied)
+    elif piece_type == QUEEN:
+        return bitboard.queen_attacks(square, occupied)
+    return bitboard.KING_ATTACKS[square]
+
+
+class Board(object):
+    def __init__(self, black, white, turn=0):
+        """ A mailbox of the 64 cells of the Chessboard, kept in sync with
+        the pieces which occupy them, along with the Zobrist hash of the
+        position and the cells attacked by each piece.
+
+        The attacks are updated as pieces are placed, lifted and moved: only
+        the moving piece, any captured piece, and the Bishops, Rooks and
+        Queens whose attacks reach the cells which change are recomputed.
+
+        Parameters
+        ----------
+        black : list[Piece]
+            The list of current Black pieces.
+        white : list[Piece]
+            The list of current White pieces.
+        turn : int
+            The index in pieces.TEAMS of the team whose turn it is.
+        """
+        self._cells = [None] * 64
+        self._occupied = 0
+        self._teams = [0, 0]
+        # The cells attacked by the piece on each square, the squares of the
+        # sliding pieces and Kings, and each team's attacks once combined.
+        self._attacks = [0] * 64
+        self._sliders = 0
+        self._kings = [None, None]
+        self._attacked = [None, None]
+        self._map = None
+        self._turn = turn
+        self._hash = zobrist.TURN if turn else 0
+        self._history = []
+        self._black = black
+        self._white = white
+        for piece in black:
+            self.place(piece)
+        for piece in white:
+            self.place(piece)
+
+    def get_piece(self, position):
+        """ Returns the piece at the given position. None if it is empty. """
+        return self._cells[position[0] * 8 + position[1]]
+
+    def get_occupied(self):
+        """ Returns the mask of the square indices of occupied cells. """
+        return self._occupied
+
+    def get_hash(self):
+        """ Returns the 64-bit Zobrist hash of the position. """
+        return self._hash
+
+    def get_turn(self):
+        """ Returns the index in pieces.TEAMS of the team whose turn it is.
+        """
+        return self._turn
+
+    def pass_turn(self):
+        """ Passes the turn to the other team. """
+        self._turn = 1 - self._turn
+        self._hash ^= zobrist.TURN
+        self._map = None
+
+    def get_map(self):
+        """ Returns the AttackMap of the position, computing it if the
+        position has changed since it was last computed. """
+        if self._map is None:
+            self._map = AttackMap(self)
+        return self._map
+
+    def invalidate(self):
+        """ Discards the AttackMap of the position, once a piece has moved,
+        been taken or been promoted. """
+        self._map = None
+
+    def get_black(self):
+        """ Returns the list of current Black pieces. """
+        return self._black
+
+    def get_white(self):
+        """ Returns the list of current White pieces. """
+        return self._white
+
+    def place(self, piece):
+        """ Places a piece on the cell at its current position. """
+        square = square_of(piece.get_position())
+        self._cells[square] = piece
+        self._occupied |= 1 << square
+        self._teams[piece.get_team_index()] |= 1 << square
+        self._hash ^= _key(piece, square)
+        piece._board = self
+        self._refresh(square)
+        self._add_attacks(piece, square)
+
+    def lift(self, piece):
+        """ Clears the cell occupied by a piece, if the piece is still there.
+        """
+        square = square_of(piece.get_position())
+        if self._cells[square] is piece:
+            self._cells[square] = None
+            self._occupied &= ~(1 << square)
+            self._teams[piece.get_team_index()] &= ~(1 << square)
+            self._hash ^= _key(piece, square)
+            self._remove_attacks(piece, square)
+            self._refresh(square)
+
+    def relocate(self, piece, destination):
+        """ Moves a piece from its current cell to the destination cell. Any
+        piece already there is being captured, so it leaves the hash.
+
+        Parameters
+        ----------
+        piece : Piece
+            The piece which is moving.
+        destination : tuple[int, int]
+            The cell to which the piece is moving.
+        """
+        self.lift(piece)
+        square = square_of(destination)
+        captured = self._cells[square]
+        if captured is not None:
+            self._hash ^= _key(captured, square)
+            self._teams[captured.get_team_index()] &= ~(1 << square)
+            self._remove_attacks(captured, square)
+        self._cells[square] = piece
+        self._occupied |= 1 << square
+        self._teams[piece.get_team_index()] |= 1 << square
+        self._hash ^= _key(piece, square)
+        if captured is None:
+            self._refresh(square)
+        self._add_attacks(piece, square)
+
+    def _add_attacks(self, piece, square):
+        """ Records the attacks of a piece which has arrived on a square. """
+        self._attacks[square] = _attacks_from(piece, square, self._occupied)
+        piece_type = piece.get_type_index()
+        if piece_type in _SLIDERS:
+            self._sliders |= 1 << square
+        elif piece_type == KING:
+            self._kings[piece.get_team_index()] = square
+        self._attacked = [None, None]
+
+    def _remove_attacks(self, piece, square):
+        """ Forgets the attacks of a piece which has left a square. """
+        self._attacks[square] = 0
+        self._sliders &= ~(1 << square)
+        team = piece.get_team_index()
+        if self._kings[team] == square:
+            self._kings[team] = None
+        self._attacked = [None, None]
+
+    def _refresh(self, square):
+        """ Recomputes the attacks of the sliding pieces which reach a square
+        whose occupant has changed. """
+        bit = 1 << square
+        attacks = self._attacks
+        for slider in bitboard.squares(self._sliders):
+            if attacks[slider] & bit:
+                attacks[slider] = _attacks_from(self._cells[slider], slider,
+                                                self._occupied)
+        self._attacked = [None, None]
+
+    def get_attacks(self, position):
+        """ Returns the mask of cells attacked by the piece at a position. 0
+        if it is empty. """
+        return self._attacks[position[0] * 8 + position[1]]
+
+    def get_attacked(self, team):
+        """ Returns the mask of cells attacked by a team.
+
+        Parameters
+        ----------
+        team : int
+            The index in pieces.TEAMS of the attacking team.
+
+        Returns
+        -------
+        int
+            The mask of the square indices of the attacked cells, including
+            those occupied by the team's own pieces.
+        """
+        attacked = self._attacked[team]
+        if attacked is None:
+            attacked = 0
+            attacks = self._attacks
+            for square in bitboard.squares(self._teams[team]):
+                attacked |= attacks[square]
+            self._attacked[team] = attacked
+        return attacked
+
+    def is_attacked(self, position, team):
+        """ Determines whether a cell is attacked by any piece of a team.
+
+        Parameters
+        ----------
+        position : tuple[int, int]
+            The cell being checked.
+        team : int
+            The index in pieces.TEAMS of the attacking team.
+
+        Returns
+        -------
+        bool
+            True if the cell is attacked. False otherwise.
+        """
+        return bool(self.get_attacked(team) >> square_of(position) & 1)
+
+    def get_king(self, team):
+        """ Returns the position of a team's King. None if it has no King. """
+        square = self._kings[team]
+        return None if square is None else position_of(square)
+
+    def in_check(self, team=None):
+        """ Determines whether a team's King is attacked. By default, the
+        team is the one whose turn it is. """
+        if team is None:
+            team = self._turn
+        square = self._kings[team]
+        return square is not None \
+            and bool(self.get_attacked(1 - team) >> square & 1)
+
+    def exposes_king(self, piece, destination):
+        """ Determines whether moving a piece would leave its team's King in
+        check. The move isn't validated.
+
+        Parameters
+        ----------
+        piece : Piece
+            The piece which is moving.
+        destination : tuple[int, int]
+            The cell to which the piece is moving.
+
+        Returns
+        -------
+        bool
+            True if the King would be attacked after the move. False
+            otherwise.
+        """
+        team = piece.get_team_index()
+        cached = self._map
+        self.make_move(piece, destination)
+        exposed = self.in_check(team)
+        self.unmake_move()
+        self._map = cached
+        return exposed
+
+    def get_destinations(self, piece):
+        """ Returns the cells to which a piece can legally move or attack.
+
+        Parameters
+        ----------
+        piece : Piece
+            The piece which is moving.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            The cells which the piece can reach by the game's rules without
+            leaving its King in check.
+        """
+        square = square_of(piece.get_position())
+        team = piece.get_team_index()
+        if piece.get_type_index() == PAWN:
+            targets = self._attacks[square] & self._teams[1 - team]
+            push = bitboard.PAWN_PUSHES[team]
+            for target in (square + push, square + 2 * push):
+                if 0 <= target < 64 and not self._occupied >> target & 1 \
+                        and piece.check_move(position_of(target),
+                                             self._black, self._white):
+                    targets |= 1 << target
+        else:
+            targets = self._attacks[square] & ~self._teams[team]
+        return [position_of(target) for target in bitboard.squares(targets)
+                if not self.exposes_king(piece, position_of(target))]
+
+    def has_legal_move(self, team=None):
+        """ Determines whether a team can make any legal move. By default,
+        the team is the one whose turn it is. """
+        if team is None or team == self._turn:
+            return self.get_map().has_legal_move()
+        pieces = self._black if team == BLACK else self._white
+        return any(self.get_destinations(piece) for piece in tuple(pieces))
+
+    def get_status(self):
+        """ Returns the state of the game for the team whose turn it is:
+        PLAYING, CHECK, CHECKMATE or STALEMATE. A team whose King has been
+        taken is also in CHECKMATE. """
+        team = self._turn
+        if self._kings[team] is None:
+            return CHECKMATE
+        check = self.in_check(team)
+        if self.has_legal_move(team):
+            return CHECK if check else PLAYING
+        return CHECKMATE if check else STALEMATE
+
+    def get_winner(self):
+        """ Returns the winning team as a string, DRAW after a stalemate, or
+        None if the game isn't over. """
+        status = self.get_status()
+        if status == CHECKMATE:
+            return TEAMS[1 - self._turn]
+        elif status == STALEMATE:
+            return DRAW
+        return None
+
+    def _team(self, piece):
+        """ Returns the list of current pieces of a piece's team. """
+        return self._black if piece.get_team_index() == BLACK else self._white
+
+    def make_move(self, piece, destination, promotion=None):
+        """ Moves a piece, capturing any piece at the destination, and passes
+        the turn, recording how to unmake the move. The move isn't
+        validated.
+
+        Parameters
+        ----------
+        piece : Piece
+            The piece which is moving.
+        destination : tuple[int, int]
+            The cell to which the piece is moving.
+        promotion : str
+            The type to which a Pawn is promoted. None if there is no
+            promotion.
+        """
+        captured = self.get_piece(destination)
+        index = None
+        if captured is not None:
+            team = self._team(captured)
+            index = team.index(captured)
+            del team[index]
+        pawn_index = None
+        if promotion is not None:
+            pawn_index = self._team(piece).index(piece)
+        self._history.append((piece, piece.get_position(),
+                              piece.get_initial(), captured, index,
+                              pawn_index, self._hash))
+        piece._relocate(destination)
+        piece._initial = False
+        if promotion is not None:
+            team = self._team(piece)
+            piece.promote(promotion, self._black, self._white)
+            team.insert(pawn_index, team.pop())
+        self.pass_turn()
+
+    def unmake_move(self):
+        """ Unmakes the last move made by make_move, restoring the pieces,
+        the turn and the hash as they were before it.
+
+        Returns
+        -------
+        Piece
+            The piece which was moved.
+        """
+        piece, origin, initial, captured, index, pawn_index, key = \
+            self._history.pop()
+        if pawn_index is not None:
+            team = self._team(piece)
+            promoted = team[pawn_index]
+            self.lift(promoted)
+            team[pawn_index] = piece
+            self.place(piece)
+        piece._relocate(origin)
+        piece._initial = initial
+        if captured is not None:
+            self._team(captured).insert(index, captured)
+            self.place(captured)
+        self._turn = 1 - self._turn
+        self._hash = key
+        self._map = None
+        return piece
+
+    def get_ply(self):
+        """ Returns the number of moves made by make_move which haven't been
+        unmade. """
+        return len(self._history)
+
+
+class AttackMap(object):
+    def __init__(self, board):
+        """ The cells attacked and defended by each team in a position, and
+        the legal destinations of the pieces of the team whose turn it is.
+        It is computed once per turn, and then answers each query in
+        constant time.
+
+        Parameters
+        ----------
+        board : Board
+            The Board of the position.
+        """
+        self._turn = board.get_turn()
+        self._attacks = tuple(board._attacks)
+        self._attacked = (board.get_attacked(WHITE),
+                          board.get_attacked(BLACK))
+        self._teams = tuple(board._teams)
+        pieces = board.get_black() if self._turn == BLACK \
+            else board.get_white()
+        self._destinations = {
+            piece.get_position(): tuple(board.get_destinations(piece))
+            for piece in tuple(pieces)}
+
+    def get_turn(self):
+        """ Returns the index in pieces.TEAMS of the team whose turn it is.
+        """
+        return self._turn
+
+    def get_attacked(self, team):
+        """ Returns the mask of cells attacked by a team. """
+        return self._attacked[team]
+
+    def get_defended(self, team):
+        """ Returns the mask of a team's pieces which another of its pieces
+        defends. """
+        return self._attacked[team] & self._teams[team]
+
+    def is_attacked(self, position, team):
+        """ Determines whether a cell is attacked by any piece of a team.
+
+        Parameters
+        ----------
+        position : tuple[int, int]
+            The cell being checked.
+        team : int
+            The index in pieces.TEAMS of the attacking team.
+
+        Returns
+        -------
+        bool
+            True if the cell is attacked. False otherwise.
+        """
+        return bool(self._attacked[team] >> square_of(position) & 1)
+
+    def is_defended(self, position, team):
+        """ Determines whether a team's piece at a cell is defended by
+        another of its pieces. """
+        return bool(self.get_defended(team) >> square_of(position) & 1)
+
+    def get_attackers(self, position, team):
+        """ Returns the cells of a team's pieces which attack a cell.
+
+        Parameters
+        ----------
+        position : tuple[int, int]
+            The cell being attacked.
+        team : int
+            The index in pieces.TEAMS of the attacking team.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            The cells of the attacking pieces.
+        """
+        bit = 1 << square_of(position)
+        return [position_of(square)
+                for square in bitboard.squares(self._teams[team])
+                if self._attacks[square] & bit]
+
+    def get_destinations(self, position):
+        """ Returns the cells to which the piece at a cell can legally move
+        or attack. Empty if the cell has no piece of the team whose turn it
+        is. """
+        return self._destinations.get(tuple(position), ())
+
+    def has_legal_move(self):
+        """ Determines whether the team whose turn it is can move. """
+        return any(self._destinations.values())
+
+
+def new_board():
+    """ Returns a Board with the pieces at their positions for a new game. """
+    black = [
+        Rook((0, 0), "Black"),
+        Knight((0, 1), "Black"),
+        Bishop((0, 2), "Black"),
+        Queen((0, 3), "Black"),
+        King((0, 4), "Black"),
+        Bishop((0, 5), "Black"),
+        Knight((0, 6), "Black"),
+        Rook((0, 7), "Black"),
+        Pawn((1, 0), "Black"),
+        Pawn((1, 1), "Black"),
+        Pawn((1, 2), "Black"),
+        Pawn((1, 3), "Black"),
+        Pawn((1, 4), "Black"),
+        Pawn((1, 5), "Black"),
+        Pawn((1, 6), "Black"),
+        Pawn((1, 7), "Black")
+    ]
+
+    white = [
+        Pawn((6, 0), "White"),
+        Pawn((6, 1), "White"),
+        Pawn((6, 2), "White"),
+        Pawn((6, 3), "White"),
+        Pawn((6, 4), "White"),
+        Pawn((6, 5), "White"),
+        Pawn((6, 6), "White"),
+        Pawn((6, 7), "White"),
+        Rook((7, 0), "White"),
+        Knight((7, 1), "White"),
+        Bishop((7, 2), "White"),
+        King((7, 3), "White"),
+        Queen((7, 4), "White"),
+        Bishop((7, 5), "White"),
+        Knight((7, 6), "White"),
+        Rook((7, 7), "White")
+    ]
+
+    return Board(black, white)
@@ -0,0 +1,324 @@
+""" An opening book: a file of moves played from known positions.
+
+The file has the layout of a Polyglot book: entries of 16 bytes, sorted by
+key, each holding big-endian the 64-bit key of a position, the 16-bit move,
+its 16-bit weight and 32 bits of learning data. Moves are written as in
+Polyglot, with castling as the King taking its own Rook. The keys are the
+Zobrist hashes of zobrist.py rather than Polyglot's own table, so books are
+built with this module, and leave out the castling rights and en passant
+square: the game's own positions, as bitboard.from_lists and Board build
+them, record neither, so they are keyed alike to positions replayed from
+PGN.
+
+The file is memory-mapped and searched in place, so it never loads into a
+process's memory, and processes reading the same book share its pages.
+
+Usage: python book.py build GAMES.pgn BOOK.bin [--plies PLIES]
+       python book.py probe BOOK.bin [--fen FEN]
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+import bitboard
+import pgn
+import zobrist
+from board import position_of
+from pieces import KING
+
+ENTRY = struct.Struct(">QHHI")
+_KEY = struct.Struct(">Q")
+
+
+def _is_king(position, square):
+    """ Returns whether a King is on a square of a bitboard.Position or a
+    Board. """
+    if isinstance(position, bitboard.Position):
+        contents = position.piece_at(square)
+        return contents is not None and contents[1] == KING
+    piece = position.get_piece(position_of(square))
+    return piece is not None and piece.get_type_index() == KING
+
+
+def to_polyglot(position, move):
+    """ Returns a move in Polyglot's 16-bit encoding.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position in which the move is made. A Board is also accepted.
+    move : int
+        The move, encoded as by bitboard.encode_move.
+
+    Returns
+    -------
+    int
+        The move as Polyglot encodes it, with squares counted from a1 and
+        castling as the King moving to its Rook's square.
+    """
+    origin, destination, promotion = bitboard.decode_move(move)
+    if abs(destination - origin) == 2 and origin in (4, 60) \
+            and _is_king(position, origin):
+        destination = origin + 3 if destination > origin else origin - 4
+    origin ^= 56
+    destination ^= 56
+    return destination | origin << 6 | promotion << 12
+
+
+def from_polyglot(position, raw):
+    """ Returns a move given in Polyglot's 16-bit encoding.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position in which the move is made. A Board is also accepted.
+    raw : int
+        The move as Polyglot encodes it.
+
+    Returns
+    -------
+    int
+        The move, encoded as by bitboard.encode_move.
+    """
+    destination = (raw & 63) ^ 56
+    origin = (raw >> 6 & 63) ^ 56
+    promotion = raw >> 12 & 7
+    if origin in (4, 60) and destination in (origin + 3, origin - 4) \
+            and _is_king(position, origin):
+        destination = origin + 2 if destination > origin else origin - 2
+    return bitboard.encode_move(origin, destination, promotion)
+
+
+def get_key(position):
+    """ Returns the key of a position in a book: its Zobrist hash without
+    its castling rights and en passant square.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position. A Board, whose hash has neither, is also accepted.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    key = position.get_hash()
+    if isinstance(position, bitboard.Position):
+        key ^= zobrist.CASTLING[position.get_castling()]
+        if position.get_en_passant() is not None:
+            key ^= zobrist.EN_PASSANT[position.get_en_passant() & 7]
+    return key
+
+
+class Book(object):
+    def __init__(self, path):
+        """ An opening book, memory-mapped from its file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the book's file.
+        """
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._count = size // ENTRY.size
+        self._map = None
+        if self._count:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Unmaps and closes the book's file. """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _first(self, key):
+        """ Returns the index of the first entry whose key isn't less than
+        the given key. """
+        low, high = 0, self._count
+        data = self._map
+        while low < high:
+            middle = (low + high) // 2
+            if _KEY.unpack_from(data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_entries(self, key):
+        """ Returns the entries of a position.
+
+        Parameters
+        ----------
+        key : int
+            The key of the position, as returned by get_key.
+
+        Returns
+        -------
+        list[tuple[int, int, int]]
+            The Polyglot move, weight and learning data of each entry.
+        """
+        entries = []
+        if self._map is None:
+            return entries
+        index = self._first(key)
+        while index < self._count:
+            entry_key, raw, weight, learn = ENTRY.unpack_from(
+                self._map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((raw, weight, learn))
+            index += 1
+        return entries
+
+    def get_moves(self, position):
+        """ Returns the book moves of a position.
+
+        Parameters
+        ----------
+        position : bitboard.Position
+            The position. A Board is also accepted.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            Each move, encoded as by bitboard.encode_move, and its weight.
+        """
+        return [(from_polyglot(position, raw), weight)
+                for raw, weight, learn in self.get_entries(get_key(position))]
+
+    def choose(self, position, best=False, rng=random):
+        """ Chooses a book move, at random in proportion to the weights.
+
+        Parameters
+        ----------
+        position : bitboard.Position
+            The position. A Board is also accepted.
+        best : bool
+            Whether to choose the move of greatest weight instead.
+        rng : random.Random
+            The source of randomness.
+
+        Returns
+        -------
+        int
+            The move, encoded as by bitboard.encode_move. None if the
+            position isn't in the book.
+        """
+        entries = self.get_moves(position)
+        if not entries:
+            return None
+        if best:
+            return max(entries, key=lambda entry: entry[1])[0]
+        total = sum(weight for move, weight in entries)
+        if not total:
+            return rng.choice(entries)[0]
+        pick = rng.randrange(total)
+        for move, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return move
+        return entries[-1][0]
+
+
+def write(path, entries):
+    """ Writes a book.
+
+    Parameters
+    ----------
+    path : str
+        The path of the book's file.
+    entries : iterable[tuple[int, int, int, int]]
+        The key, Polyglot move, weight and learning data of each entry, in
+        any order.
+
+    Returns
+    -------
+    int
+        The number of entries written.
+    """
+    entries = sorted(entries, key=lambda entry: (entry[0], -entry[2]))
+    with open(path, "wb") as file:
+        for entry in entries:
+            file.write(ENTRY.pack(*entry))
+    return len(entries)
+
+
+def build(games, path, plies=16):
+    """ Writes a book of the moves played in the openings of games.
+
+    Parameters
+    ----------
+    games : iterable[pgn.Game]
+        The games, such as those of pgn.read_games.
+    path : str
+        The path of the book's file.
+    plies : int
+        The number of moves of each game to include.
+
+    Returns
+    -------
+    int
+        The number of entries written.
+    """
+    counts = {}
+    for game in games:
+        try:
+            for ply, (position, move) in enumerate(game.replay()):
+                if ply >= plies:
+                    break
+                entry = (get_key(position), to_polyglot(position, move))
+                counts[entry] = counts.get(entry, 0) + 1
+        except ValueError:
+            continue
+    top = max(counts.values(), default=1)
+    scale = max(1, -(-top // 0xFFFF))
+    return write(path, ((key, raw, max(1, count // scale), 0)
+                        for (key, raw), count in counts.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or probe an opening "
+                                                 "book.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    builder = commands.add_parser("build", help="build a book from games")
+    builder.add_argument("games", help="PGN file of games")
+    builder.add_argument("book", help="book file to write")
+    builder.add_argument("--plies", type=int, default=16,
+                         help="moves of each game to include (default 16)")
+    prober = commands.add_parser("probe", help="list a position's moves")
+    prober.add_argument("book", help="book file to read")
+    prober.add_argument("--fen", default=bitboard.START_FEN,
+                        help="position to look up (default: the start)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build(pgn.read_games(args.games), args.book, args.plies)
+        print(f"{count} entries written to {args.book}")
+        return 0
+    position = bitboard.from_fen(args.fen)
+    with Book(args.book) as book:
+        entries = book.get_moves(position)
+        for move, weight in sorted(entries, key=lambda entry: -entry[1]):
+            print(f"{pgn.to_san(position, move)}: {weight}")
+    return 0 if entries else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,57 +1,112 @@
-import PySimpleGUI as sg
-from pieces import *
+""" The Chess game window.
+
+Usage: python chess.py [--engine white|black] [--fen FEN] [--pgn FILE]
+                       [--no-welcome] [...]
+
+The window toolkit and the computer player are only imported once they are
+needed, after the command line is parsed, so --help and bad arguments
+return at once and a game without the computer never loads the engine.
+"""
+
+import argparse
+import sys
+
+import game
+import instrument
 import other
 
 
-sg.theme("DarkGrey11")
-other.welcome()
-
-chessboard = [
-    [sg.Button("New Game", key="new_game", size=(15, 1)),
-     sg.Text(key="turn", size=(15, 1), justification="center"),
-     sg.Text(key="out", size=(50, 1), justification="center")]]\
-        + [
-    [other.LightCell((row, column)) if (row + column) % 2 == 0
-    else other.DarkCell((row, column)) for column in range(8)]
-    for row in range(8)]
-
-game_window = sg.Window("Chess", chessboard, finalize=True, size=(716, 700),
-                        location=(0, 0), icon=r".\icons\chess-board.ico")
-black, white, initial, destination, winner, count, turns = other.new_game(
-    game_window)
-
-# Game loop.
-while True:
-    winner = other.check_endgame(black, white)
-    if winner is not None:
-        game_window["turn"].update("")
-        game_window["out"].update(f"{winner} wins!")
-
-    event, values = game_window.read()
-
-    if event == sg.WIN_CLOSED:
-        game_window.close()
-        break
-    elif event == "new_game":
-        black, white, initial, destination, winner, count, turns = \
-            other.new_game(game_window)
-    else:  # A cell is clicked.
-        if initial is None:  # The piece to move hasn't been chosen.
-            piece = moves.get_piece(black, white, event)
-            if piece is not None and piece.get_team() == turns[count % 2]:
-                initial = event
-        else:
-            destination = event
-            dest_piece = moves.get_piece(black, white, destination)
-            if dest_piece is None:
-                if piece.move(destination, black, white, game_window):
-                    count, black, white = other.end_turn(count, game_window,
-                                                         piece, black, white)
-            else:
-                if piece.attack(destination, black, white, game_window):
-                    black, white = dest_piece.kill(black, white)
-                    count, black, white = other.end_turn(count, game_window,
-                                                         piece, black, white)
-            initial, destination = None, None
-
-game_window.close()
+def get_parser():
+    """ Returns the parser of the game's command line. """
+    parser = argparse.ArgumentParser(description="A two-player Chess game.")
+    parser.add_argument("--engine", choices=["white", "black"],
+                        help="let the computer play White or Black")
+    parser.add_argument("--movetime", type=float, default=2.0,
+                        help="the computer's time per move, in seconds "
+                             "(default 2)")
+    parser.add_argument("--nodes", type=int,
+                        help="the computer's node budget per move")
+    parser.add_argument("--hash", type=float, default=16,
+                        help="the computer's transposition table size, in MB "
+                             "(default 16)")
+    parser.add_argument("--book", help="the computer's opening book file")
+    parser.add_argument("--tablebase",
+                        help="the computer's endgame tablebase file")
+    parser.add_argument("--fen",
+                        help="start each game from this position, in "
+                             "Forsyth-Edwards Notation")
+    parser.add_argument("--pgn",
+                        help="append each finished game to this PGN file")
+    parser.add_argument("--no-welcome", action="store_true",
+                        help="start without the welcome window")
+    parser.add_argument("--profile",
+                        help="record the time spent in the rules and window "
+                             "updates, and write it to this file on exit, in "
+                             "Prometheus's format if it ends in .prom and as "
+                             "JSON otherwise")
+    return parser
+
+
+def get_engine(args):
+    """ Returns the computer player configured on the command line. None if
+    there is none. """
+    if args.engine is None:
+        return None
+    from book import Book
+    from engine import Engine
+    from tablebase import Tablebase
+    from transposition import TranspositionTable
+    return Engine(args.movetime, args.nodes,
+                  table=TranspositionTable(args.hash) if args.hash else None,
+                  book=Book(args.book) if args.book else None,
+                  tablebase=Tablebase(args.tablebase) if args.tablebase
+                  else None)
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.profile:
+        instrument.enable()
+    engine = get_engine(args)
+    engine_team = args.engine.capitalize() if args.engine else None
+
+    import PySimpleGUI as sg
+    sg.theme("DarkGrey11")
+    if not args.no_welcome:
+        other.welcome()
+
+    game_window = sg.Window("Chess", other.board_layout(), finalize=True,
+                            size=(716, 700), location=(0, 0),
+                            icon=r".\icons\chess-board.ico")
+    session = game.Session(game_window, args.fen, engine, engine_team)
+    if args.pgn:
+        players = {"White": "Player", "Black": "Player"}
+        if engine_team is not None:
+            players[engine_team] = "Computer"
+        game.record_games(session.get_events(), args.pgn, players)
+    session.new_game()
+
+    # Game loop. The game's state is only recomputed when a move is
+    # committed, so clicks which change nothing cost nothing.
+    while True:
+        if session.is_engine_turn():
+            session.play_engine()
+            continue
+
+        event, values = game_window.read()
+
+        if event == sg.WIN_CLOSED:
+            break
+        elif event == "new_game":
+            session.new_game()
+        else:  # A cell is clicked.
+            session.click(event)
+
+    game_window.close()
+    if args.profile:
+        instrument.dump(args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+""" A Chess engine which searches bitboard positions for the best move.
+
+The search is a negamax alpha-beta search with iterative deepening. Captures
+are searched first, most valuable victim by least valuable attacker, and
+the search stops when its time or node budget is spent, returning the best
+move of the deepest completed iteration. A position in the opening book is
+answered with a book move, without a search, and positions in the endgame
+tablebases are scored by their result instead of searched.
+
+Usage: python engine.py [--fen FEN] [--movetime SECONDS] [--nodes NODES]
+                        [--depth DEPTH] [--hash MB] [--book FILE]
+                        [--tablebase FILE]
+"""
+
+import argparse
+import sys
+import time
+
+import bitboard
+from bitboard import WHITE
+from book import Book
+from pieces import PAWN
+from tablebase import Tablebase, WIN, DRAW, LOSS
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE = 100000
+# Scores beyond this are mates, stored in the table relative to the node.
+MATED = MATE - 1000
+# Scores of won tablebase positions, less the distance from the root.
+TABLEBASE_WIN = MATED - 1000
+VALUES = (100, 320, 330, 500, 900, 0)
+
+# Bonuses for the cells each type of White piece occupies, from the top-left
+# cell. Black's are read with the rows reversed.
+_CENTRE = tuple(
+    10 - 3 * (abs(2 * (square // 8) - 7) + abs(2 * (square % 8) - 7)) // 2
+    for square in range(64))
+_ADVANCE = tuple(5 * (6 - square // 8) if 8 <= square < 56 else 0
+                 for square in range(64))
+BONUSES = (
+    tuple(_ADVANCE[square] + _CENTRE[square] // 2 for square in range(64)),
+    _CENTRE,
+    tuple(value // 2 for value in _CENTRE),
+    (0,) * 64,
+    tuple(value // 4 for value in _CENTRE),
+    tuple(-value for value in _CENTRE)
+)
+
+
+class _Timeout(Exception):
+    """ Raised to abandon a search once its budget is spent. """
+
+
+class SearchResult(object):
+    def __init__(self, move, score, depth, nodes, elapsed):
+        """ The outcome of a search.
+
+        Parameters
+        ----------
+        move : int
+            The best move found, encoded as by bitboard.encode_move. None if
+            there are no legal moves.
+        score : int
+            The score of the move, in centipawns, for the team whose turn it
+            is.
+        depth : int
+            The depth of the deepest completed iteration.
+        nodes : int
+            The number of positions searched.
+        elapsed : float
+            The time taken, in seconds.
+        """
+        self._move = move
+        self._score = score
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+
+    def __repr__(self):
+        name = "none" if self._move is None \
+            else bitboard.move_name(self._move)
+        return f"{name} (score {self._score}, depth {self._depth}, " \
+               f"{self._nodes} nodes in {self._elapsed:.2f} s)"
+
+    def get_move(self):
+        """ Returns the best move found. None if there are no legal moves. """
+        return self._move
+
+    def get_score(self):
+        """ Returns the score of the best move, in centipawns. """
+        return self._score
+
+    def get_depth(self):
+        """ Returns the depth of the deepest completed iteration. """
+        return self._depth
+
+    def get_nodes(self):
+        """ Returns the number of positions searched. """
+        return self._nodes
+
+    def get_time(self):
+        """ Returns the time taken by the search, in seconds. """
+        return self._elapsed
+
+
+def evaluate(position):
+    """ Returns the static score of a position, in centipawns, for the team
+    whose turn it is. """
+    score = 0
+    for team, sign, flip in ((WHITE, 1, 0), (1 - WHITE, -1, 56)):
+        for piece_type in range(6):
+            bonuses = BONUSES[piece_type]
+            value = VALUES[piece_type]
+            for square in bitboard.squares(position.get_pieces(team,
+                                                               piece_type)):
+                score += sign * (value + bonuses[square ^ flip])
+    return score if position.get_turn() == WHITE else -score
+
+
+def order_moves(position, legal, best=None):
+    """ Returns moves sorted so the likeliest best are searched first.
+
+    The given best move comes first, then captures and promotions by most
+    valuable victim and least valuable attacker, then the other moves.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position in which the moves are made.
+    legal : list[int]
+        The moves to sort.
+    best : int
+        The move to search first. None if there is no such move.
+
+    Returns
+    -------
+    list[int]
+        The sorted moves.
+    """
+    scored = []
+    for move in legal:
+        if move == best:
+            scored.append((-1000000, move))
+            continue
+        victim = position.piece_at(move >> 6 & 63)
+        key = 0
+        if victim is not None:
+            attacker = position.piece_at(move & 63)[1]
+            key -= 10 * VALUES[victim[1]] - VALUES[attacker] // 10 + 10000
+        if move >> 12:
+            key -= VALUES[move >> 12] + 10000
+        scored.append((key, move))
+    scored.sort()
+    return [move for key, move in scored]
+
+
+class Engine(object):
+    def __init__(self, time_limit=1.0, node_limit=None, max_depth=64,
+                 table=None, book=None, tablebase=None, stop=None):
+        """ A searcher of the best move in a position.
+
+        Parameters
+        ----------
+        time_limit : float
+            The time budget of each search, in seconds. None if there is no
+            time limit.
+        node_limit : int
+            The node budget of each search. None if there is no node limit.
+        max_depth : int
+            The depth at which iterative deepening stops.
+        table : transposition.TranspositionTable
+            The table of searched positions, kept between searches. None to
+            search without a table.
+        book : book.Book
+            The opening book, whose moves are played without a search. None
+            to always search.
+        tablebase : tablebase.Tablebase
+            The endgame tablebases, by which positions in them are scored.
+            None to search them.
+        stop : multiprocessing.Event
+            An event which, once set, ends the search as if its budget were
+            spent. None if only the budget ends it.
+        """
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        self._max_depth = max_depth
+        self._table = table
+        self._book = book
+        self._tablebase = tablebase
+        self._stop = stop
+        self._nodes = 0
+        self._deadline = None
+
+    def search(self, position, start_depth=1):
+        """ Searches a position for the best move.
+
+        Parameters
+        ----------
+        position : bitboard.Position
+            The position to search. It is left as it was given.
+        start_depth : int
+            The depth of the first iteration.
+
+        Returns
+        -------
+        SearchResult
+            The best move and how it was found.
+        """
+        start = time.perf_counter()
+        self._nodes = 0
+        self._deadline = None
+        if self._time_limit is not None:
+            self._deadline = start + self._time_limit
+        legal = order_moves(position, position.generate_moves())
+        if not legal:
+            return SearchResult(None, -MATE if position.in_check() else 0, 0,
+                                0, time.perf_counter() - start)
+        if self._book is not None:
+            move = self._book.choose(position)
+            if move in legal:
+                return SearchResult(move, 0, 0, 0,
+                                    time.perf_counter() - start)
+
+        best_move, best_score, depth = legal[0], 0, 0
+        history = position.get_ply()
+        try:
+            for iteration in range(start_depth, self._max_depth + 1):
+                score, move = self._root(position, legal, iteration)
+                best_move, best_score, depth = move, score, iteration
+                legal = order_moves(position, legal, best_move)
+                if abs(score) >= MATE - self._max_depth:
+                    break
+        except _Timeout:
+            while position.get_ply() > history:
+                position.unmake_move()
+        return SearchResult(best_move, best_score, depth, self._nodes,
+                            time.perf_counter() - start)
+
+    def _root(self, position, legal, depth):
+        """ Searches each move at the root to a given depth. Returns the best
+        score and move. """
+        alpha, best = -MATE - 1, legal[0]
+        for move in legal:
+            position.make_move(move)
+            score = -self._negamax(position, depth - 1, -MATE - 1, -alpha, 1)
+            position.unmake_move()
+            if score > alpha:
+                alpha, best = score, move
+        return alpha, best
+
+    def get_table(self):
+        """ Returns the engine's transposition table. None if it has none. """
+        return self._table
+
+    def _count(self):
+        """ Counts a node, raising _Timeout if the budget is spent. """
+        self._nodes += 1
+        if self._nodes & 1023 == 0:
+            if self._node_limit is not None \
+                    and self._nodes >= self._node_limit:
+                raise _Timeout()
+            if self._deadline is not None \
+                    and time.perf_counter() >= self._deadline:
+                raise _Timeout()
+            if self._stop is not None and self._stop.is_set():
+                raise _Timeout()
+
+    def _negamax(self, position, depth, alpha, beta, ply):
+        """ Returns the score of a position searched to a given depth, within
+        the window (alpha, beta). """
+        self._count()
+        if position.get_halfmove() >= 100:
+            return 0
+        if self._tablebase is not None:
+            # Drawn positions needn't be searched. Won and lost ones still
+            # are, for the mates within reach.
+            result = self._tablebase.probe(position)
+            if result == DRAW:
+                return 0
+            if result is not None and depth <= 0:
+                return self._tablebase_score(position, result, ply)
+        if depth <= 0:
+            return self._quiesce(position, alpha, beta)
+
+        table = self._table
+        key = position.get_hash()
+        table_move = None
+        if table is not None:
+            entry = table.probe(key)
+            if entry is not None:
+                stored_depth, score, bound, table_move = entry
+                if stored_depth >= depth:
+                    if score > MATED:
+                        score -= ply
+                    elif score < -MATED:
+                        score += ply
+                    if bound == EXACT \
+                            or bound == LOWER and score >= beta \
+                            or bound == UPPER and score <= alpha:
+                        return score
+
+        legal = position.generate_moves()
+        if not legal:
+            return -MATE + ply if position.in_check() else 0
+        original_alpha = alpha
+        best_score, best_move = -MATE - 1, 0
+        for move in order_moves(position, legal, table_move):
+            position.make_move(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha,
+                                   ply + 1)
+            position.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if table is not None:
+            if best_score >= beta:
+                bound = LOWER
+            elif best_score <= original_alpha:
+                bound = UPPER
+            else:
+                bound = EXACT
+            score = best_score
+            if score > MATED:
+                score += ply
+            elif score < -MATED:
+                score -= ply
+            table.store(key, depth, score, bound, best_move)
+        return best_score
+
+    def _tablebase_score(self, position, result, ply):
+        """ Returns the score of a position in the tablebases. Wins are
+        scored above any evaluation, and more for the lone King nearer the
+        edge, the Kings nearer each other, Pawns further advanced and
+        promoted, so the search makes progress toward mate. """
+        if result == DRAW:
+            return 0
+        us = position.get_turn()
+        if result == LOSS and not position.generate_moves():
+            return -MATE + ply
+        strong = us if result == WIN else 1 - us
+        king = position.king_square(strong)
+        lone = position.king_square(1 - strong)
+        distance = max(abs((king >> 3) - (lone >> 3)),
+                       abs((king & 7) - (lone & 7)))
+        score = TABLEBASE_WIN - ply - _CENTRE[lone] - 4 * distance
+        flip = 0 if strong == WHITE else 56
+        for piece_type in range(5):
+            for square in bitboard.squares(position.get_pieces(strong,
+                                                               piece_type)):
+                score += VALUES[piece_type] // 10
+                if piece_type == PAWN:
+                    score += _ADVANCE[square ^ flip]
+        return score if result == WIN else -score
+
+    def _quiesce(self, position, alpha, beta):
+        """ Returns the score of a position once its captures are resolved.
+        """
+        self._count()
+        standing = evaluate(position)
+        if standing >= beta:
+            return standing
+        if standing > alpha:
+            alpha = standing
+        us = position.get_turn()
+        enemy = position.get_occupied(1 - us)
+        captures = [move for move in position.generate_pseudo_moves()
+                    if enemy >> (move >> 6 & 63) & 1 or move >> 12]
+        for move in order_moves(position, captures):
+            position.make_move(move)
+            if position.in_check(us):
+                position.unmake_move()
+                continue
+            score = -self._quiesce(position, -beta, -alpha)
+            position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Search a Chess position for the best move.")
+    parser.add_argument("--fen", default=bitboard.START_FEN,
+                        help="position to search (default: the start)")
+    parser.add_argument("--movetime", type=float, default=1.0,
+                        help="time budget, in seconds (default 1)")
+    parser.add_argument("--nodes", type=int, help="node budget")
+    parser.add_argument("--depth", type=int, default=64,
+                        help="maximum depth (default 64)")
+    parser.add_argument("--hash", type=float, default=16,
+                        help="transposition table size, in MB (default 16)")
+    parser.add_argument("--book", help="opening book file")
+    parser.add_argument("--tablebase", help="endgame tablebase file")
+    args = parser.parse_args(argv)
+    table = TranspositionTable(args.hash) if args.hash else None
+    book = Book(args.book) if args.book else None
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    engine = Engine(args.movetime, args.nodes, args.depth, table, book,
+                    tablebase)
+    print(engine.search(bitboard.from_fen(args.fen)))
+    if table is not None:
+        stats = table.get_stats()
+        print(f"table: {stats['hit_rate']:.1%} hit rate, "
+              f"{stats['fill_rate']:.1%} full")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
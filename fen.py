@@ -0,0 +1,150 @@
+""" Loading and saving positions of the Chess game in Forsyth-Edwards
+Notation (FEN).
+
+A position of the game is the black and white lists of pieces, and the
+number of turns completed. FEN also records each piece's _initial flag where
+it matters: a Pawn on its initial row may still step twice. The game has no
+castling, so positions are written without castling rights, and those of a
+position being loaded are ignored.
+"""
+
+import bitboard
+from board import Board, new_board
+from pieces import WHITE, BLACK, PAWN, Pawn, Knight, Bishop, Rook, Queen, \
+    King
+
+_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+# The cells at which each team and type of piece starts a new game.
+_start = new_board()
+_HOMES = frozenset((piece.get_team_index(), piece.get_type_index(),
+                    piece.get_position())
+                   for piece in _start.get_black() + _start.get_white())
+
+
+def load(fen):
+    """ Returns the pieces and turn count of a position in FEN.
+
+    Parameters
+    ----------
+    fen : str
+        The position in Forsyth-Edwards Notation.
+
+    Returns
+    -------
+    tuple[list[Piece], list[Piece], int]
+        list[Piece] : The list of current Black pieces, on a Board.
+        list[Piece] : The list of current White pieces, on a Board.
+        int : The number of turns completed.
+
+    Raises
+    ------
+    ValueError
+        If the notation isn't valid, or the position has no pieces.
+    """
+    return from_position(bitboard.from_fen(fen))
+
+
+def from_position(position):
+    """ Returns the pieces and turn count of a bitboard Position.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position to convert.
+
+    Returns
+    -------
+    tuple[list[Piece], list[Piece], int]
+        list[Piece] : The list of current Black pieces, on a Board.
+        list[Piece] : The list of current White pieces, on a Board.
+        int : The number of turns completed.
+
+    Raises
+    ------
+    ValueError
+        If the position has no pieces, as there would be no Board to place
+        them on.
+    """
+    teams = ([], [])
+    for square in range(64):
+        contents = position.piece_at(square)
+        if contents is None:
+            continue
+        team, piece_type = contents
+        cell = divmod(square, 8)
+        piece = _CLASSES[piece_type](cell, team)
+        if piece_type == PAWN:
+            piece._initial = cell[0] == bitboard.PAWN_ROWS[team]
+        else:
+            piece._initial = (team, piece_type, cell) in _HOMES
+        teams[team].append(piece)
+    if not any(teams):
+        raise ValueError("The position has no pieces.")
+    turn = position.get_turn()
+    count = (position.get_fullmove() - 1) * 2 + turn
+    black, white = teams[BLACK], teams[WHITE]
+    Board(black, white, turn)
+    return black, white, count
+
+
+def dump(black, white, count):
+    """ Returns the FEN of a position of the game.
+
+    Parameters
+    ----------
+    black : list[Piece]
+        The list of current Black pieces.
+    white : list[Piece]
+        The list of current White pieces.
+    count : int
+        The number of turns completed.
+
+    Returns
+    -------
+    str
+        The position in Forsyth-Edwards Notation. The game has no castling
+        and doesn't count moves since the last capture or Pawn move, so
+        those fields are "-" and 0.
+    """
+    position = bitboard.from_lists(black, white, count % 2,
+                                   fullmove=count // 2 + 1)
+    return position.to_fen()
+
+
+def read_positions(path):
+    """ Yields the positions in a file with one FEN per line, without
+    creating any pieces.
+
+    Blank lines and lines starting with "#" are skipped. Any fields after
+    the six of FEN, such as EPD operations, are ignored.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Yields
+    ------
+    bitboard.Position
+        The position on each line.
+
+    Raises
+    ------
+    ValueError
+        If a line isn't valid FEN. The message gives its line number.
+    """
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            notation = fields[:4]
+            for field in fields[4:6]:
+                if not field.isdigit():
+                    break
+                notation.append(field)
+            try:
+                yield bitboard.from_fen(" ".join(notation))
+            except ValueError as error:
+                raise ValueError(f"{path}, line {number}: {error}") from None
@@ -0,0 +1,262 @@
+""" The turns of a Chess game in its window, as a state machine which
+publishes an event when each move is committed.
+
+A Session waits for a piece to be selected, then for its destination, and
+does nothing once the game is over. The state of the game, whether it is
+over, is computed only when a move is committed or a game starts, never
+for clicks which change nothing. Other components follow the game by
+subscribing to its events:
+
+    NEW_GAME        black, white, count
+    MOVE_COMMITTED  initial, destination, piece, black, white, count
+    GAME_OVER       winner, count
+
+Each subscriber is called with the event's details as keyword arguments.
+"""
+
+import fen
+import moves
+import other
+import pgn
+from board import DRAW
+
+NEW_GAME = "new-game"
+MOVE_COMMITTED = "move-committed"
+GAME_OVER = "game-over"
+
+SELECTING, MOVING, OVER = "selecting", "moving", "over"
+RESULTS = {"White": "1-0", "Black": "0-1", DRAW: "1/2-1/2"}
+
+
+class Events(object):
+    def __init__(self):
+        """ The subscribers to each event of a game. """
+        self._subscribers = {}
+
+    def subscribe(self, event, callback):
+        """ Calls a function each time an event is published.
+
+        Parameters
+        ----------
+        event : str
+            The event, such as MOVE_COMMITTED.
+        callback : callable
+            The function, called with the event's details as keyword
+            arguments.
+
+        Returns
+        -------
+        callable
+            The function, so subscribe can be used as a decorator.
+        """
+        self._subscribers.setdefault(event, []).append(callback)
+        return callback
+
+    def unsubscribe(self, event, callback):
+        """ Stops calling a function when an event is published. """
+        callbacks = self._subscribers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def publish(self, event, **details):
+        """ Calls each subscriber to an event with its details. """
+        for callback in tuple(self._subscribers.get(event, ())):
+            callback(**details)
+
+
+class Session(object):
+    def __init__(self, window, position=None, engine=None, engine_team=None,
+                 events=None):
+        """ The games played in the Chess game window.
+
+        Parameters
+        ----------
+        window : sg.Window
+            The Chess game window.
+        position : str
+            The position from which each game starts, in Forsyth-Edwards
+            Notation. None to start from the initial position.
+        engine : engine.Engine
+            The computer player. None if both teams are played by people.
+        engine_team : str
+            The team played by the computer. None if there is none.
+        events : Events
+            The subscribers to the games' events. None to start with none.
+        """
+        self._window = window
+        self._position = position
+        self._engine = engine
+        self._engine_team = engine_team
+        self._events = Events() if events is None else events
+        self._black, self._white = [], []
+        self._count = 0
+        self._winner = None
+        self._state = OVER
+        self._piece = None
+        self._initial = None
+        self._targets = ()
+
+    def get_events(self):
+        """ Returns the subscribers to the games' events. """
+        return self._events
+
+    def get_state(self):
+        """ Returns SELECTING, MOVING or OVER. """
+        return self._state
+
+    def get_winner(self):
+        """ Returns the winner as a string, DRAW after a stalemate, or None
+        if the game isn't over. """
+        return self._winner
+
+    def get_count(self):
+        """ Returns the number of turns completed. """
+        return self._count
+
+    def get_turn(self):
+        """ Returns the team whose turn it is, as a string. """
+        return other.TURNS[self._count % 2]
+
+    def is_engine_turn(self):
+        """ Returns whether the computer is to move. """
+        return self._state != OVER and self.get_turn() == self._engine_team
+
+    def new_game(self):
+        """ Starts a new game. """
+        other.highlight(self._window, self._targets, None)
+        self._black, self._white, self._initial, _, self._winner, \
+            self._count, _ = other.new_game(self._window, self._position)
+        self._piece = None
+        self._targets = ()
+        self._state = SELECTING
+        self._events.publish(NEW_GAME, black=self._black, white=self._white,
+                             count=self._count)
+        # A game may start from a position which is already over.
+        self._update()
+
+    def click(self, cell):
+        """ Selects the piece at a cell, or moves the selected piece to it.
+
+        Parameters
+        ----------
+        cell : tuple[int, int]
+            The cell clicked.
+
+        Returns
+        -------
+        moves.Result
+            Whether the selected piece moved. None if no move was attempted.
+        """
+        if self._state == SELECTING:
+            self._select(cell)
+        elif self._state == MOVING:
+            return self._move(cell)
+        return None
+
+    def _select(self, cell):
+        """ Selects the piece of the team whose turn it is at a cell, and
+        highlights its legal destinations. """
+        piece = moves.get_piece(self._black, self._white, cell)
+        if piece is None or piece.get_team() != self.get_turn():
+            return
+        self._piece, self._initial = piece, cell
+        self._targets = piece.get_board().get_map().get_destinations(cell)
+        other.highlight(self._window, self._targets)
+        self._state = MOVING
+
+    def _move(self, destination):
+        """ Moves the selected piece to or attacks at a cell. """
+        other.highlight(self._window, self._targets, None)
+        self._targets = ()
+        self._state = SELECTING
+        piece, window = self._piece, self._window
+        target = moves.get_piece(self._black, self._white, destination)
+        if target is None:
+            result = piece.move(destination, self._black, self._white, window)
+        else:
+            result = piece.attack(destination, self._black, self._white,
+                                  window)
+            if result:
+                self._black, self._white = target.kill(self._black,
+                                                       self._white)
+        if not result:
+            window["out"].update(result.get_message())
+            return result
+        self._count, self._black, self._white = other.end_turn(
+            self._count, window, piece, self._black, self._white)
+        self._commit(self._initial, destination,
+                     moves.get_piece(self._black, self._white, destination))
+        return result
+
+    def play_engine(self):
+        """ Plays the computer's move. If the rules refuse it, the game is
+        over without a winner. """
+        played = []
+        self._count, self._black, self._white = other.engine_turn(
+            self._engine, self._count, self._window, self._black,
+            self._white, lambda *move: played.append(move))
+        if played:
+            self._commit(*played[0])
+            return
+        self._update()
+        if self._winner is None:
+            # The rules refused the engine's move, shown by engine_turn, and
+            # would refuse it again, so the game stops rather than asking
+            # forever.
+            self._state = OVER
+            self._window["turn"].update("")
+
+    def _commit(self, initial, destination, piece):
+        """ Publishes a move once it is made, and whether it ended the game.
+        """
+        self._events.publish(MOVE_COMMITTED, initial=initial,
+                             destination=destination, piece=piece,
+                             black=self._black, white=self._white,
+                             count=self._count)
+        self._update()
+
+    def _update(self):
+        """ Determines whether the game is over, and if so shows the result
+        and publishes it. """
+        self._winner = other.check_endgame(self._black, self._white)
+        if self._winner is None:
+            return
+        self._state = OVER
+        self._window["turn"].update("")
+        if self._winner == DRAW:
+            self._window["out"].update("Stalemate! It's a draw.")
+        else:
+            self._window["out"].update(f"Checkmate! {self._winner} wins!")
+        self._events.publish(GAME_OVER, winner=self._winner,
+                             count=self._count)
+
+
+def record_games(events, path, players=None):
+    """ Appends each game to a PGN file when it ends.
+
+    Parameters
+    ----------
+    events : Events
+        The subscribers to the games' events, to which the recorder is
+        added.
+    path : str
+        The path of the PGN file.
+    players : dict[str, str]
+        The name of each team's player, such as {"White": "Computer"}.
+    """
+    recorders = []
+
+    def start(black, white, count, **details):
+        recorders[:] = [pgn.Recorder(fen.dump(black, white, count))]
+
+    def record(initial, destination, piece, **details):
+        recorders[0].record(initial, destination, piece)
+
+    def finish(winner, **details):
+        game = recorders[0].get_game(RESULTS[winner], players)
+        with open(path, "a", encoding="utf-8") as file:
+            pgn.write_games(file, [game])
+
+    events.subscribe(NEW_GAME, start)
+    events.subscribe(MOVE_COMMITTED, record)
+    events.subscribe(GAME_OVER, finish)
@@ -0,0 +1,193 @@
+""" Opt-in instrumentation of the rules engine's hot paths.
+
+enable replaces each target function with a wrapper which counts its calls
+and adds up the time spent in it, children included, and disable puts the
+originals back. Nothing is wrapped until enable is called, so the game runs
+at full speed without instrumentation.
+
+Targets are named by module and attribute, such as "moves.get_piece". A
+method of a class is also wrapped in each subclass which overrides it. The
+statistics are exported as JSON, or as text in Prometheus's exposition
+format.
+"""
+
+import functools
+import importlib
+import json
+import time
+from contextlib import contextmanager
+
+TARGETS = (
+    "moves.get_piece",
+    "moves.validate_path",
+    "paths.get_line",
+    "pieces.Piece.move",
+    "pieces.Piece.attack",
+    "other.check_endgame",
+    "render.Renderer.show"
+)
+
+# The calls and seconds of each wrapped function, by name.
+_records = {}
+# The original of each wrapped attribute, by (owner, attribute).
+_originals = {}
+
+
+def _subclasses(cls):
+    """ Returns a class and all the classes derived from it. """
+    found = [cls]
+    for subclass in cls.__subclasses__():
+        found.extend(_subclasses(subclass))
+    return found
+
+
+def _wrap(name, function):
+    """ Returns a wrapper of a function which records its calls and time. """
+    record = _records.setdefault(name, [0, 0.0])
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record[0] += 1
+            record[1] += clock() - start
+    return wrapper
+
+
+def _patch(owner, attribute, name):
+    """ Replaces an attribute of a module or class with its wrapper. """
+    if (owner, attribute) in _originals:
+        return
+    original = owner.__dict__[attribute]
+    _originals[owner, attribute] = original
+    setattr(owner, attribute, _wrap(name, original))
+
+
+def enable(targets=TARGETS):
+    """ Starts recording the calls of functions.
+
+    Parameters
+    ----------
+    targets : iterable[str]
+        The names of the functions, such as "moves.get_piece" or
+        "pieces.Piece.move". Those of modules which can't be imported, such
+        as the window's without PySimpleGUI, are skipped.
+
+    Returns
+    -------
+    list[str]
+        The names of the functions wrapped.
+
+    Raises
+    ------
+    AttributeError
+        If a target doesn't exist in its module.
+    """
+    wrapped = []
+    for target in targets:
+        module_name, *names = target.split(".")
+        try:
+            owner = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        for name in names[:-1]:
+            owner = getattr(owner, name)
+        attribute = names[-1]
+        if not isinstance(owner, type):
+            getattr(owner, attribute)
+            _patch(owner, attribute, target)
+            wrapped.append(target)
+            continue
+        for cls in _subclasses(owner):
+            if attribute in cls.__dict__:
+                name = f"{cls.__module__}.{cls.__qualname__}.{attribute}"
+                _patch(cls, attribute, name)
+                wrapped.append(name)
+    return wrapped
+
+
+def disable():
+    """ Stops recording, restoring the original functions. The statistics
+    are kept. """
+    for (owner, attribute), original in _originals.items():
+        setattr(owner, attribute, original)
+    _originals.clear()
+
+
+def is_enabled():
+    """ Returns whether any function is wrapped. """
+    return bool(_originals)
+
+
+def reset():
+    """ Zeroes the statistics. """
+    for record in _records.values():
+        record[0] = 0
+        record[1] = 0.0
+
+
+@contextmanager
+def instrumented(targets=TARGETS):
+    """ Records the calls of functions within a with block. """
+    enable(targets)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def get_stats():
+    """ Returns the statistics of each function recorded.
+
+    Returns
+    -------
+    dict[str, dict]
+        The number of calls, total seconds and mean seconds per call of
+        each function, by name.
+    """
+    return {name: {"calls": calls, "seconds": seconds,
+                   "mean_seconds": seconds / calls if calls else 0.0}
+            for name, (calls, seconds) in sorted(_records.items())}
+
+
+def to_json(indent=2):
+    """ Returns the statistics as JSON. """
+    return json.dumps(get_stats(), indent=indent)
+
+
+def to_prometheus(prefix="chess"):
+    """ Returns the statistics in Prometheus's text exposition format.
+
+    Parameters
+    ----------
+    prefix : str
+        The prefix of the metrics' names.
+
+    Returns
+    -------
+    str
+        The counters of calls and seconds, labelled by function.
+    """
+    stats = get_stats()
+    lines = []
+    for metric, key, description in (
+            ("calls_total", "calls", "Calls of each instrumented function."),
+            ("seconds_total", "seconds",
+             "Time spent in each instrumented function, in seconds.")):
+        name = f"{prefix}_{metric}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for function, values in stats.items():
+            lines.append(f'{name}{{function="{function}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """ Writes the statistics to a file, in Prometheus's format if its name
+    ends in ".prom" and as JSON otherwise. """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(to_prometheus() if path.endswith(".prom")
+                   else to_json() + "\n")
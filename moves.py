@@ -1,7 +1,111 @@
-""" Functions used to validate movements and attacks of chess pieces. """
+""" Functions used to validate movements and attacks of chess pieces.
 
-import PySimpleGUI as sg
-from paths import Path
+None of these functions depend on the Chess game window. Each validator
+returns a Result, which is truthy if the movement or attack is valid, and
+otherwise carries the reason it isn't, for the caller to display. Every valid
+movement or attack shares the Result VALID, which carries no piece, so
+validating a legal move creates no objects.
+"""
+
+import paths
+
+OK = "ok"
+STATIONARY = "stationary"
+WRONG_DIRECTION = "wrong-direction"
+WRONG_ATTACK = "wrong-attack"
+OCCUPIED = "occupied"
+TOO_FAR = "too-far"
+BLOCKED = "blocked"
+IN_CHECK = "in-check"
+
+_directions = {
+    (0, 0): None,
+    (0, -1): "up",
+    (0, 1): "down",
+    (-1, 0): "left",
+    (1, 0): "right",
+    (-1, -1): "top-left",
+    (1, -1): "top-right",
+    (-1, 1): "bottom-left",
+    (1, 1): "bottom-right"
+}
+
+
+class Result(object):
+    def __init__(self, reason=OK, piece=None, other=None):
+        """ The outcome of validating a movement or attack.
+
+        Parameters
+        ----------
+        reason : str
+            OK if the movement or attack is valid. Otherwise, the code of the
+            reason it isn't.
+        piece : Piece
+            The piece which has attempted to move or attack. None for VALID,
+            which all valid movements and attacks share.
+        other : Piece
+            The piece which prevents the movement or attack, if any.
+        """
+        self._reason = reason
+        self._piece = piece
+        self._other = other
+
+    def __bool__(self):
+        return self._reason == OK
+
+    def __repr__(self):
+        return f"Result({self._reason!r})"
+
+    def get_reason(self):
+        """ Returns the code of the reason for the Result as a string. """
+        return self._reason
+
+    def get_piece(self):
+        """ Returns the piece which has attempted to move or attack. """
+        return self._piece
+
+    def get_other(self):
+        """ Returns the piece which prevents the movement or attack. None if
+        there is no such piece. """
+        return self._other
+
+    def get_message(self):
+        """ Returns the message describing the Result to the player. """
+        if self._piece is None:
+            piece_type = "piece"
+        else:
+            piece_type = self._piece.get_type()
+        if self._reason == WRONG_DIRECTION:
+            return f"Your {piece_type} can't move in that direction."
+        elif self._reason == WRONG_ATTACK:
+            return f"Your {piece_type} can't attack in that direction."
+        elif self._reason == TOO_FAR:
+            return f"Your {piece_type} can't move that far."
+        elif self._reason == OCCUPIED:
+            other_type = self._other.get_type()
+            if piece_type == other_type:
+                return f"Your {piece_type} can't move there. " \
+                       f"Your other {other_type} is already there."
+            return f"Your {piece_type} can't move there. " \
+                   f"Your {other_type} is already there."
+        elif self._reason == BLOCKED:
+            if self._other.get_team_index() == self._piece.get_team_index():
+                owner = "your"
+            else:
+                owner = f"the {self._other.get_team()}"
+            return f"Your {piece_type} can't move here. Its path is " \
+                   f"blocked by {owner} {self._other.get_type()}."
+        elif self._reason == IN_CHECK:
+            return f"Your {piece_type} can't move there. It would leave " \
+                   f"your King in check."
+        return ""
+
+
+# The Result of every valid movement or attack.
+VALID = Result(OK)
+# The Result of a Knight's invalid movement or attack, before it is given
+# the piece.
+_NOT_KNIGHT = Result(WRONG_DIRECTION)
 
 
 def get_direction(initial, destination):
@@ -30,21 +134,10 @@ def get_direction(initial, destination):
         y = -1
     elif y > 0:
         y = 1
-    directions = {
-        (0, 0): None,
-        (0, -1): "up",
-        (0, 1): "down",
-        (-1, 0): "left",
-        (1, 0): "right",
-        (-1, -1): "top-left",
-        (1, -1): "top-right",
-        (-1, 1): "bottom-left",
-        (1, 1): "bottom-right"
-    }
-    return directions[(x, y)]
-
-
-def validate_move(piece, direction, window):
+    return _directions[(x, y)]
+
+
+def validate_move(piece, direction):
     """ Determines whether the piece can move in a given direction.
 
     Parameters
@@ -53,22 +146,20 @@ def validate_move(piece, direction, window):
         The piece which has attempted to move.
     direction : str
         The direction in which the piece has attempted to moved.
-    window : sg.Window
-        The Chess game window.
 
     Returns
     -------
-    bool
-        True if the move is valid. False otherwise.
+    Result
+        OK if the move is valid. WRONG_DIRECTION otherwise.
     """
+    if direction is None:
+        return Result(STATIONARY, piece)
     if direction in piece.get_move():
-        return True
-    error_msg = f"Your {piece.get_type()} can't move in that direction."
-    window["out"].update(error_msg)
-    return False
+        return VALID
+    return Result(WRONG_DIRECTION, piece)
 
 
-def validate_attack(piece, direction, window):
+def validate_attack(piece, direction):
     """ Determines whether the piece can attack in a given direction.
 
     Parameters
@@ -77,22 +168,20 @@ def validate_attack(piece, direction, window):
         The piece which has attempted to attack.
     direction : str
         The direction in which the piece has attempted to attack.
-    window : sg.Window
-        The Chess game window.
 
     Returns
     -------
-    bool
-        True if the attack is valid. False otherwise.
+    Result
+        OK if the attack is valid. WRONG_ATTACK otherwise.
     """
+    if direction is None:
+        return Result(STATIONARY, piece)
     if direction in piece.get_attack():
-        return True
-    error_msg = f"Your {piece.get_type()} can't attack in that direction."
-    window["out"].update(error_msg)
-    return False
+        return VALID
+    return Result(WRONG_ATTACK, piece)
 
 
-def validate_position(piece, black, white, position, window):
+def validate_position(piece, black, white, position):
     """ Determines whether a piece can move to or attack at a given position.
 
     Parameters
@@ -105,28 +194,21 @@ def validate_position(piece, black, white, position, window):
         The list of current White pieces.
     position : tuple[int, int]
         The position to which the piece has attempted to move or attack.
-    window : sg.Window
-        The Chess game window.
 
     Returns
     -------
-    bool
-        True if the position is valid. False otherwise.
+    Result
+        OK if the position is valid. OCCUPIED if one of the piece's team is
+        already there.
     """
     pos_piece = get_piece(black, white, position)
-    if piece.get_team() == pos_piece.get_team():
-        if piece.get_type() == pos_piece.get_type():
-            error_msg = f"Your {piece.get_type()} can't move there. " \
-                        f"Your other {pos_piece.get_type()} is already there."
-        else:
-            error_msg = f"Your {piece.get_type()} can't move there. " \
-                        f"Your {pos_piece.get_type()} is already there."
-        window["out"].update(error_msg)
-        return False
-    return True
+    if pos_piece is not None \
+            and piece.get_team_index() == pos_piece.get_team_index():
+        return Result(OCCUPIED, piece, pos_piece)
+    return VALID
 
 
-def validate_path(piece, black, white, initial, destination, direction, window):
+def validate_path(piece, black, white, initial, destination, direction):
     """ Determines whether a piece can follow a path between two cells.
 
     Parameters
@@ -143,51 +225,40 @@ def validate_path(piece, black, white, initial, destination, direction, window):
         The position to which the piece has attempted to move or attack.
     direction : str
         The direction in which the piece has attempted to move or attack.
-    window : sg.Window
-        The Chess game window.
 
     Returns
     -------
-    bool
-        True if the path is valid. False otherwise.
+    Result
+        OK if the path is valid. TOO_FAR, WRONG_DIRECTION or BLOCKED
+        otherwise.
     """
     y = destination[0] - initial[0]
     x = destination[1] - initial[1]
     piece_type = piece.get_type()
-    team = piece.get_team()
-    error_msg = f"Your {piece_type} can't move that far."
-    if piece_type == "Pawn" and abs(y) > 2:
-        # If a Pawn moves more than two cells.
-        window["out"].update(error_msg)
-        return False
-    elif piece_type == "Pawn" and not piece.get_initial and abs(y) == 2:
-        # If a Pawn which hasn't moved yet moves more than two cells.
-        window["out"].update(error_msg)
-        return False
+    if piece_type == "Pawn":
+        # A Pawn moves one cell, or two straight ahead from its initial
+        # position.
+        limit = 2 if x == 0 and piece.get_initial() else 1
+        if abs(y) > limit:
+            return Result(TOO_FAR, piece)
     elif piece_type == "King" and (abs(x) > 1 or abs(y) > 1):
-        # If a Pawn or King moves more than one cell.
-        window["out"].update(error_msg)
-        return False
-
-    path = Path(initial, destination, direction)
-    if not path.is_valid():
-        window["out"].update(f"Your {piece_type} can't move in that direction.")
-        return False
-    for cell in path.get_cells():
+        # If a King moves more than one cell.
+        return Result(TOO_FAR, piece)
+
+    line = paths.get_line(initial, destination)
+    if line is None or line[0] != direction:
+        return Result(WRONG_DIRECTION, piece)
+    board = piece.get_board()
+    if board is not None and not board.get_occupied() & line[2]:
+        return VALID
+    for cell in line[1]:
         blockage = get_piece(black, white, cell)
         if blockage is not None:
-            if blockage.get_team() == team:
-                error_msg = f"Your {piece_type} can't move here. It's path " \
-                            f"is blocked by your {blockage.get_type()}."
-            else:
-                error_msg = f"Your {piece_type} can't move here. It's path " \
-                            f"is blocked by your {blockage.get_type()}."
-            window["out"].update(error_msg)
-            return False
-    return True
+            return Result(BLOCKED, piece, blockage)
+    return VALID
 
 
-def knight(initial, destination, window):
+def knight(initial, destination):
     """ Determines whether a Knight can move or attack to a given position.
 
     Parameters
@@ -196,20 +267,17 @@ def knight(initial, destination, window):
         The position from which the piece has attempted to move or attack.
     destination : tuple[int, int]
         The position to which the piece has attempted to move or attack.
-    window : sg.Window
-        The Chess game window.
 
     Returns
     -------
-    bool
-        True if the move or attack is valid. False otherwise.
+    Result
+        OK if the move or attack is valid. WRONG_DIRECTION otherwise.
     """
     y = abs(destination[0] - initial[0])
     x = abs(destination[1] - initial[1])
     if x in (1, 2) and y in (1, 2) and x != y:
-        return True
-    window["out"].update("Your Knight can't move in that direction.")
-    return False
+        return VALID
+    return _NOT_KNIGHT
 
 
 def get_piece(black, white, position):
@@ -229,6 +297,9 @@ def get_piece(black, white, position):
     pieces.Piece
         The piece which is at the given position. None if there is no piece.
     """
+    board = get_board(black, white)
+    if board is not None:
+        return board.get_piece(position)
     for piece in black:
         if piece.get_position() == position:
             return piece
@@ -236,3 +307,24 @@ def get_piece(black, white, position):
         if piece.get_position() == position:
             return piece
     return None
+
+
+def get_board(black, white):
+    """ Returns the Board on which the given pieces are placed.
+
+    Parameters
+    ----------
+    black : list[pieces.Piece]
+        The list of current Black pieces.
+    white : list[pieces.Piece]
+        The list of current White pieces.
+
+    Returns
+    -------
+    board.Board
+        The Board shared by the pieces. None if they aren't on a Board.
+    """
+    for team in (black, white):
+        if team:
+            return team[0].get_board()
+    return None
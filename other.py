@@ -1,20 +1,80 @@
-""" Other functions used to operate the Chess game. """
+""" Other functions used to operate the Chess game.
+
+PySimpleGUI is imported by the functions which build windows, the first time
+one is called, so the rules can be used without it.
+"""
 
 from pieces import *
-import PySimpleGUI as sg
+from board import new_board, position_of
+import bitboard
+import fen
+import render
+
+# The key and background colour of each cell of the Chessboard, by row.
+CELLS = tuple(tuple(((row, column),
+                     "white" if (row + column) % 2 == 0 else "black")
+                    for column in range(8))
+              for row in range(8))
+# The team whose turn it is, by the number of turns completed modulo 2.
+TURNS = dict(enumerate(TEAMS))
+
+
+def _gui():
+    """ Returns the PySimpleGUI module, importing it the first time. """
+    import PySimpleGUI
+    return PySimpleGUI
 
 
 def DarkCell(position):
     """ Returns a PySimpleGUI image element with a black background. """
-    return sg.Button(button_color="black", key=position)
+    return _gui().Button(button_color="black", key=position)
 
 
 def LightCell(position):
     """ Returns a PySimpleGUI image element with a white background. """
-    return sg.Button(button_color="white", key=position)
+    return _gui().Button(button_color="white", key=position)
+
+
+def board_layout():
+    """ Returns the layout of the Chess game window: the New Game button and
+    the messages, above a button for each cell of the Chessboard.
+
+    Returns
+    -------
+    list[list[sg.Element]]
+        The rows of the window's elements.
+    """
+    sg = _gui()
+    button = sg.Button
+    layout = [[button("New Game", key="new_game", size=(15, 1)),
+               sg.Text(key="turn", size=(15, 1), justification="center"),
+               sg.Text(key="out", size=(50, 1), justification="center")]]
+    for row in CELLS:
+        layout.append([button(button_color=colour, key=key)
+                       for key, colour in row])
+    return layout
+
+
+def highlight(window, cells, colour="green"):
+    """ Highlights cells of the Chessboard, such as a piece's legal
+    destinations.
+
+    Parameters
+    ----------
+    window : sg.Window
+        The Chess game window.
+    cells : iterable[tuple[int, int]]
+        The cells to highlight.
+    colour : str
+        The colour of the highlighted cells. None to restore their colour.
+    """
+    for row, column in cells:
+        background = CELLS[row][column][1] if colour is None else colour
+        window[(row, column)].update(button_color=background)
 
 
 def welcome():
+    sg = _gui()
     welcome_msg = "Welcome to Chess!\n\nThis game has been developed by " \
                   "William Sawyer with use of the PySimpleGUI package."
     welcome_layout = [
@@ -25,13 +85,16 @@ def welcome():
               icon=r".\icons\chess-board.ico").read(close=True)
 
 
-def new_game(window):
+def new_game(window, position=None):
     """ Initialises pieces and resets for a new game.
 
     Parameters
     ----------
     window : sg.Window
         The Chess game window.
+    position : str
+        The position from which to start, in Forsyth-Edwards Notation. None
+        to start from the initial position.
 
     Returns
     -------
@@ -44,64 +107,24 @@ def new_game(window):
         int : The number of turns completed.
         dict : Dictionary used to determine whose turn it is.
     """
-    black = [
-        Rook((0, 0), "Black"),
-        Knight((0, 1), "Black"),
-        Bishop((0, 2), "Black"),
-        Queen((0, 3), "Black"),
-        King((0, 4), "Black"),
-        Bishop((0, 5), "Black"),
-        Knight((0, 6), "Black"),
-        Rook((0, 7), "Black"),
-        Pawn((1, 0), "Black"),
-        Pawn((1, 1), "Black"),
-        Pawn((1, 2), "Black"),
-        Pawn((1, 3), "Black"),
-        Pawn((1, 4), "Black"),
-        Pawn((1, 5), "Black"),
-        Pawn((1, 6), "Black"),
-        Pawn((1, 7), "Black")
-    ]
-
-    white = [
-        Pawn((6, 0), "White"),
-        Pawn((6, 1), "White"),
-        Pawn((6, 2), "White"),
-        Pawn((6, 3), "White"),
-        Pawn((6, 4), "White"),
-        Pawn((6, 5), "White"),
-        Pawn((6, 6), "White"),
-        Pawn((6, 7), "White"),
-        Rook((7, 0), "White"),
-        Knight((7, 1), "White"),
-        Bishop((7, 2), "White"),
-        King((7, 3), "White"),
-        Queen((7, 4), "White"),
-        Bishop((7, 5), "White"),
-        Knight((7, 6), "White"),
-        Rook((7, 7), "White")
-    ]
+    if position is None:
+        board = new_board()
+        black, white, count = board.get_black(), board.get_white(), 0
+    else:
+        black, white, count = fen.load(position)
 
-    for i in range(8):
-        for j in range(8):
-            window[(i, j)].update(image_filename="", image_size=(75, 75))
-
-    for piece in black:
-        piece.update_position(window, piece.get_position())
-    for piece in white:
-        piece.update_position(window, piece.get_position())
-    window["turn"].update("It's White's turn.")
+    # Only the cells whose pieces differ from the last game's are updated.
+    render.get_renderer(window).render(black, white)
+    window["turn"].update(f"It's {TURNS[count % 2]}'s turn.")
 
     initial = None
     destination = None
     winner = None
-    count = 0
-    turns = {0: "White", 1: "Black"}
 
-    return black, white, initial, destination, winner, count, turns
+    return black, white, initial, destination, winner, count, TURNS
 
 
-def end_turn(count, window, piece, black, white):
+def end_turn(count, window, piece, black, white, promotion=None):
     """ Increments turn count; displays message for next turn; clears error
     display; checks for promotion.
 
@@ -117,6 +140,9 @@ def end_turn(count, window, piece, black, white):
         The list of current Black pieces.
     white : list[Piece]
         The list of current White pieces.
+    promotion : str
+        The type to which a Pawn reaching the far side is promoted. None to
+        ask the player.
 
     Returns
     -------
@@ -125,43 +151,105 @@ def end_turn(count, window, piece, black, white):
         list[Piece] : The list of current Black pieces.
         list[Piece] : The list of current White pieces.
     """
-    turns = {0: "White", 1: "Black"}
     count += 1
-    window["turn"].update(f"{turns[count % 2]}'s turn.")
+    board = piece.get_board()
+    if board is not None:
+        board.pass_turn()
+    window["turn"].update(f"{TURNS[count % 2]}'s turn.")
     window["out"].update("")
     if piece.get_type() == "Pawn" and piece.get_position()[0] == \
             piece.get_far():
-        promo_piece = sg.popup_get_text("Which piece do you want to promote "
-                                        "to: Rook, Knight, Bishop or Queen?")
+        promo_piece = promotion
+        if promo_piece is None:
+            promo_piece = _gui().popup_get_text("Which piece do you want to "
+                                            "promote to: Rook, Knight, "
+                                            "Bishop or Queen?")
         black, white = piece.promote(promo_piece, black, white, window)
+    if board is not None:
+        # The attacks and legal moves of the new position are computed once,
+        # for the endgame check and for highlighting.
+        board.get_map()
+        if board.in_check():
+            window["turn"].update(f"{TURNS[count % 2]}'s turn: check!")
+    return count, black, white
+
+
+def engine_turn(engine, count, window, black, white, committed=None):
+    """ Plays the engine's move for the team whose turn it is.
+
+    Parameters
+    ----------
+    engine : engine.Engine
+        The engine which chooses the move.
+    count : int
+        The number of turns completed.
+    window : sg.Window
+        The Chess game window.
+    black : list[Piece]
+        The list of current Black pieces.
+    white : list[Piece]
+        The list of current White pieces.
+    committed : callable
+        Called with the cells from which and to which the piece moved, and
+        the piece now at the destination, once the move is made, such as
+        pgn.Recorder.record. None if nothing is to be told.
+
+    Returns
+    -------
+    tuple[int, list[Piece], list[Piece]]
+        int : The updated number of turns completed.
+        list[Piece] : The list of current Black pieces.
+        list[Piece] : The list of current White pieces.
+    """
+    window["out"].update("Thinking...")
+    window.refresh()
+    position = bitboard.from_lists(black, white, count % 2)
+    search = engine.search(position)
+    move = search.get_move()
+    if move is None:
+        # The team has no legal move, which check_endgame reports.
+        return count, black, white
+    origin, destination, promotion = bitboard.decode_move(move)
+    destination = position_of(destination)
+    piece = moves.get_piece(black, white, position_of(origin))
+    dest_piece = moves.get_piece(black, white, destination)
+    if dest_piece is None:
+        result = piece.move(destination, black, white, window)
+    else:
+        result = piece.attack(destination, black, white, window)
+        if result:
+            black, white = dest_piece.kill(black, white)
+    if not result:
+        window["out"].update(result.get_message())
+        return count, black, white
+    promo_piece = TYPES[promotion] if promotion else None
+    count, black, white = end_turn(count, window, piece, black, white,
+                                   promo_piece)
+    if committed is not None:
+        committed(position_of(origin), destination,
+                  moves.get_piece(black, white, destination))
+    window["out"].update(f"{piece.get_team()} played "
+                         f"{bitboard.move_name(move)}: depth "
+                         f"{search.get_depth()}, {search.get_nodes()} nodes "
+                         f"in {search.get_time():.2f} s.")
     return count, black, white
 
 
 def check_endgame(black, white):
-    """ Determines whether each team still has a King.
+    """ Determines whether the game is over, by checkmate, stalemate or the
+    capture of a King.
 
     Parameters
     ----------
     black : list[Piece]
-        The list of current Black 
+        The list of current Black pieces.
     white : list[Piece]
-        The list of current White 
+        The list of current White pieces.
 
     Returns
     -------
     str
-        The winner as a string if someone has won. None otherwise.
+        The winner as a string if someone has won, board.DRAW after a
+        stalemate. None otherwise.
     """
-    b_king = False
-    for piece in black:
-        if piece.get_type() == "King":
-            b_king = True
-    if not b_king:
-        return "White"
-    w_king = False
-    for piece in white:
-        if piece.get_type() == "King":
-            w_king = True
-    if not w_king:
-        return "Black"
-    return None
+    return moves.get_board(black, white).get_winner()
@@ -0,0 +1,262 @@
+""" A parallel search of bitboard positions on every core, by Lazy SMP.
+
+Each process of a pool runs the engine's own search on the same position,
+sharing one transposition table held in a multiprocessing.shared_memory
+block. The processes find different work through the table, and half of
+them start one iteration deeper so they don't keep step. When the first
+process finishes, the others are stopped, and the move of the deepest
+completed iteration is played.
+
+The table's entries are checked against their keys, so the processes write
+to it without locks, as transposition.py describes.
+
+Usage: python parallel.py [--fen FEN] [--workers N] [--movetime SECONDS]
+                          [--depth DEPTH] [--hash MB] [--benchmark]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory, util
+
+import bitboard
+from engine import Engine, SearchResult
+from transposition import TranspositionTable, ENTRY_SIZE
+
+# The state of each pool process, set by _start.
+_table = None
+_stop = None
+_memory = None
+
+
+def _start(name, stop):
+    """ Attaches a pool process to the shared table, which it detaches from
+    as it exits. """
+    global _table, _stop, _memory
+    try:
+        _memory = shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with the
+        # resource tracker, which may warn of a leak, or unlink the block
+        # while the parent still uses it. Unregistering it afterwards would
+        # also drop the parent's registration from a tracker they share, so
+        # the registration is skipped instead.
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            _memory = shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+    _table = TranspositionTable(buffer=_memory.buf)
+    _stop = stop
+    util.Finalize(None, _finish, exitpriority=0)
+
+
+def _finish():
+    """ Detaches a pool process from the shared table. """
+    global _table
+    _table = None
+    _memory.close()
+
+
+def _search(job):
+    """ Searches a position in a pool process.
+
+    Parameters
+    ----------
+    job : tuple
+        The worker's index, the position in Forsyth-Edwards Notation, and
+        the time budget, node budget, maximum depth and first depth of the
+        search.
+
+    Returns
+    -------
+    tuple[int, int, int, int, int]
+        The worker's index, and the best move, score, depth and node count
+        of its search.
+    """
+    index, position, time_limit, node_limit, max_depth, start_depth = job
+    engine = Engine(time_limit, node_limit, max_depth, _table, stop=_stop)
+    result = engine.search(bitboard.from_fen(position), start_depth)
+    return (index, result.get_move(), result.get_score(), result.get_depth(),
+            result.get_nodes())
+
+
+class ParallelEngine(object):
+    def __init__(self, workers=None, time_limit=1.0, node_limit=None,
+                 max_depth=64, megabytes=16):
+        """ A searcher of the best move which runs a search in each process
+        of a pool, sharing a transposition table.
+
+        Parameters
+        ----------
+        workers : int
+            The number of processes. None for one per core.
+        time_limit : float
+            The time budget of each search, in seconds. None if there is no
+            time limit.
+        node_limit : int
+            The node budget of each process's search. None if there is no
+            node limit.
+        max_depth : int
+            The depth at which iterative deepening stops.
+        megabytes : float
+            The memory of the shared table, in MB.
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        self._max_depth = max_depth
+        size = max(int(megabytes * 2 ** 20) // ENTRY_SIZE, 2) * ENTRY_SIZE
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._stop = multiprocessing.Event()
+        self._pool = multiprocessing.Pool(
+            self._workers, _start, (self._memory.name, self._stop))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Stops the pool and frees the shared table. """
+        # Each search has finished, so the processes exit as soon as they
+        # are told to, detaching from the table as they do.
+        self._pool.close()
+        self._pool.join()
+        self._memory.close()
+        self._memory.unlink()
+
+    def get_workers(self):
+        """ Returns the number of processes. """
+        return self._workers
+
+    def clear(self):
+        """ Empties the shared table. """
+        self._memory.buf[:] = bytes(len(self._memory.buf))
+
+    def search(self, position):
+        """ Searches a position for the best move in every process.
+
+        Parameters
+        ----------
+        position : bitboard.Position
+            The position to search.
+
+        Returns
+        -------
+        SearchResult
+            The best move of the deepest completed iteration, and the nodes
+            searched by all the processes.
+        """
+        start = time.perf_counter()
+        self._stop.clear()
+        fen = position.to_fen()
+        jobs = [(index, fen, self._time_limit, self._node_limit,
+                 self._max_depth, 1 + index % 2)
+                for index in range(self._workers)]
+        results = []
+        for result in self._pool.imap_unordered(_search, jobs):
+            # The first process to finish ends the others' searches.
+            self._stop.set()
+            results.append(result)
+        nodes = sum(result[4] for result in results)
+        index, move, score, depth, count = max(
+            results, key=lambda result: (result[3], -result[0]))
+        return SearchResult(move, score, depth, nodes,
+                            time.perf_counter() - start)
+
+
+def benchmark(fens, workers=None, depth=5, megabytes=16):
+    """ Measures the speedup of a parallel search over one process, as the
+    time taken to complete a fixed depth.
+
+    Parameters
+    ----------
+    fens : list[str]
+        The positions to search, in Forsyth-Edwards Notation.
+    workers : int
+        The number of processes to compare with one. None for one per core.
+    depth : int
+        The depth to which each position is searched.
+    megabytes : float
+        The memory of the shared table, in MB.
+
+    Returns
+    -------
+    dict
+        The numbers of processes, the total time and nodes of each, the
+        nodes per second of each, and the speedup.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = {"workers": workers, "depth": depth, "positions": len(fens)}
+    for name, count in (("single", 1), ("parallel", workers)):
+        elapsed = nodes = 0
+        with ParallelEngine(count, None, None, depth, megabytes) as engine:
+            for fen in fens:
+                engine.clear()
+                result = engine.search(bitboard.from_fen(fen))
+                elapsed += result.get_time()
+                nodes += result.get_nodes()
+        report[name] = {"seconds": elapsed, "nodes": nodes,
+                        "nodes_per_second": nodes / elapsed if elapsed
+                        else 0.0}
+    parallel = report["parallel"]["seconds"]
+    report["speedup"] = report["single"]["seconds"] / parallel \
+        if parallel else 0.0
+    return report
+
+
+def print_report(report):
+    """ Prints a benchmark's report. """
+    print(f"{report['positions']} positions to depth {report['depth']}")
+    for name in ("single", "parallel"):
+        count = 1 if name == "single" else report["workers"]
+        stats = report[name]
+        print(f"{count:3d} worker(s): {stats['seconds']:.2f} s, "
+              f"{stats['nodes']} nodes, "
+              f"{stats['nodes_per_second']:.0f} nodes/s")
+    print(f"speedup: {report['speedup']:.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Search a Chess position on every core.")
+    parser.add_argument("--fen", action="append",
+                        help="position to search (default: the start); "
+                             "repeat to benchmark several")
+    parser.add_argument("--workers", type=int,
+                        help="number of processes (default: one per core)")
+    parser.add_argument("--movetime", type=float, default=1.0,
+                        help="time budget, in seconds (default 1)")
+    parser.add_argument("--depth", type=int,
+                        help="maximum depth (default 64, or 5 to "
+                             "benchmark)")
+    parser.add_argument("--hash", type=float, default=16,
+                        help="shared table size, in MB (default 16)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="report the speedup over one process")
+    parser.add_argument("--json", action="store_true",
+                        help="print the benchmark's report as JSON")
+    args = parser.parse_args(argv)
+    fens = args.fen or [bitboard.START_FEN]
+
+    if args.benchmark:
+        report = benchmark(fens, args.workers, args.depth or 5, args.hash)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+        return 0
+    with ParallelEngine(args.workers, args.movetime, None, args.depth or 64,
+                        args.hash) as engine:
+        print(engine.search(bitboard.from_fen(fens[0])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
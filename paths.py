@@ -1,3 +1,66 @@
+CHANGES = {
+    "down": (0, 1),
+    "left": (-1, 0),
+    "up": (0, -1),
+    "right": (1, 0),
+    "bottom-left": (-1, 1),
+    "top-left": (-1, -1),
+    "top-right": (1, -1),
+    "bottom-right": (1, 1)
+}
+
+
+def _build_lines():
+    """ Returns the table of straight lines between every pair of cells.
+
+    Returns
+    -------
+    tuple
+        For each origin square * 64 + destination square, a tuple[direction,
+        cells, mask] of the direction from the origin to the destination, the
+        cells strictly between them, and those cells as a mask of square
+        indices. None if the cells aren't on a straight line.
+    """
+    lines = [None] * 4096
+    for origin in range(64):
+        row, column = divmod(origin, 8)
+        for direction, (x, y) in CHANGES.items():
+            cells = ()
+            mask = 0
+            position = (row + y, column + x)
+            while 0 <= position[0] < 8 and 0 <= position[1] < 8:
+                square = position[0] * 8 + position[1]
+                lines[origin * 64 + square] = (direction, cells, mask)
+                cells += (position,)
+                mask |= 1 << square
+                position = (position[0] + y, position[1] + x)
+    return tuple(lines)
+
+
+LINES = _build_lines()
+
+
+def get_line(initial, destination):
+    """ Returns the straight line between two cells.
+
+    Parameters
+    ----------
+    initial : tuple[int, int]
+        The cell at which the line begins.
+    destination : tuple[int, int]
+        The cell at which the line ends.
+
+    Returns
+    -------
+    tuple[str, tuple[tuple[int, int]], int]
+        The direction of the line, the cells strictly between its ends, and
+        those cells as a mask of square indices. None if the cells aren't on
+        a straight line.
+    """
+    return LINES[(initial[0] * 8 + initial[1]) * 64
+                 + destination[0] * 8 + destination[1]]
+
+
 class Path(object):
     def __init__(self, initial, destination, direction):
         """ The list of cells defining the Path taken by a piece from its
@@ -12,32 +75,16 @@ class Path(object):
         direction : str
             The direction in which the Path goes.
         """
-        changes = {
-            "down": (0, 1),
-            "left": (-1, 0),
-            "up": (0, -1),
-            "right": (1, 0),
-            "bottom-left": (-1, 1),
-            "top-left": (-1, -1),
-            "top-right": (1, -1),
-            "bottom-right": (1, 1)
-        }
-        self._cells = []
-        self._valid = True
-        position = initial
-        x, y = changes[direction]
-        count = 0
-        position = (position[0] + y, position[1] + x)
-        while position != destination:
-            self._cells.append(position)
-            position = (position[0] + y, position[1] + x)
-            count += 1
-            if count > 8:
-                self._valid = False
-                break
+        line = get_line(initial, destination)
+        if line is None or line[0] != direction:
+            self._cells = ()
+            self._valid = False
+        else:
+            self._cells = line[1]
+            self._valid = True
 
     def get_cells(self):
-        """ Returns the list of cells which define the Path. """
+        """ Returns the cells which define the Path. """
         return self._cells
 
     def is_valid(self):
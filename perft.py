@@ -0,0 +1,146 @@
+""" Counts the leaf nodes of the legal move tree from Chess positions, to check
+the move generator against known results and to measure its speed.
+
+Usage: python perft.py [depth] [--fen FEN] [--divide]
+"""
+
+import argparse
+import sys
+import time
+
+import bitboard
+
+# Standard positions with their known node counts at depths 1, 2, 3, ...
+REFERENCES = [
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     [20, 400, 8902, 197281, 4865609]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - "
+     "0 10",
+     [46, 2079, 89890, 3894594])
+]
+
+
+def perft(position, depth):
+    """ Returns the number of leaf nodes of the legal move tree.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position at the root of the tree.
+    depth : int
+        The depth of the tree, in moves.
+
+    Returns
+    -------
+    int
+        The number of positions reached after exactly depth moves.
+    """
+    if depth == 0:
+        return 1
+    legal = position.generate_moves()
+    if depth == 1:
+        return len(legal)
+    nodes = 0
+    for move in legal:
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def divide(position, depth):
+    """ Returns the number of leaf nodes below each legal move at the root.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position at the root of the tree.
+    depth : int
+        The depth of the tree, in moves. Must be at least 1.
+
+    Returns
+    -------
+    dict[str, int]
+        The number of leaf nodes, keyed by the coordinate notation of each
+        move.
+    """
+    counts = {}
+    for move in position.generate_moves():
+        position.make_move(move)
+        counts[bitboard.move_name(move)] = perft(position, depth - 1)
+        position.unmake_move()
+    return counts
+
+
+def run(fen, depth, expected=None):
+    """ Runs perft on a position and prints the node count and speed.
+
+    Parameters
+    ----------
+    fen : str
+        The position in Forsyth-Edwards Notation.
+    depth : int
+        The depth of the tree, in moves.
+    expected : int
+        The known node count. None if it isn't known.
+
+    Returns
+    -------
+    bool
+        False if the node count differs from the one expected. True
+        otherwise.
+    """
+    position = bitboard.from_fen(fen)
+    start = time.perf_counter()
+    nodes = perft(position, depth)
+    elapsed = time.perf_counter() - start
+    rate = nodes / elapsed if elapsed else 0
+    if expected is None:
+        status = ""
+    elif nodes == expected:
+        status = "ok"
+    else:
+        status = f"FAILED, expected {expected}"
+    print(f"{fen}\n  depth {depth}: {nodes} nodes in {elapsed:.3f} s "
+          f"({rate:,.0f} nodes/s) {status}")
+    return expected is None or nodes == expected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Count the legal move tree from Chess positions.")
+    parser.add_argument("depth", type=int, nargs="?", default=3,
+                        help="depth of the tree, in moves (default 3)")
+    parser.add_argument("--fen", help="position to count from, instead of "
+                                      "the reference positions")
+    parser.add_argument("--divide", action="store_true",
+                        help="print the node count below each root move")
+    args = parser.parse_args(argv)
+
+    if args.fen is not None:
+        if args.divide:
+            counts = divide(bitboard.from_fen(args.fen), args.depth)
+            for name, nodes in sorted(counts.items()):
+                print(f"{name}: {nodes}")
+            print(f"total: {sum(counts.values())}")
+            return 0
+        run(args.fen, args.depth)
+        return 0
+
+    passed = True
+    for fen, counts in REFERENCES:
+        depth = min(args.depth, len(counts))
+        passed = run(fen, depth, counts[depth - 1]) and passed
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,450 @@
+""" Reading and writing games in Portable Game Notation (PGN).
+
+Games are read lazily, one at a time, so archives of any size are read in
+constant memory. Moves in Standard Algebraic Notation (SAN) are resolved
+against the legal moves of bitboard positions.
+"""
+
+import re
+
+import bitboard
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from board import square_of
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# The tags which every game has, in the order they are written.
+ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+_PIECE_LETTERS = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+_TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_TOKEN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|\d+\.+|[^\s(){};.$]+")
+_SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])"
+                  r"(?:=?([NBRQ]))?$")
+
+
+class Game(object):
+    def __init__(self, headers=None, sans=None, result="*"):
+        """ A game of Chess, as recorded in PGN.
+
+        Parameters
+        ----------
+        headers : dict[str, str]
+            The game's tags, such as "White" and "Event".
+        sans : list[str]
+            The game's moves in Standard Algebraic Notation.
+        result : str
+            The game's result: "1-0", "0-1", "1/2-1/2" or "*".
+        """
+        self._headers = dict(headers or {})
+        self._sans = list(sans or [])
+        self._result = result
+
+    def __repr__(self):
+        return f"{self._headers.get('White', '?')} - " \
+               f"{self._headers.get('Black', '?')} {self._result}"
+
+    def get_headers(self):
+        """ Returns the game's tags as a dictionary. """
+        return self._headers
+
+    def get_sans(self):
+        """ Returns the list of the game's moves in SAN. """
+        return self._sans
+
+    def get_result(self):
+        """ Returns the game's result as a string. """
+        return self._result
+
+    def get_start(self):
+        """ Returns the Position from which the game starts. """
+        return bitboard.from_fen(self._headers.get("FEN", bitboard.START_FEN))
+
+    def replay(self):
+        """ Yields each move of the game, after checking it is legal.
+
+        Yields
+        ------
+        tuple[bitboard.Position, int]
+            The position before the move, and the move. The position is
+            shared, and changes once the next move is requested.
+
+        Raises
+        ------
+        ValueError
+            If a move isn't legal. The message gives its number.
+        """
+        position = self.get_start()
+        for san in self._sans:
+            try:
+                move = parse_san(position, san)
+            except ValueError as error:
+                number = position.get_fullmove()
+                dots = "." if position.get_turn() == bitboard.WHITE else "..."
+                raise ValueError(f"Move {number}{dots} {san}: {error}") \
+                    from None
+            yield position, move
+            position.make_move(move)
+
+    def get_moves(self):
+        """ Returns the list of the game's moves, encoded as by
+        bitboard.encode_move, after checking they are legal. """
+        return [move for position, move in self.replay()]
+
+
+def parse_san(position, san):
+    """ Returns the legal move described in Standard Algebraic Notation.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position in which the move is made.
+    san : str
+        The move, such as "Nf3", "exd5", "O-O" or "e8=Q+".
+
+    Returns
+    -------
+    int
+        The move, encoded as by bitboard.encode_move.
+
+    Raises
+    ------
+    ValueError
+        If the notation doesn't describe exactly one legal move.
+    """
+    text = san.rstrip("+#!?")
+    us = position.get_turn()
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        origin = position.king_square(us)
+        if origin is None:
+            raise ValueError("there is no King to castle")
+        destination = origin + (2 if len(text) == 3 else -2)
+        castle = bitboard.encode_move(origin, destination)
+        candidates = [move for move in position.generate_pseudo_moves()
+                      if move == castle]
+    else:
+        match = _SAN.match(text)
+        if match is None:
+            raise ValueError(f"invalid notation {san!r}")
+        letter, column, row, capture, target, promotion = match.groups()
+        piece_type = _PIECE_LETTERS[letter] if letter else PAWN
+        destination = bitboard.parse_square(target)
+        promotion = _PIECE_LETTERS[promotion] if promotion else 0
+        candidates = []
+        for move in position.generate_pseudo_moves():
+            if move >> 6 & 63 != destination or move >> 12 != promotion:
+                continue
+            origin = move & 63
+            if position.piece_at(origin)[1] != piece_type:
+                continue
+            if column and bitboard.FILES[origin & 7] != column:
+                continue
+            if row and str(8 - (origin >> 3)) != row:
+                continue
+            candidates.append(move)
+        if piece_type == KING:
+            # Castling is written as O-O, never as a King's move.
+            candidates = [move for move in candidates
+                          if abs((move >> 6 & 63) - (move & 63)) != 2]
+
+    legal = []
+    for move in candidates:
+        position.make_move(move)
+        if not position.in_check(us):
+            legal.append(move)
+        position.unmake_move()
+    if not legal:
+        raise ValueError(f"{san!r} isn't a legal move")
+    if len(legal) > 1:
+        raise ValueError(f"{san!r} is ambiguous")
+    return legal[0]
+
+
+def to_san(position, move):
+    """ Returns a move in Standard Algebraic Notation.
+
+    Parameters
+    ----------
+    position : bitboard.Position
+        The position in which the move is made. It is left as it was given.
+    move : int
+        The move, encoded as by bitboard.encode_move.
+
+    Returns
+    -------
+    str
+        The move, such as "Nf3", "exd5", "O-O" or "e8=Q+".
+    """
+    origin, destination, promotion = bitboard.decode_move(move)
+    piece_type = position.piece_at(origin)[1]
+    if piece_type == KING and abs(destination - origin) == 2:
+        text = "O-O" if destination > origin else "O-O-O"
+    else:
+        capture = position.piece_at(destination) is not None \
+            or piece_type == PAWN and destination == position.get_en_passant()
+        if piece_type == PAWN:
+            text = bitboard.FILES[origin & 7] if capture else ""
+        else:
+            text = "NBRQK"[piece_type - 1]
+            rivals = [other & 63 for other in position.generate_moves()
+                      if other >> 6 & 63 == destination and other != move
+                      and position.piece_at(other & 63)[1] == piece_type]
+            if rivals:
+                if all(rival & 7 != origin & 7 for rival in rivals):
+                    text += bitboard.FILES[origin & 7]
+                elif all(rival >> 3 != origin >> 3 for rival in rivals):
+                    text += str(8 - (origin >> 3))
+                else:
+                    text += bitboard.square_name(origin)
+        if capture:
+            text += "x"
+        text += bitboard.square_name(destination)
+        if promotion:
+            text += "=" + "NBRQ"[promotion - 1]
+    position.make_move(move)
+    if position.in_check():
+        text += "#" if not position.generate_moves() else "+"
+    position.unmake_move()
+    return text
+
+
+def _open(source):
+    """ Returns a file object for a path, or the given file object. """
+    if isinstance(source, str):
+        return open(source, encoding="utf-8", errors="replace")
+    return source
+
+
+def read_games(source, span=None):
+    """ Yields the games in a PGN file, reading one game at a time.
+
+    Parameters
+    ----------
+    source : str
+        The path of the file, or a file object open for reading text.
+    span : tuple[int, int]
+        The range of bytes of the file, from start to end, whose games are
+        read: those whose Event tag, which begins every game, starts within
+        it. Only that part of the file is read, so ranges which cover the
+        file share its games out without any being read twice. The source
+        must be a path. None to read every game.
+
+    Yields
+    ------
+    Game
+        Each game in the file, with its moves as yet unchecked.
+    """
+    if span is None:
+        file = _open(source)
+        lines = file
+    else:
+        file = open(source, "rb")
+        lines = _read_span(file, *span)
+    try:
+        for headers, movetext in _split_games(lines):
+            yield _parse_movetext(headers, movetext)
+    finally:
+        if file is not source:
+            file.close()
+
+
+def _read_span(file, start, end):
+    """ Yields the lines of the games whose Event tag starts within a range
+    of bytes of a file open for reading bytes. """
+    offset = start
+    if start:
+        # Skip the rest of the line the range starts in, which belongs to
+        # the range before.
+        file.seek(start - 1)
+        offset += len(file.readline()) - 1
+    started = not start
+    for line in iter(file.readline, b""):
+        if line.startswith(b"[Event "):
+            if end is not None and offset >= end:
+                break
+            started = True
+        if started:
+            yield line.decode("utf-8", "replace")
+        offset += len(line)
+
+
+def _split_games(lines):
+    """ Yields the tags and the movetext of each game in the lines of a PGN
+    file, without parsing the movetext. """
+    headers = {}
+    movetext = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("%"):
+            continue
+        if stripped.startswith("["):
+            if movetext:
+                # A game without a result ends at the next game's tags.
+                yield headers, " ".join(movetext)
+                headers, movetext = {}, []
+            match = _TAG.match(stripped)
+            if match is not None:
+                headers[match.group(1)] = re.sub(r"\\(.)", r"\1",
+                                                 match.group(2))
+        elif stripped:
+            movetext.append(stripped)
+            if stripped.split()[-1] in RESULTS \
+                    and stripped.count("{") <= stripped.count("}"):
+                yield headers, " ".join(movetext)
+                headers, movetext = {}, []
+    if headers or movetext:
+        yield headers, " ".join(movetext)
+
+
+def _parse_movetext(headers, movetext):
+    """ Returns the Game with the given tags and movetext. Comments,
+    variations, move numbers and annotations are skipped. """
+    sans = []
+    result = headers.get("Result", "*")
+    depth = 0
+    for token in _TOKEN.findall(movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(depth - 1, 0)
+        elif depth or token[0] in "{;$" or token[0].isdigit() \
+                and token.rstrip(".").isdigit():
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            sans.append(token)
+    return Game(headers, sans, result)
+
+
+def format_game(game):
+    """ Returns a game in PGN, ending with a blank line.
+
+    Parameters
+    ----------
+    game : Game
+        The game to format. Its moves must be legal.
+
+    Returns
+    -------
+    str
+        The game's tags and movetext.
+    """
+    headers = dict(game.get_headers())
+    headers["Result"] = game.get_result()
+    lines = []
+    for name in ROSTER:
+        value = headers.pop(name, "?")
+        lines.append(f'[{name} "{_escape(value)}"]')
+    for name, value in headers.items():
+        lines.append(f'[{name} "{_escape(value)}"]')
+    lines.append("")
+
+    tokens = []
+    position = game.get_start()
+    for move in game.get_moves():
+        if position.get_turn() == bitboard.WHITE:
+            tokens.append(f"{position.get_fullmove()}.")
+        elif not tokens:
+            tokens.append(f"{position.get_fullmove()}...")
+        tokens.append(to_san(position, move))
+        position.make_move(move)
+    tokens.append(game.get_result())
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+
+def _escape(value):
+    """ Returns a tag value with its quotes and backslashes escaped. """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def write_games(destination, games):
+    """ Writes games to a PGN file.
+
+    Parameters
+    ----------
+    destination : str
+        The path of the file, or a file object open for writing text.
+    games : iterable[Game]
+        The games to write.
+
+    Returns
+    -------
+    int
+        The number of games written.
+    """
+    if isinstance(destination, str):
+        with open(destination, "w", encoding="utf-8") as file:
+            return write_games(file, games)
+    count = 0
+    for game in games:
+        destination.write(format_game(game))
+        count += 1
+    return count
+
+
+class Recorder(object):
+    def __init__(self, fen=bitboard.START_FEN):
+        """ A record of the moves played in the Chess game, which can be
+        written as PGN.
+
+        Parameters
+        ----------
+        fen : str
+            The position from which the game started, in Forsyth-Edwards
+            Notation.
+        """
+        self._fen = fen
+        self._position = bitboard.from_fen(fen)
+        self._sans = []
+
+    def record(self, initial, destination, piece):
+        """ Records a move once it has been played.
+
+        Parameters
+        ----------
+        initial : tuple[int, int]
+            The cell from which the piece moved.
+        destination : tuple[int, int]
+            The cell to which the piece moved.
+        piece : pieces.Piece
+            The piece now at the destination, which shows any promotion.
+        """
+        origin = square_of(initial)
+        target = square_of(destination)
+        promotion = 0
+        if self._position.piece_at(origin)[1] != piece.get_type_index():
+            promotion = piece.get_type_index()
+        move = bitboard.encode_move(origin, target, promotion)
+        self._sans.append(to_san(self._position, move))
+        self._position.make_move(move)
+
+    def get_game(self, result="*", headers=None):
+        """ Returns the recorded moves as a Game.
+
+        Parameters
+        ----------
+        result : str
+            The game's result: "1-0", "0-1", "1/2-1/2" or "*".
+        headers : dict[str, str]
+            Any tags to add, such as "White" and "Event".
+
+        Returns
+        -------
+        Game
+            The recorded game. Its start position is given by the FEN tag
+            if it isn't the standard one.
+        """
+        tags = dict(headers or {})
+        if self._fen != bitboard.START_FEN:
+            tags["SetUp"] = "1"
+            tags["FEN"] = self._fen
+        return Game(tags, self._sans, result)
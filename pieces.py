@@ -1,33 +1,45 @@
 import moves
+import render
+
+TEAMS = ("White", "Black")
+TYPES = ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King")
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
 
 
 class Piece(object):
+    # Pieces are slotted and store their team as its index in TEAMS. Their
+    # type, and the tables below indexed by team and type, are shared by
+    # every piece of a class.
+    __slots__ = ("_pos", "_colour", "_initial", "_board")
+
+    _far_rows = (0, 7)
+    _icon_paths = tuple(
+        tuple(fr".\icons\{team[0].lower()}{letter}.png"
+              for letter in "pnbrqk")
+        for team in TEAMS)
+
     def __init__(self, position, team):
-        """ A Chess piece, defined by its type, position and team. """
-        _paths = {
-            "Black Pawn": r".\icons\bp.png",
-            "Black Rook": r".\icons\br.png",
-            "Black Knight": r".\icons\bn.png",
-            "Black Bishop": r".\icons\bb.png",
-            "Black King": r".\icons\bk.png",
-            "Black Queen": r".\icons\bq.png",
-            "White Pawn": r".\icons\wp.png",
-            "White Rook": r".\icons\wr.png",
-            "White Knight": r".\icons\wn.png",
-            "White Bishop": r".\icons\wb.png",
-            "White King": r".\icons\wk.png",
-            "White Queen": r".\icons\wq.png"
-        }
+        """ A Chess piece, defined by its type, position and team.
+
+        Parameters
+        ----------
+        position : tuple[int, int]
+            The cell at which the piece is placed.
+        team : str
+            The piece's team, "White" or "Black". Its index in TEAMS is also
+            accepted.
+        """
         self._pos = position
-        self._team = team
-        self._icon_path = _paths[repr(self)]
+        self._colour = team if isinstance(team, int) else TEAMS.index(team)
         self._initial = True
+        self._board = None
 
     def __repr__(self):
-        return f"{self._team} {self._type}"
+        return f"{TEAMS[self._colour]} {self._type}"
 
-    def move(self, destination, black, white, window):
-        """ Controls the piece's move.
+    def check_move(self, destination, black, white):
+        """ Determines whether the piece can move to a cell, without moving it.
 
         Parameters
         ----------
@@ -37,30 +49,23 @@ class Piece(object):
             The list of current Black pieces.
         white : list[Piece]
             The list of current White pieces.
-        window : sg.Window
-            The Chess game Window.
 
         Returns
         -------
-        bool
-            True if the piece's move is valid. False otherwise.
+        moves.Result
+            OK if the piece's move is valid. The reason it isn't otherwise.
         """
         position = self.get_position()
         direction = moves.get_direction(position, destination)
-        if not direction:
-            return False
-        if not moves.validate_move(self, direction, window):
-            return False
-        if not moves.validate_path(self, black, white, position, destination,
-                             direction, window):
-            return False
-        self.update_position(window, destination)
-        self._pos = destination
-        self._initial = False
-        return True
+        result = moves.validate_move(self, direction)
+        if not result:
+            return result
+        return moves.validate_path(self, black, white, position, destination,
+                                   direction)
 
-    def attack(self, destination, black, white, window):
-        """ Controls the piece's attack.
+    def check_attack(self, destination, black, white):
+        """ Determines whether the piece can attack at a cell, without moving
+        it.
 
         Parameters
         ----------
@@ -70,29 +75,97 @@ class Piece(object):
             The list of current Black pieces.
         white : list[Piece]
             The list of current White pieces.
-        window : sg.Window
-            The Chess game Window.
 
         Returns
         -------
-        bool
-            True if the piece's attack is valid. False otherwise.
+        moves.Result
+            OK if the piece's attack is valid. The reason it isn't otherwise.
         """
         position = self.get_position()
         direction = moves.get_direction(position, destination)
-        if not direction:
-            return False
-        if not moves.validate_attack(self, direction, window):
-            return False
-        if not moves.validate_position(self, black, white, destination, window):
-            return False
-        if not moves.validate_path(self, black, white, position, destination,
-                             direction, window):
-            return False
-        self.update_position(window, destination)
-        self._pos = destination
+        result = moves.validate_attack(self, direction)
+        if not result:
+            return result
+        result = moves.validate_position(self, black, white, destination)
+        if not result:
+            return result
+        return moves.validate_path(self, black, white, position, destination,
+                                   direction)
+
+    def move(self, destination, black, white, window=None):
+        """ Controls the piece's move.
+
+        Parameters
+        ----------
+        destination : tuple[int, int]
+            The cell to which the piece is attempting to move.
+        black : list[Piece]
+            The list of current Black pieces.
+        white : list[Piece]
+            The list of current White pieces.
+        window : sg.Window
+            The Chess game Window, in which to update the piece's icon. None
+            if the game has no window.
+
+        Returns
+        -------
+        moves.Result
+            OK if the piece's move is valid and doesn't leave its King in
+            check. The reason it isn't otherwise.
+        """
+        result = self.check_move(destination, black, white)
+        if result and self._board is not None \
+                and self._board.exposes_king(self, destination):
+            result = moves.Result(moves.IN_CHECK, self)
+        if result:
+            self._advance(destination, window)
+        return result
+
+    def attack(self, destination, black, white, window=None):
+        """ Controls the piece's attack.
+
+        Parameters
+        ----------
+        destination : tuple[int, int]
+            The cell at which the piece is attempting to attack another piece.
+        black : list[Piece]
+            The list of current Black pieces.
+        white : list[Piece]
+            The list of current White pieces.
+        window : sg.Window
+            The Chess game Window, in which to update the piece's icon. None
+            if the game has no window.
+
+        Returns
+        -------
+        moves.Result
+            OK if the piece's attack is valid and doesn't leave its King in
+            check. The reason it isn't otherwise.
+        """
+        result = self.check_attack(destination, black, white)
+        if result and self._board is not None \
+                and self._board.exposes_king(self, destination):
+            result = moves.Result(moves.IN_CHECK, self)
+        if result:
+            self._advance(destination, window)
+        return result
+
+    def _advance(self, destination, window):
+        """ Moves the piece to a cell once its move or attack is validated.
+
+        Parameters
+        ----------
+        destination : tuple[int, int]
+            The cell to which the piece is moving.
+        window : sg.Window
+            The Chess game Window. None if the game has no window.
+        """
+        if window is not None:
+            self.update_position(window, destination)
+        self._relocate(destination)
         self._initial = False
-        return True
+        if self._board is not None:
+            self._board.invalidate()
 
     def kill(self, black, white):
         """ Removes the piece from the list of its team's current pieces.
@@ -110,14 +183,30 @@ class Piece(object):
             list[Piece] : The list of current Black pieces.
             list[Piece] : The list of current White pieces.
         """
-        if self.get_team() == "Black":
+        if self._colour == BLACK:
             black.remove(self)
-        elif self.get_team() == "White":
+        else:
             white.remove(self)
+        if self._board is not None:
+            self._board.lift(self)
+            self._board.invalidate()
         return black, white
 
+    def _relocate(self, destination):
+        """ Sets the piece's position, keeping its Board in sync.
+
+        Parameters
+        ----------
+        destination : tuple[int, int]
+            The cell to which the piece is moving.
+        """
+        if self._board is not None:
+            self._board.relocate(self, destination)
+        self._pos = destination
+
     def update_position(self, window, destination):
-        """ Updates position of a piece's icon.
+        """ Updates position of a piece's icon, from the icons cached by the
+        window's render.Renderer.
 
         Parameters
         ----------
@@ -126,13 +215,13 @@ class Piece(object):
         destination : tuple[int, int]
             The cell to which the piece is moving.
         """
-        window[self.get_position()].update(image_filename="",
-                                           image_size=(75, 75))
-        window[destination].update(image_filename=self.get_icon_path(),
-                                   image_size=(75, 75))
+        renderer = render.get_renderer(window)
+        if destination != self.get_position():
+            renderer.show(self.get_position(), None)
+        renderer.show(destination, self.get_icon_path())
 
-    def promote(self, piece_type, black, white, window):
-        return
+    def promote(self, piece_type, black, white, window=None):
+        return black, white
 
     def get_position(self):
         """ Returns the piece's position as a tuple[row, column]. """
@@ -144,7 +233,15 @@ class Piece(object):
 
     def get_team(self):
         """ Returns the piece's team as a string. """
-        return self._team
+        return TEAMS[self._colour]
+
+    def get_type_index(self):
+        """ Returns the index of the piece's type in TYPES. """
+        return self._type_index
+
+    def get_team_index(self):
+        """ Returns the index of the piece's team in TEAMS. """
+        return self._colour
 
     def get_move(self):
         """ Returns the list of directions in which the piece can move. """
@@ -156,7 +253,12 @@ class Piece(object):
 
     def get_icon_path(self):
         """ Returns the piece's icon path as a string."""
-        return self._icon_path
+        return self._icon_paths[self._colour][self._type_index]
+
+    def get_board(self):
+        """ Returns the Board on which the piece is placed. None if there is
+        no Board. """
+        return self._board
 
     def get_initial(self):
         """ Returns whether or not the piece is at its initial position. """
@@ -164,14 +266,19 @@ class Piece(object):
 
     def get_far(self):
         """ Returns the row which is the far side of the Chessboard. """
-        _far_rows = {"Black": 7, "White": 0}
-        return _far_rows[self.get_team()]
+        return self._far_rows[self._colour]
 
 
 class Pawn(Piece):
+    __slots__ = ()
     _type = "Pawn"
+    _type_index = PAWN
+    # Indexed by team, as in TEAMS.
+    _team_moves = (["up"], ["down"])
+    _team_attacks = (["top-left", "top-right"],
+                     ["bottom-left", "bottom-right"])
 
-    def promote(self, piece_type, black, white, window):
+    def promote(self, piece_type, black, white, window=None):
         """ Promotes a Pawn to another piece when it reaches the far side of
         the Chessboard.
 
@@ -184,47 +291,52 @@ class Pawn(Piece):
         white : list[Piece]
             The list of current White pieces.
         window : sg.Window
-            The Chess game window.
+            The Chess game window, in which to update the piece's icon. None
+            if the game has no window.
 
         Returns
         -------
-        tuple[Piece, list[Piece], list[Piece]]
-            Piece : The promoted piece.
+        tuple[list[Piece], list[Piece]]
             list[Piece] : The list of current Black pieces.
             list[Piece] : The list of current White pieces.
         """
-        team = self.get_team()
+        team = self._colour
         position = self.get_position()
         pieces = {
-            "Rook": Rook(position, team),
-            "Knight": Knight(position, team),
-            "Bishop": Bishop(position, team),
-            "Queen": Queen(position, team)
+            "Rook": Rook,
+            "Knight": Knight,
+            "Bishop": Bishop,
+            "Queen": Queen
         }
-        if team == "Black":
+        promoted = pieces[piece_type](position, team)
+        promoted._initial = False
+        if team == BLACK:
             black.remove(self)
-            black.append(pieces[piece_type])
-            black[-1].update_position(window, position)
+            black.append(promoted)
         else:
             white.remove(self)
-            white.append(pieces[piece_type])
-            white[-1].update_position(window, position)
+            white.append(promoted)
+        if self._board is not None:
+            self._board.lift(self)
+            self._board.place(promoted)
+            self._board.invalidate()
+        if window is not None:
+            promoted.update_position(window, position)
         return black, white
 
     def get_move(self):
         """ Returns the list of directions in which the piece can move. """
-        _move_directions = {"Black": ["down"], "White": ["up"]}
-        return _move_directions[self.get_team()]
+        return self._team_moves[self._colour]
 
     def get_attack(self):
         """ Returns the list of directions in which the piece can attack. """
-        _attack_directions = {"Black": ["bottom-left", "bottom-right"],
-                              "White": ["top-left", "top-right"]}
-        return _attack_directions[self.get_team()]
+        return self._team_attacks[self._colour]
 
 
 class Rook(Piece):
+    __slots__ = ()
     _type = "Rook"
+    _type_index = ROOK
     _move_directions = [
         "left",
         "right",
@@ -240,10 +352,12 @@ class Rook(Piece):
 
 
 class Knight(Piece):
+    __slots__ = ()
     _type = "Knight"
+    _type_index = KNIGHT
 
-    def move(self, destination, black, white, window):
-        """ Controls the piece's move.
+    def check_move(self, destination, black, white):
+        """ Determines whether the piece can move to a cell, without moving it.
 
         Parameters
         ----------
@@ -253,23 +367,19 @@ class Knight(Piece):
             The list of current Black pieces.
         white : list[Piece]
             The list of current White pieces.
-        window : sg.Window
-            The Chess game Window.
 
         Returns
         -------
-        bool
-            True if the piece's move is valid. False otherwise.
+        moves.Result
+            OK if the piece's move is valid. The reason it isn't otherwise.
         """
-        position = self.get_position()
-        if moves.knight(position, destination, window):
-            self.update_position(window, destination)
-            self._pos = destination
-            return True
-        return False
+        if moves.knight(self.get_position(), destination):
+            return moves.VALID
+        return moves.Result(moves.WRONG_DIRECTION, self)
 
-    def attack(self, destination, black, white, window):
-        """ Controls the piece's attack.
+    def check_attack(self, destination, black, white):
+        """ Determines whether the piece can attack at a cell, without moving
+        it.
 
         Parameters
         ----------
@@ -279,26 +389,22 @@ class Knight(Piece):
             The list of current Black pieces.
         white : list[Piece]
             The list of current White pieces.
-        window : sg.Window
-            The Chess game Window.
 
         Returns
         -------
-        bool
-            True if the piece's attack is valid. False otherwise.
+        moves.Result
+            OK if the piece's attack is valid. The reason it isn't otherwise.
         """
-        position = self.get_position()
-        dest_piece = moves.get_piece(black, white, destination)
-        if dest_piece.get_team() != self.get_team():
-            if moves.knight(position, destination, window):
-                self.update_position(window, destination)
-                self._pos = destination
-                return True
-        return False
+        result = moves.validate_position(self, black, white, destination)
+        if not result:
+            return result
+        return self.check_move(destination, black, white)
 
 
 class Bishop(Piece):
+    __slots__ = ()
     _type = "Bishop"
+    _type_index = BISHOP
     _move_directions = [
         "top-left",
         "top-right",
@@ -314,7 +420,9 @@ class Bishop(Piece):
 
 
 class Queen(Piece):
+    __slots__ = ()
     _type = "Queen"
+    _type_index = QUEEN
     _move_directions = [
         "top-left",
         "top-right",
@@ -338,7 +446,9 @@ class Queen(Piece):
 
 
 class King(Piece):
+    __slots__ = ()
     _type = "King"
+    _type_index = KING
     _move_directions = [
         "top-left",
         "top-right",
@@ -0,0 +1,115 @@
+""" Rendering of the pieces on the cells of the Chess game window.
+
+Each icon is decoded into a Tk image once and kept in memory, and shown by
+setting it on the cell's button, so PySimpleGUI doesn't decode it again on
+every update. A Renderer remembers the icon shown in each cell of its window,
+so only the cells whose contents have changed are updated.
+"""
+
+import os
+import weakref
+
+ICON_SIZE = (75, 75)
+
+_icons = {}
+# The Renderer of each window, forgotten once the window is.
+_renderers = weakref.WeakKeyDictionary()
+
+
+def get_icon(path):
+    """ Returns the image of an icon, decoding its file the first time. A
+    Tk window must already exist.
+
+    Parameters
+    ----------
+    path : str
+        The path of the icon, as given by Piece.get_icon_path.
+
+    Returns
+    -------
+    tkinter.PhotoImage
+        The decoded icon.
+    """
+    image = _icons.get(path)
+    if image is None:
+        import tkinter
+        image = _icons[path] = tkinter.PhotoImage(
+            file=path.replace("\\", os.sep))
+    return image
+
+
+class Renderer(object):
+    def __init__(self, window):
+        """ The cells of a Chess game window, with the icon shown in each.
+
+        Parameters
+        ----------
+        window : sg.Window
+            The Chess game window. Its cells must start out empty. It is
+            referred to weakly, so that get_renderer forgets the Renderer
+            once the window is gone.
+        """
+        self._window = weakref.proxy(window)
+        self._shown = [None] * 64
+
+    def show(self, position, path):
+        """ Shows an icon in a cell, unless it is already shown there.
+
+        Parameters
+        ----------
+        position : tuple[int, int]
+            The cell in which to show the icon.
+        path : str
+            The path of the icon. None to empty the cell.
+
+        Returns
+        -------
+        bool
+            True if the cell was updated. False otherwise.
+        """
+        square = position[0] * 8 + position[1]
+        if self._shown[square] == path:
+            return False
+        if path is None:
+            self._window[position].update(image_filename="",
+                                          image_size=ICON_SIZE)
+        else:
+            # The cache holds a reference to the image, so Tk keeps it.
+            self._window[position].Widget.configure(
+                image=get_icon(path), width=ICON_SIZE[0],
+                height=ICON_SIZE[1])
+        self._shown[square] = path
+        return True
+
+    def render(self, black, white):
+        """ Shows the given pieces, updating only the cells whose contents
+        have changed.
+
+        Parameters
+        ----------
+        black : list[Piece]
+            The list of current Black pieces.
+        white : list[Piece]
+            The list of current White pieces.
+
+        Returns
+        -------
+        int
+            The number of cells updated.
+        """
+        wanted = [None] * 64
+        for piece in black + white:
+            row, column = piece.get_position()
+            wanted[row * 8 + column] = piece.get_icon_path()
+        updated = 0
+        for square, path in enumerate(wanted):
+            updated += self.show(divmod(square, 8), path)
+        return updated
+
+
+def get_renderer(window):
+    """ Returns the Renderer of a window, creating it the first time. """
+    renderer = _renderers.get(window)
+    if renderer is None:
+        renderer = _renderers[window] = Renderer(window)
+    return renderer
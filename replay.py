@@ -0,0 +1,179 @@
+""" Replays the games of a directory of PGN files on every core, checking that
+each move is legal, and reports the games and moves replayed per second.
+
+Each file is split into shards of equal ranges of bytes, so that the work is
+spread across the processes of the pool even when there are fewer files than
+processes. A shard holds the games whose Event tag starts within its range,
+and each process reads only its own shard's part of the file. The games are
+streamed, so each process holds one game at a time.
+
+Usage: python replay.py DIRECTORY [--workers N] [--pattern GLOB] [--json]
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import pgn
+
+
+def replay_shard(task):
+    """ Replays one shard of the games of a PGN file.
+
+    Parameters
+    ----------
+    task : tuple[str, int, int]
+        The path of the file, and the first byte of the shard's range and
+        the byte after it.
+
+    Returns
+    -------
+    dict
+        The process's id, the file's path, the first byte of the shard, the
+        numbers of games and moves replayed, the list of [game index,
+        message] of each illegal game, counting from the shard's first game,
+        and the time taken, in seconds.
+    """
+    path, first, end = task
+    start = time.perf_counter()
+    games = 0
+    moves = 0
+    errors = []
+    for index, game in enumerate(pgn.read_games(path, (first, end))):
+        games += 1
+        try:
+            for position, move in game.replay():
+                moves += 1
+        except ValueError as error:
+            errors.append([index, str(error)])
+    return {"worker": os.getpid(), "path": path, "start": first,
+            "games": games, "moves": moves, "errors": errors,
+            "elapsed": time.perf_counter() - start}
+
+
+def plan(paths, workers):
+    """ Returns the tasks which shard files across a number of processes.
+
+    Parameters
+    ----------
+    paths : list[str]
+        The paths of the PGN files.
+    workers : int
+        The number of processes.
+
+    Returns
+    -------
+    list[tuple[str, int, int]]
+        The tasks, as taken by replay_shard. Each file is split into enough
+        shards for every process to have work.
+    """
+    if not paths:
+        return []
+    count = max(1, -(-workers // len(paths)))
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        bounds = [size * shard // count for shard in range(count + 1)]
+        tasks.extend((path, bounds[shard], bounds[shard + 1])
+                     for shard in range(count))
+    return tasks
+
+
+def replay(paths, workers=None):
+    """ Replays the games of PGN files across a pool of processes.
+
+    Parameters
+    ----------
+    paths : list[str]
+        The paths of the PGN files.
+    workers : int
+        The number of processes. None for one per core.
+
+    Returns
+    -------
+    dict
+        The report: the totals of games, moves and illegal games, the wall
+        time, the games and moves per second, each process's totals and the
+        list of illegal games.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    per_worker = {}
+    errors = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(replay_shard, plan(paths, workers)):
+            totals = per_worker.setdefault(
+                result["worker"], {"games": 0, "moves": 0, "errors": 0,
+                                   "elapsed": 0.0})
+            totals["games"] += result["games"]
+            totals["moves"] += result["moves"]
+            totals["errors"] += len(result["errors"])
+            totals["elapsed"] += result["elapsed"]
+            errors.extend({"path": result["path"], "start": result["start"],
+                           "game": index, "message": message}
+                          for index, message in result["errors"])
+    elapsed = time.perf_counter() - start
+    games = sum(totals["games"] for totals in per_worker.values())
+    moves = sum(totals["moves"] for totals in per_worker.values())
+    errors.sort(key=lambda error: (error["path"], error["start"],
+                                   error["game"]))
+    return {
+        "files": len(paths),
+        "workers": workers,
+        "games": games,
+        "moves": moves,
+        "illegal": len(errors),
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed if elapsed else 0.0,
+        "moves_per_second": moves / elapsed if elapsed else 0.0,
+        "per_worker": [dict(totals, worker=worker)
+                       for worker, totals in sorted(per_worker.items())],
+        "errors": errors
+    }
+
+
+def print_report(report):
+    """ Prints a replay report as a table. """
+    print(f"{report['files']} files, {report['games']} games, "
+          f"{report['moves']} moves in {report['elapsed']:.2f} s on "
+          f"{report['workers']} processes")
+    print(f"{report['games_per_second']:.1f} games/s, "
+          f"{report['moves_per_second']:.0f} moves/s")
+    for totals in report["per_worker"]:
+        print(f"  worker {totals['worker']}: {totals['games']} games, "
+              f"{totals['moves']} moves, {totals['errors']} illegal, "
+              f"{totals['elapsed']:.2f} s busy")
+    for error in report["errors"]:
+        print(f"{error['path']}, game {error['game'] + 1} from byte "
+              f"{error['start']}: {error['message']}")
+    print(f"{report['illegal']} illegal games")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a directory of PGN files, checking each move.")
+    parser.add_argument("directory", help="directory of PGN files")
+    parser.add_argument("--workers", type=int,
+                        help="number of processes (default: one per core)")
+    parser.add_argument("--pattern", default="*.pgn",
+                        help="file name pattern (default *.pgn)")
+    parser.add_argument("--json", action="store_true",
+                        help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.directory, "**",
+                                          args.pattern), recursive=True))
+    report = replay(paths, args.workers)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["illegal"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+""" A server which hosts many Chess games at once over TCP.
+
+Clients send requests as lines of JSON, and receive a line of JSON in reply
+to each. Cells are named in algebraic notation, such as "e2", or given as
+[row, column]. The requests are:
+
+    {"op": "new", "fen": FEN}           start a game, optionally from FEN
+    {"op": "join", "game": ID}          follow a game's moves
+    {"op": "state", "game": ID}         describe a game
+    {"op": "moves", "game": ID, "from": CELL}
+                                        list a piece's legal destinations
+    {"op": "move", "game": ID, "from": CELL, "to": CELL, "promotion": TYPE}
+                                        make a move
+
+Clients which have joined a game are sent {"event": "move", ...} after each
+move in it. Games are played by the rules of moves.py and pieces.py, with no
+window, and each game's state lives in its own Board. A game is forgotten
+once every client following it has disconnected.
+
+Usage: python server.py [--host HOST] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+
+import bitboard
+import fen
+import moves
+from board import new_board, position_of, square_of
+from pieces import TEAMS, PAWN
+
+
+class Game(object):
+    def __init__(self, position=None):
+        """ A game of Chess played without a window.
+
+        Parameters
+        ----------
+        position : str
+            The position from which to start, in Forsyth-Edwards Notation.
+            None to start from the initial position, as in other.new_game.
+
+        Raises
+        ------
+        ValueError
+            If the position isn't valid, or has no pieces.
+        """
+        if position is None:
+            board = new_board()
+            self._black, self._white = board.get_black(), board.get_white()
+            self._count = 0
+        else:
+            self._black, self._white, self._count = fen.load(position)
+        self._board = moves.get_board(self._black, self._white)
+        # A game may start from a position which is already over.
+        self._winner = self._board.get_winner()
+
+    def get_board(self):
+        """ Returns the game's Board. """
+        return self._board
+
+    def get_count(self):
+        """ Returns the number of turns completed. """
+        return self._count
+
+    def get_winner(self):
+        """ Returns the winner as a string, board.DRAW after a stalemate, or
+        None if the game isn't over. """
+        return self._winner
+
+    def get_state(self):
+        """ Returns a description of the game as a dictionary. """
+        return {
+            "fen": fen.dump(self._black, self._white, self._count),
+            "turn": TEAMS[self._count % 2],
+            "check": self._board.in_check(),
+            "winner": self._winner
+        }
+
+    def play(self, initial, destination, promotion=None):
+        """ Moves a piece for the team whose turn it is.
+
+        Parameters
+        ----------
+        initial : tuple[int, int]
+            The cell of the piece to move.
+        destination : tuple[int, int]
+            The cell to which the piece moves or at which it attacks.
+        promotion : str
+            The type to which a Pawn reaching the far side is promoted.
+            None to promote it to a Queen.
+
+        Returns
+        -------
+        moves.Result
+            OK if the move was made. The reason it wasn't otherwise.
+
+        Raises
+        ------
+        ValueError
+            If the game is over, there is no piece of the team whose turn it
+            is at the initial cell, or the promotion isn't a valid type.
+        """
+        if self._winner is not None:
+            raise ValueError("The game is over.")
+        piece = self._board.get_piece(initial)
+        if piece is None or piece.get_team_index() != self._count % 2:
+            raise ValueError(f"There is no {TEAMS[self._count % 2]} piece "
+                             f"there.")
+        if promotion not in (None, "Rook", "Knight", "Bishop", "Queen"):
+            raise ValueError(f"Can't promote to {promotion!r}.")
+        target = self._board.get_piece(destination)
+        if target is None:
+            result = piece.move(destination, self._black, self._white)
+        else:
+            result = piece.attack(destination, self._black, self._white)
+            if result:
+                target.kill(self._black, self._white)
+        if not result:
+            return result
+        self._count += 1
+        self._board.pass_turn()
+        if piece.get_type_index() == PAWN \
+                and destination[0] == piece.get_far():
+            piece.promote(promotion or "Queen", self._black, self._white)
+        self._winner = self._board.get_winner()
+        return result
+
+
+def parse_cell(cell):
+    """ Returns the position of a cell named in algebraic notation or given
+    as [row, column].
+
+    Raises
+    ------
+    ValueError
+        If the cell isn't on the Chessboard.
+    """
+    if isinstance(cell, str):
+        if len(cell) != 2 or cell[0] not in bitboard.FILES \
+                or cell[1] not in "12345678":
+            raise ValueError(f"Unknown cell {cell!r}.")
+        return position_of(bitboard.parse_square(cell))
+    row, column = cell
+    if not (0 <= row < 8 and 0 <= column < 8):
+        raise ValueError(f"Unknown cell {cell!r}.")
+    return row, column
+
+
+def cell_name(position):
+    """ Returns the algebraic name of a cell. """
+    return bitboard.square_name(square_of(position))
+
+
+class GameServer(object):
+    def __init__(self):
+        """ The games hosted by the server, and the clients following each.
+        """
+        self._games = {}
+        self._followers = {}
+        self._ids = itertools.count(1)
+
+    def get_games(self):
+        """ Returns the dictionary of games by id. """
+        return self._games
+
+    async def handle(self, reader, writer):
+        """ Serves the requests of one client until it disconnects. """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be an object.")
+                    reply = self.dispatch(request, writer)
+                except (ValueError, TypeError, KeyError) as error:
+                    reply = {"ok": False, "error": str(error)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            # A game is forgotten once no client follows it.
+            for game_id, followers in tuple(self._followers.items()):
+                followers.discard(writer)
+                if not followers:
+                    del self._followers[game_id]
+                    del self._games[game_id]
+            writer.close()
+
+    def dispatch(self, request, writer):
+        """ Returns the reply to a request.
+
+        Parameters
+        ----------
+        request : dict
+            The decoded request.
+        writer : asyncio.StreamWriter
+            The stream of the client which sent the request.
+
+        Returns
+        -------
+        dict
+            The reply, whose "ok" is False with an "error" if the request
+            failed.
+
+        Raises
+        ------
+        ValueError
+            If the request isn't valid.
+        """
+        op = request.get("op")
+        if op == "new":
+            game_id = next(self._ids)
+            self._games[game_id] = Game(request.get("fen"))
+            self._followers[game_id] = {writer}
+            return dict(self._games[game_id].get_state(), ok=True,
+                        game=game_id)
+
+        game_id = request.get("game")
+        game = self._games.get(game_id)
+        if game is None:
+            raise ValueError(f"Unknown game {game_id!r}.")
+        if op == "join":
+            self._followers[game_id].add(writer)
+            return dict(game.get_state(), ok=True, game=game_id)
+        elif op == "state":
+            return dict(game.get_state(), ok=True, game=game_id)
+        elif op == "moves":
+            initial = parse_cell(request["from"])
+            targets = game.get_board().get_map().get_destinations(initial)
+            return {"ok": True, "game": game_id,
+                    "moves": [cell_name(target) for target in targets]}
+        elif op == "move":
+            initial = parse_cell(request["from"])
+            destination = parse_cell(request["to"])
+            result = game.play(initial, destination, request.get("promotion"))
+            if not result:
+                return {"ok": False, "game": game_id,
+                        "reason": result.get_reason(),
+                        "error": result.get_message()}
+            event = dict(game.get_state(), event="move", game=game_id,
+                         move=[cell_name(initial), cell_name(destination)])
+            self._broadcast(game_id, event, writer)
+            return dict(event, ok=True)
+        raise ValueError(f"Unknown op {op!r}.")
+
+    def _broadcast(self, game_id, event, sender):
+        """ Sends an event to the followers of a game, except its sender. """
+        line = json.dumps(event).encode() + b"\n"
+        for writer in tuple(self._followers.get(game_id, ())):
+            if writer is not sender and not writer.is_closing():
+                writer.write(line)
+
+
+async def serve(host="127.0.0.1", port=8765):
+    """ Hosts games until the process is stopped.
+
+    Parameters
+    ----------
+    host : str
+        The address on which to listen.
+    port : int
+        The port on which to listen.
+    """
+    games = GameServer()
+    server = await asyncio.start_server(games.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Host Chess games over TCP, as lines of JSON.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address on which to listen (default "
+                             "127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="port on which to listen (default 8765)")
+    args = parser.parse_args(argv)
+    print(f"Serving Chess games on {args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+""" Endgame tablebases: the result of every position with a King and a Queen,
+Rook or Pawn against a lone King, with perfect play.
+
+The tables are generated by retrograde analysis. The positions in which the
+lone King is mated are found first, then the results are propagated
+backwards through the moves which lead to them: a position is won if a move
+leads to a lost position, and lost if every move leads to a won position.
+Positions never reached this way are draws. The moves are those of the
+pieces' direction tables in pieces.py, as in bitboard.py.
+
+Each table stores 2 bits per position, from the view of the team whose turn
+it is, indexed by turn * 262144 + King * 4096 + lone King * 64 + piece, with
+the stronger team as White. The tables are written to one file after a
+header naming each, and the file is memory-mapped for probing.
+
+Usage: python tablebase.py build FILE
+       python tablebase.py probe FILE FEN
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+import bitboard
+from bitboard import KING_ATTACKS
+from pieces import WHITE, BLACK, PAWN, ROOK, QUEEN, KING
+
+DRAW, WIN, LOSS, INVALID = 0, 1, 2, 3
+NAMES = {QUEEN: "KQK", ROOK: "KRK", PAWN: "KPK"}
+# The turn, relative to the stronger team.
+STRONG, WEAK = 0, 1
+SIZE = 2 * 64 * 64 * 64
+
+MAGIC = b"CHTB"
+_HEADER = struct.Struct(">4sHH")
+_ENTRY = struct.Struct(">4sII")
+_KING_TARGETS = tuple(tuple(bitboard.squares(KING_ATTACKS[square]))
+                      for square in range(64))
+
+
+def _attacks(piece_type, square, occupied):
+    """ Returns the mask of cells attacked by the stronger team's piece. """
+    if piece_type == PAWN:
+        return bitboard.PAWN_ATTACKS[WHITE][square]
+    elif piece_type == ROOK:
+        return bitboard.rook_attacks(square, occupied)
+    return bitboard.queen_attacks(square, occupied)
+
+
+def _valid(turn, king, weak, piece, piece_type):
+    """ Returns whether a position can occur: its pieces are on different
+    cells, the Kings aren't adjacent, a Pawn isn't on the first or last row,
+    and the team whose turn it isn't isn't in check. """
+    if king == weak or king == piece or weak == piece:
+        return False
+    if KING_ATTACKS[king] >> weak & 1:
+        return False
+    if piece_type == PAWN and piece >> 3 in (0, 7):
+        return False
+    return turn == WEAK or not _attacks(piece_type, piece,
+                                        1 << king | 1 << weak) >> weak & 1
+
+
+def _index(turn, king, weak, piece):
+    """ Returns the index of a position in a table. """
+    return turn << 18 | king << 12 | weak << 6 | piece
+
+
+def generate(piece_type, promotions=None):
+    """ Generates the table of a King and a piece against a lone King.
+
+    Parameters
+    ----------
+    piece_type : int
+        The type of the piece: QUEEN, ROOK or PAWN.
+    promotions : dict[int, bytearray]
+        For a Pawn, the generated tables of the types to which it may be
+        promoted. Promotions to types without a table are draws.
+
+    Returns
+    -------
+    bytearray
+        The result of each position, by index: DRAW, WIN, LOSS or INVALID.
+    """
+    values = bytearray(SIZE)
+    # The number of the lone King's moves not yet known to lose.
+    counts = bytearray(SIZE)
+    resolved = []
+    for king in range(64):
+        guarded = KING_ATTACKS[king] | 1 << king
+        for weak in range(64):
+            for piece in range(64):
+                index = _index(WEAK, king, weak, piece)
+                if not _valid(WEAK, king, weak, piece, piece_type):
+                    values[index] = INVALID
+                else:
+                    escapes = 0
+                    for target in _KING_TARGETS[weak]:
+                        if guarded >> target & 1:
+                            continue
+                        # Taking the piece, which the King doesn't guard,
+                        # draws.
+                        if target == piece or not _attacks(
+                                piece_type, piece,
+                                1 << king | 1 << target) >> target & 1:
+                            escapes += 1
+                    counts[index] = escapes
+                    if not escapes and _attacks(
+                            piece_type, piece,
+                            1 << king | 1 << weak) >> weak & 1:
+                        values[index] = LOSS
+                        resolved.append(index)
+
+                index = _index(STRONG, king, weak, piece)
+                if not _valid(STRONG, king, weak, piece, piece_type):
+                    values[index] = INVALID
+                elif piece_type == PAWN and piece >> 3 == 1 and promotions \
+                        and piece - 8 not in (king, weak):
+                    for table in promotions.values():
+                        if table[_index(WEAK, king, weak, piece - 8)] == LOSS:
+                            values[index] = WIN
+                            resolved.append(index)
+                            break
+
+    while resolved:
+        index = resolved.pop()
+        king, weak, piece = index >> 12 & 63, index >> 6 & 63, index & 63
+        occupied = 1 << king | 1 << weak
+        if index >> 18 == WEAK:
+            # The stronger team wins by any move to a lost position.
+            origins = [_index(STRONG, origin, weak, piece)
+                       for origin in _KING_TARGETS[king]
+                       if origin != piece]
+            if piece_type == PAWN:
+                before = piece + 8
+                if before >> 3 <= 6 and not occupied >> before & 1:
+                    origins.append(_index(STRONG, king, weak, before))
+                    if piece >> 3 == 4 and not occupied >> (before + 8) & 1:
+                        origins.append(_index(STRONG, king, weak,
+                                              before + 8))
+            else:
+                for origin in bitboard.squares(
+                        _attacks(piece_type, piece, occupied) & ~occupied):
+                    origins.append(_index(STRONG, king, weak, origin))
+            for origin in origins:
+                if values[origin] == DRAW:
+                    values[origin] = WIN
+                    resolved.append(origin)
+        else:
+            # The lone King loses once every move leads to a won position.
+            for origin in _KING_TARGETS[weak]:
+                if origin == king or origin == piece:
+                    continue
+                before = _index(WEAK, king, origin, piece)
+                if values[before] == DRAW and counts[before]:
+                    counts[before] -= 1
+                    if not counts[before]:
+                        values[before] = LOSS
+                        resolved.append(before)
+    return values
+
+
+def pack(values):
+    """ Returns a table's results packed 4 to a byte. """
+    packed = bytearray(len(values) // 4)
+    for index in range(0, len(values), 4):
+        packed[index >> 2] = values[index] | values[index + 1] << 2 \
+            | values[index + 2] << 4 | values[index + 3] << 6
+    return packed
+
+
+def build(path, piece_types=(QUEEN, ROOK, PAWN)):
+    """ Generates tables and writes them to a file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    piece_types : tuple[int]
+        The types of the piece in each table. A Pawn's table uses those of
+        the Queen and the Rook, which are generated if they aren't listed.
+
+    Returns
+    -------
+    dict[str, bytearray]
+        The generated tables, by name.
+    """
+    tables = {}
+    order = [QUEEN, ROOK, PAWN] if PAWN in piece_types else list(piece_types)
+    for piece_type in order:
+        promotions = {promoted: tables[NAMES[promoted]]
+                      for promoted in (QUEEN, ROOK)} \
+            if piece_type == PAWN else None
+        tables[NAMES[piece_type]] = generate(piece_type, promotions)
+
+    blobs = [(name.encode(), pack(values)) for name, values in tables.items()]
+    offset = _HEADER.size + _ENTRY.size * len(blobs)
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, 1, len(blobs)))
+        for name, blob in blobs:
+            file.write(_ENTRY.pack(name, offset, len(blob)))
+            offset += len(blob)
+        for name, blob in blobs:
+            file.write(blob)
+    return tables
+
+
+class Tablebase(object):
+    def __init__(self, path):
+        """ Tables memory-mapped from a file written by build.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Raises
+        ------
+        ValueError
+            If the file isn't a tablebase.
+        """
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} isn't a tablebase.")
+        self._offsets = {}
+        for number in range(count):
+            name, offset, size = _ENTRY.unpack_from(
+                self._map, _HEADER.size + number * _ENTRY.size)
+            self._offsets[name.rstrip(b"\0").decode()] = offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Unmaps the file. """
+        self._map.close()
+
+    def get_names(self):
+        """ Returns the names of the tables, such as "KQK". """
+        return list(self._offsets)
+
+    def probe(self, position):
+        """ Looks up the result of a position.
+
+        Parameters
+        ----------
+        position : bitboard.Position
+            The position. Positions of the game's pieces are converted by
+            bitboard.from_lists.
+
+        Returns
+        -------
+        int
+            WIN, DRAW or LOSS for the team whose turn it is. None if the
+            position isn't in the tables.
+        """
+        occupied = position.get_occupied()
+        if bin(occupied).count("1") != 3 \
+                or not position.get_pieces(WHITE, KING) \
+                or not position.get_pieces(BLACK, KING):
+            return None
+        for square in bitboard.squares(occupied):
+            team, piece_type = position.piece_at(square)
+            if piece_type != KING:
+                break
+        offset = self._offsets.get(NAMES.get(piece_type))
+        if offset is None:
+            return None
+        king = position.king_square(team)
+        weak = position.king_square(1 - team)
+        if team == BLACK:
+            # Mirror the rows, so the stronger team is White.
+            king, weak, square = king ^ 56, weak ^ 56, square ^ 56
+        turn = STRONG if position.get_turn() == team else WEAK
+        index = _index(turn, king, weak, square)
+        value = self._map[offset + (index >> 2)] >> (index & 3) * 2 & 3
+        return None if value == INVALID else value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or probe endgame "
+                                                 "tablebases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    builder = commands.add_parser("build", help="generate the tables")
+    builder.add_argument("file", help="file to write")
+    prober = commands.add_parser("probe", help="look up a position")
+    prober.add_argument("file", help="file to read")
+    prober.add_argument("fen", help="position to look up")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        tables = build(args.file)
+        print(f"{', '.join(tables)} written to {args.file} in "
+              f"{time.perf_counter() - start:.1f} s")
+        return 0
+    with Tablebase(args.file) as tablebase:
+        value = tablebase.probe(bitboard.from_fen(args.fen))
+    if value is None:
+        print("not in the tables")
+        return 1
+    print(("draw", "win", "loss")[value])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+""" Tests of the batch move validation against the bitboard move generator.
+"""
+
+import random
+
+import pytest
+
+import bitboard
+import fen
+from board import new_board
+
+np = pytest.importorskip("numpy")
+batch = pytest.importorskip("batch")
+
+_board = new_board()
+START = fen.dump(_board.get_black(), _board.get_white(), 0)
+
+
+def _positions(count, seed=1):
+    """ Returns positions reached by random moves from the game's start,
+    without en passant squares, which the game doesn't have. """
+    rng = random.Random(seed)
+    found = []
+    while len(found) < count:
+        position = bitboard.from_fen(START)
+        for ply in range(rng.randrange(1, 60)):
+            legal = position.generate_moves()
+            if not legal:
+                break
+            position.make_move(rng.choice(legal))
+        fields = position.to_fen().split()
+        fields[3] = "-"
+        found.append(bitboard.from_fen(" ".join(fields)))
+    return found
+
+
+@pytest.mark.parametrize("position", _positions(40))
+def test_legal_mask_matches_generator(position):
+    origins, destinations = np.divmod(np.arange(64 * 64), 64)
+    board = batch.encode_position(position)
+    mask = batch.legal_mask(board, origins, destinations,
+                            np.zeros(len(origins), np.intp),
+                            np.full(len(origins), position.get_turn()))
+    found = {(origin, destination) for origin, destination
+             in zip(origins[mask], destinations[mask])}
+    expected = {bitboard.decode_move(move)[:2]
+                for move in position.generate_moves()}
+    assert found == expected, position.to_fen()
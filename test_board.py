@@ -0,0 +1,121 @@
+""" Tests of the Board: its hash, attacks and AttackMap as moves are made
+and unmade. """
+
+import pytest
+
+import fen
+from board import PLAYING, CHECK, CHECKMATE, STALEMATE, DRAW, new_board
+
+POSITIONS = [
+    None,
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 b kq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+]
+
+
+def _load(position):
+    """ Returns the Board of a position in FEN, or of a new game. """
+    if position is None:
+        return new_board()
+    black, white, count = fen.load(position)
+    return black[0].get_board()
+
+
+def _snapshot(board):
+    """ Returns everything a move could change on a Board. """
+    cells = [(row, column) for row in range(8) for column in range(8)]
+    attack_map = board.get_map()
+    return {
+        "hash": board.get_hash(),
+        "turn": board.get_turn(),
+        "occupied": board.get_occupied(),
+        "pieces": [(piece.get_type(), piece.get_team(), piece.get_position())
+                   for piece in board.get_black() + board.get_white()],
+        "attacks": [board.get_attacks(cell) for cell in cells],
+        "attacked": [board.get_attacked(team) for team in (0, 1)],
+        "destinations": [attack_map.get_destinations(cell) for cell in cells]
+    }
+
+
+def _moves(board):
+    """ Returns the legal moves of the team whose turn it is. """
+    attack_map = board.get_map()
+    team = board.get_white() if board.get_turn() == 0 else board.get_black()
+    return [(piece.get_position(), destination) for piece in list(team)
+            for destination in attack_map.get_destinations(
+                piece.get_position())]
+
+
+def _promotion(piece, destination):
+    """ Returns the type to which a piece is promoted by a move, if any. """
+    if piece.get_type() == "Pawn" and destination[0] == piece.get_far():
+        return "Queen"
+    return None
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_make_unmake_round_trip(position):
+    board = _load(position)
+    before = _snapshot(board)
+    moves = _moves(board)
+    assert moves
+    for initial, destination in moves:
+        piece = board.get_piece(initial)
+        board.make_move(piece, destination, _promotion(piece, destination))
+        assert board.get_map().get_turn() == board.get_turn()
+        board.unmake_move()
+        assert _snapshot(board) == before, (initial, destination)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_hash_is_incremental(position):
+    board = _load(position)
+    for initial, destination in _moves(board):
+        piece = board.get_piece(initial)
+        board.make_move(piece, destination, _promotion(piece, destination))
+        reloaded = _load(fen.dump(board.get_black(), board.get_white(),
+                                  board.get_turn()))
+        assert board.get_hash() == reloaded.get_hash(), (initial,
+                                                          destination)
+        board.unmake_move()
+
+
+def test_unmake_discards_map():
+    board = new_board()
+    attack_map = board.get_map()
+    board.make_move(board.get_piece((6, 4)), (4, 4))
+    board.get_map()
+    board.unmake_move()
+    assert board.get_map() is not attack_map
+    assert board.get_map().get_destinations((6, 4)) == \
+        attack_map.get_destinations((6, 4))
+
+
+
+@pytest.mark.parametrize("position, status, winner", [
+    (None, PLAYING, None),
+    ("4k3/8/8/8/8/8/4q3/4K3 w - - 0 1", CHECK, None),
+    ("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w - - 0 3",
+     CHECKMATE, "Black"),
+    ("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", CHECKMATE, "White"),
+    ("k7/8/1Q6/8/8/8/8/7K b - - 0 1", STALEMATE, DRAW),
+    # The Queen can be taken, so it isn't mate.
+    ("k7/1Q6/8/8/8/8/8/7K b - - 0 1", CHECK, None)
+])
+def test_status(position, status, winner):
+    board = _load(position)
+    assert board.get_status() == status
+    assert board.get_winner() == winner
+    assert board.in_check() == (status in (CHECK, CHECKMATE))
+
+
+def test_status_follows_moves():
+    board = _load("k7/8/1K6/8/8/8/8/2Q5 w - - 0 1")
+    board.make_move(board.get_piece((7, 2)), (1, 2))
+    assert board.get_status() == STALEMATE
+    board.unmake_move()
+    board.make_move(board.get_piece((7, 2)), (0, 2))
+    assert board.get_status() == CHECKMATE
+    board.unmake_move()
+    assert board.get_status() == PLAYING
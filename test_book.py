@@ -0,0 +1,97 @@
+""" Tests of the opening book, against positions of the game. """
+
+import bitboard
+import book
+import fen
+import other
+import pgn
+import render
+import server
+from board import new_board, square_of
+from engine import Engine
+
+
+class _Window(object):
+    """ A stand-in for the Chess game window and its cells, which ignores
+    updates. """
+
+    def __getitem__(self, key):
+        return self
+
+    @property
+    def Widget(self):
+        return self
+
+    def configure(self, **options):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def _record(cells):
+    """ Returns a game of the given moves, recorded as chess.py records it.
+    """
+    game = server.Game()
+    board = game.get_board()
+    recorder = pgn.Recorder(fen.dump(board.get_black(), board.get_white(),
+                                     0))
+    for initial, destination in cells:
+        assert game.play(initial, destination)
+        recorder.record(initial, destination, board.get_piece(destination))
+    return recorder.get_game()
+
+
+def _build(tmp_path, cells):
+    """ Returns the path of a book built from one recorded game. """
+    games = tmp_path / "games.pgn"
+    with open(games, "w", encoding="utf-8") as file:
+        pgn.write_games(file, [_record(cells)])
+    path = str(tmp_path / "book.bin")
+    assert book.build(pgn.read_games(str(games)), path) == len(cells)
+    return path
+
+
+def test_book_hits_during_engine_turn(tmp_path, monkeypatch):
+    # Icons can't be decoded without a display.
+    monkeypatch.setattr(render, "get_icon", lambda path: path)
+    # a2a3 is a move the engine's own search wouldn't play.
+    path = _build(tmp_path, [((6, 0), (5, 0)), ((1, 4), (3, 4))])
+    board = new_board()
+    black, white = board.get_black(), board.get_white()
+    with book.Book(path) as opening:
+        count, black, white = other.engine_turn(
+            Engine(max_depth=1, book=opening), 0, _Window(), black, white)
+    assert count == 1
+    assert board.get_piece((5, 0)).get_type() == "Pawn"
+    assert board.get_piece((6, 0)) is None
+
+
+def test_game_and_replayed_positions_share_keys(tmp_path):
+    # After a double step the replayed position has an en passant square,
+    # which the game's own Board doesn't record.
+    path = _build(tmp_path, [((6, 4), (4, 4)), ((1, 4), (3, 4))])
+    game = server.Game()
+    assert game.play((6, 4), (4, 4))
+    with book.Book(path) as opening:
+        moves = opening.get_moves(game.get_board())
+    assert len(moves) == 1
+
+
+def test_probes_along_the_game(tmp_path):
+    cells = [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)),
+             ((0, 1), (2, 2)), ((7, 5), (4, 2))]
+    path = _build(tmp_path, cells)
+    game = server.Game()
+    with book.Book(path) as opening:
+        for initial, destination in cells:
+            board = game.get_board()
+            move = bitboard.encode_move(square_of(initial),
+                                        square_of(destination))
+            assert opening.get_moves(board) == [(move, 1)]
+            assert opening.choose(board) == move
+            assert game.play(initial, destination)
+        assert opening.get_moves(game.get_board()) == []
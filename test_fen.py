@@ -0,0 +1,54 @@
+""" Tests of loading and saving positions of the game in FEN. """
+
+import pytest
+
+import bitboard
+import fen
+from board import new_board
+from perft import REFERENCES
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKQBNR w - - 0 1"
+
+
+def test_dump_new_game():
+    board = new_board()
+    assert fen.dump(board.get_black(), board.get_white(), 0) == START
+    # The game has no castling, so a replay of it can't castle either.
+    assert bitboard.from_fen(START).get_castling() == 0
+
+
+def test_new_game_round_trip():
+    board = new_board()
+    black, white, count = fen.load(START)
+    assert count == 0
+    assert sorted((piece.get_type(), piece.get_team(), piece.get_position(),
+                   piece.get_initial())
+                  for piece in black + white) == \
+        sorted((piece.get_type(), piece.get_team(), piece.get_position(),
+                piece.get_initial())
+               for piece in board.get_black() + board.get_white())
+    assert fen.dump(black, white, count) == START
+
+
+@pytest.mark.parametrize("position", [position for position, counts
+                                      in REFERENCES])
+def test_round_trip(position):
+    black, white, count = fen.load(position)
+    pieces, turn, castling, en_passant, halfmove, fullmove = \
+        position.split()
+    assert fen.dump(black, white, count) == \
+        f"{pieces} {turn} - - 0 {fullmove}"
+
+
+def test_pawns_keep_their_double_step():
+    black, white, count = fen.load(
+        "4k3/3p4/8/8/8/3P4/4P3/4K3 b - - 0 12")
+    assert count == 23
+    initial = {piece.get_position(): piece.get_initial()
+               for piece in black + white if piece.get_type() == "Pawn"}
+    assert initial == {(1, 3): True, (5, 3): False, (6, 4): True}
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        fen.load("rnbqkbnr/pppppppp/8/8 w - - 0 1")
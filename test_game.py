@@ -0,0 +1,138 @@
+""" Tests of the turns of a game in its window, and of the events they
+publish. """
+
+import bitboard
+import game
+import render
+from engine import SearchResult
+
+
+class _Window(object):
+    """ A stand-in for the Chess game window and its cells, which remembers
+    the last message of each. """
+
+    def __init__(self):
+        self.messages = {}
+        self._key = None
+
+    def __getitem__(self, key):
+        self._key = key
+        return self
+
+    @property
+    def Widget(self):
+        return self
+
+    def configure(self, **options):
+        pass
+
+    def update(self, value=None, **kwargs):
+        if value is not None:
+            self.messages[self._key] = value
+
+    def refresh(self):
+        pass
+
+
+class _Engine(object):
+    """ A computer player which always plays the same move. """
+
+    def __init__(self, move):
+        self._move = move
+
+    def search(self, position):
+        return SearchResult(self._move, 0, 1, 1, 0.0)
+
+
+def _session(monkeypatch, position=None, engine=None, engine_team=None):
+    """ Returns a Session in a stand-in window. """
+    # Icons can't be decoded without a display.
+    monkeypatch.setattr(render, "get_icon", lambda path: path)
+    return game.Session(_Window(), position, engine, engine_team)
+
+
+def test_refused_engine_move_ends_the_game(monkeypatch):
+    a2a5 = bitboard.encode_move(bitboard.parse_square("a2"),
+                                bitboard.parse_square("a5"))
+    session = _session(monkeypatch, engine=_Engine(a2a5),
+                       engine_team="White")
+    session.new_game()
+    assert session.is_engine_turn()
+    session.play_engine()
+    assert session.get_state() == game.OVER
+    assert session.get_winner() is None
+    assert session.get_count() == 0
+    assert not session.is_engine_turn()
+
+
+def _follow(session):
+    """ Returns the list of events a session publishes, with their details.
+    """
+    published = []
+    for event in (game.NEW_GAME, game.MOVE_COMMITTED, game.GAME_OVER):
+        session.get_events().subscribe(
+            event, lambda event=event, **details:
+            published.append((event, details)))
+    return published
+
+
+def test_turns(monkeypatch):
+    session = _session(monkeypatch)
+    published = _follow(session)
+    assert session.get_state() == game.OVER
+    session.new_game()
+    assert session.get_state() == game.SELECTING
+    assert [event for event, details in published] == [game.NEW_GAME]
+
+    # Black's pieces can't be selected on White's turn.
+    session.click((1, 4))
+    assert session.get_state() == game.SELECTING
+    session.click((6, 4))
+    assert session.get_state() == game.MOVING
+    result = session.click((3, 4))
+    assert not result
+    assert session.get_state() == game.SELECTING
+    assert session._window.messages["out"] == result.get_message()
+    assert len(published) == 1
+
+    session.click((6, 4))
+    assert session.click((4, 4))
+    assert session.get_count() == 1
+    assert session.get_turn() == "Black"
+    event, details = published[-1]
+    assert event == game.MOVE_COMMITTED
+    assert details["initial"] == (6, 4)
+    assert details["destination"] == (4, 4)
+    assert details["piece"].get_type() == "Pawn"
+    assert details["count"] == 1
+
+
+def test_checkmate(monkeypatch, tmp_path):
+    session = _session(monkeypatch, "k7/8/1K6/8/8/8/8/2Q5 w - - 0 1")
+    published = _follow(session)
+    path = str(tmp_path / "games.pgn")
+    game.record_games(session.get_events(), path)
+    session.new_game()
+    session.click((7, 2))
+    session.click((0, 2))
+    assert [event for event, details in published] == [
+        game.NEW_GAME, game.MOVE_COMMITTED, game.GAME_OVER]
+    assert published[-1][1] == {"winner": "White", "count": 1}
+    assert session.get_state() == game.OVER
+    assert session.get_winner() == "White"
+    assert session._window.messages["out"] == "Checkmate! White wins!"
+    # Clicks do nothing once the game is over.
+    assert session.click((0, 0)) is None
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    assert "1. Qc8# 1-0" in text
+
+
+def test_game_already_over(monkeypatch):
+    session = _session(monkeypatch, "k7/8/1Q6/8/8/8/8/7K b - - 0 1")
+    published = _follow(session)
+    session.new_game()
+    assert session.get_state() == game.OVER
+    assert session.get_winner() == game.DRAW
+    assert published[-1] == (game.GAME_OVER,
+                             {"winner": game.DRAW, "count": 1})
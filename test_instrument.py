@@ -0,0 +1,47 @@
+""" Tests of the opt-in instrumentation of the rules' hot paths. """
+
+import json
+
+import instrument
+import moves
+import paths
+import pieces
+from board import new_board
+
+
+def test_enable_disable_restores_originals():
+    get_piece, get_line = moves.get_piece, paths.get_line
+    move = pieces.Piece.__dict__["move"]
+    wrapped = instrument.enable()
+    try:
+        assert instrument.is_enabled()
+        assert "paths.get_line" in wrapped
+        assert "pieces.Piece.move" in wrapped
+        assert moves.get_piece is not get_piece
+        assert paths.get_line is not get_line
+        assert pieces.Piece.__dict__["move"] is not move
+    finally:
+        instrument.disable()
+    assert not instrument.is_enabled()
+    assert moves.get_piece is get_piece
+    assert paths.get_line is get_line
+    assert pieces.Piece.__dict__["move"] is move
+
+
+def test_calls_counted():
+    instrument.reset()
+    board = new_board()
+    with instrument.instrumented():
+        pawn = board.get_piece((6, 4))
+        assert pawn.move((4, 4), board.get_black(), board.get_white())
+    stats = instrument.get_stats()
+    assert stats["pieces.Piece.move"]["calls"] == 1
+    assert stats["moves.validate_path"]["calls"] == 1
+    assert stats["paths.get_line"]["calls"] == 1
+    assert json.loads(instrument.to_json()) == stats
+    assert 'chess_calls_total{function="paths.get_line"} 1' in \
+        instrument.to_prometheus()
+    # Nothing is counted once instrumentation is disabled.
+    board.get_piece((1, 4)).move((3, 4), board.get_black(),
+                                 board.get_white())
+    assert instrument.get_stats()["pieces.Piece.move"]["calls"] == 1
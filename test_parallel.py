@@ -0,0 +1,24 @@
+""" Tests of the parallel search over a shared transposition table. """
+
+import bitboard
+from parallel import ParallelEngine
+
+
+def test_search_returns_legal_move():
+    with ParallelEngine(2, None, None, 3, 1) as engine:
+        for fen in (bitboard.START_FEN,
+                    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"):
+            position = bitboard.from_fen(fen)
+            result = engine.search(position)
+            assert result.get_move() in position.generate_moves()
+            assert result.get_depth() == 3
+            assert result.get_nodes() > 0
+            engine.clear()
+
+
+def test_mate_in_one():
+    position = bitboard.from_fen("k7/8/1K6/8/8/8/8/7Q w - - 0 1")
+    with ParallelEngine(2, None, None, 2, 1) as engine:
+        move = engine.search(position).get_move()
+    position.make_move(move)
+    assert position.in_check() and not position.generate_moves()
@@ -0,0 +1,23 @@
+""" Tests of the move generator against the reference node counts. """
+
+import pytest
+
+import bitboard
+from perft import REFERENCES, perft
+
+# The deepest count checked, so the suite runs in seconds.
+DEPTH = 3
+
+
+@pytest.mark.parametrize("position, counts", REFERENCES)
+def test_perft(position, counts):
+    for depth, count in enumerate(counts[:DEPTH], 1):
+        assert perft(bitboard.from_fen(position), depth) == count, depth
+
+
+@pytest.mark.parametrize("position, counts", REFERENCES)
+def test_perft_leaves_position_unchanged(position, counts):
+    start = bitboard.from_fen(position)
+    perft(start, DEPTH)
+    assert start.to_fen() == position
+    assert start.get_hash() == bitboard.from_fen(position).get_hash()
@@ -0,0 +1,71 @@
+""" Tests of reading and writing games in PGN. """
+
+import io
+import os
+
+import pytest
+
+import pgn
+from pieces import WHITE, Queen
+
+GAME = """[Event "Club \\"Open\\""]
+[Site "?"]
+[Date "2024.01.02"]
+[Round "1"]
+[White "Anna"]
+[Black "Ben"]
+[Result "1-0"]
+
+1. e4 {A comment} e5 2. Nf3 (2. f4 exf4) Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7
+6. Re1 b5 7. Bb3 d6 8. c3 O-O 9. h3 $1 Nb8 10. d4 Nbd7 1-0
+
+"""
+
+
+def test_read():
+    game, = pgn.read_games(io.StringIO(GAME))
+    assert game.get_headers()["Event"] == 'Club "Open"'
+    assert game.get_result() == "1-0"
+    assert game.get_sans()[:4] == ["e4", "e5", "Nf3", "Nc6"]
+    assert len(game.get_moves()) == 20
+
+
+def test_write_read_round_trip():
+    game, = pgn.read_games(io.StringIO(GAME))
+    text = pgn.format_game(game)
+    # Comments, variations and annotations aren't kept.
+    assert "{" not in text and "(" not in text and "$" not in text
+    again, = pgn.read_games(io.StringIO(text))
+    assert again.get_headers() == game.get_headers()
+    assert again.get_sans() == game.get_sans()
+    assert pgn.format_game(again) == text
+
+
+def test_recorded_game_round_trip(tmp_path):
+    fen = "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1"
+    recorder = pgn.Recorder(fen)
+    recorder.record((1, 1), (0, 1), Queen((0, 1), WHITE))
+    path = str(tmp_path / "games.pgn")
+    assert pgn.write_games(path, [recorder.get_game("*")]) == 1
+    game, = pgn.read_games(path)
+    assert game.get_headers()["FEN"] == fen
+    assert game.get_sans() == ["b8=Q+"]
+
+
+def test_illegal_move():
+    game, = pgn.read_games(io.StringIO("1. e4 e5 2. Ke3 *\n"))
+    with pytest.raises(ValueError, match="Move 2. Ke3"):
+        game.get_moves()
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 5, 40])
+def test_spans_share_out_games(tmp_path, parts):
+    path = tmp_path / "games.pgn"
+    path.write_text("".join(GAME.replace('"1"', f'"{round}"', 1)
+                            for round in range(12)))
+    size = os.path.getsize(path)
+    bounds = [size * part // parts for part in range(parts + 1)]
+    rounds = [game.get_headers()["Round"]
+              for start, end in zip(bounds, bounds[1:])
+              for game in pgn.read_games(str(path), (start, end))]
+    assert rounds == [str(round) for round in range(12)]
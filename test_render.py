@@ -0,0 +1,73 @@
+""" Tests of rendering only the cells of the window which change. """
+
+import gc
+
+import pytest
+
+import render
+from board import new_board
+
+
+class _Window(object):
+    """ A stand-in for the Chess game window, which records the cells
+    updated. """
+
+    def __init__(self):
+        self.updated = []
+        self._key = None
+
+    def __getitem__(self, key):
+        self._key = key
+        return self
+
+    @property
+    def Widget(self):
+        return self
+
+    def configure(self, **options):
+        self.updated.append(self._key)
+
+    def update(self, *args, **kwargs):
+        self.updated.append(self._key)
+
+
+@pytest.fixture(autouse=True)
+def icons(monkeypatch):
+    # Icons can't be decoded without a display.
+    monkeypatch.setattr(render, "get_icon", lambda path: path)
+
+
+def test_render_only_changed_cells():
+    window = _Window()
+    renderer = render.get_renderer(window)
+    board = new_board()
+    black, white = board.get_black(), board.get_white()
+    assert renderer.render(black, white) == 32
+    assert len(window.updated) == 32
+    window.updated.clear()
+    assert renderer.render(black, white) == 0
+    assert window.updated == []
+
+    board.make_move(board.get_piece((6, 4)), (4, 4))
+    assert renderer.render(black, white) == 2
+    assert sorted(window.updated) == [(4, 4), (6, 4)]
+
+
+def test_show():
+    window = _Window()
+    renderer = render.get_renderer(window)
+    assert renderer.show((0, 0), "icon.png")
+    assert not renderer.show((0, 0), "icon.png")
+    assert renderer.show((0, 0), None)
+    assert window.updated == [(0, 0), (0, 0)]
+
+
+def test_renderer_per_window():
+    window = _Window()
+    renderer = render.get_renderer(window)
+    assert render.get_renderer(window) is renderer
+    assert render.get_renderer(_Window()) is not renderer
+    count = len(render._renderers)
+    del window, renderer
+    gc.collect()
+    assert len(render._renderers) < count
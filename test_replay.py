@@ -0,0 +1,45 @@
+""" Tests of replaying PGN files in shards. """
+
+import pytest
+
+import replay
+
+GAMES = ('[Event "Legal"]\n[Round "{round}"]\n\n1. e4 e5 2. Nf3 Nc6 1-0\n\n'
+         '[Event "Illegal"]\n[Round "{round}"]\n\n1. d4 Ke7 0-1\n\n')
+
+
+@pytest.fixture
+def path(tmp_path):
+    """ A PGN file of 20 games, every other one with an illegal move. """
+    path = tmp_path / "games.pgn"
+    path.write_text("".join(GAMES.format(round=round)
+                            for round in range(10)))
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 3, 8, 100])
+def test_shards_cover_every_game_once(path, workers):
+    tasks = replay.plan([path], workers)
+    assert len(tasks) == workers
+    results = [replay.replay_shard(task) for task in tasks]
+    assert sum(result["games"] for result in results) == 20
+    assert sum(result["moves"] for result in results) == 50
+    assert sum(len(result["errors"]) for result in results) == 10
+
+
+def test_plan_spreads_files(path, tmp_path):
+    other = tmp_path / "other.pgn"
+    other.write_text(GAMES.format(round=0))
+    tasks = replay.plan([path, str(other)], 4)
+    assert [task[0] for task in tasks] == [path, path, str(other),
+                                           str(other)]
+    assert tasks[0][1] == 0
+    assert tasks[0][2] == tasks[1][1]
+    assert replay.plan([], 4) == []
+
+
+def test_illegal_move_reported(path):
+    result = replay.replay_shard((path, 0, len(GAMES.format(round=0))))
+    assert result["games"] == 2
+    assert result["errors"] == [
+        [1, "Move 1... Ke7: 'Ke7' isn't a legal move"]]
@@ -0,0 +1,89 @@
+""" Tests of the game server's replies, over a connection as clients make
+them. """
+
+import asyncio
+import json
+
+import server
+
+FOOLS_MATE = "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 0 3"
+
+
+def _exchange(*requests):
+    """ Returns the server's replies to requests sent on one connection. """
+
+    async def run():
+        games = server.GameServer()
+        host = await asyncio.start_server(games.handle, "127.0.0.1", 0)
+        port = host.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for request in requests:
+            line = request if isinstance(request, str) \
+                else json.dumps(request)
+            writer.write(line.encode() + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        host.close()
+        await host.wait_closed()
+        return replies
+
+    return asyncio.run(run())
+
+
+def test_create():
+    reply, = _exchange({"op": "new"})
+    assert reply["ok"]
+    assert reply["game"] == 1
+    assert reply["turn"] == "White"
+    assert reply["winner"] is None
+
+
+def test_move():
+    created, moved, state = _exchange(
+        {"op": "new"}, {"op": "move", "game": 1, "from": "e2", "to": "e4"},
+        {"op": "state", "game": 1})
+    assert moved["ok"]
+    assert moved["move"] == ["e2", "e4"]
+    assert moved["turn"] == "Black"
+    assert state["fen"] == moved["fen"] != created["fen"]
+
+
+def test_illegal_move():
+    created, reply = _exchange(
+        {"op": "new"}, {"op": "move", "game": 1, "from": "e2", "to": "e5"})
+    assert not reply["ok"]
+    assert reply["reason"] and reply["error"]
+
+
+def test_errors():
+    replies = _exchange(
+        "not json", "[]", {"op": "state", "game": 7}, {"op": "new"},
+        {"op": "fly", "game": 1}, {"op": "move", "game": 1, "from": "e2"},
+        {"op": "move", "game": 1, "from": "z9", "to": "e4"},
+        {"op": "move", "game": 1, "from": "e7", "to": "e5"})
+    for index, reply in enumerate(replies):
+        if index != 3:
+            assert not reply["ok"]
+            assert reply["error"]
+
+
+def test_position_without_pieces():
+    reply, state = _exchange({"op": "new", "fen": "8/8/8/8/8/8/8/8 w - - 0 1"},
+                             {"op": "new"})
+    assert not reply["ok"]
+    assert "no pieces" in reply["error"]
+    # The connection is still served.
+    assert state["ok"]
+
+
+def test_position_already_over():
+    created, moved = _exchange(
+        {"op": "new", "fen": FOOLS_MATE},
+        {"op": "move", "game": 1, "from": "e2", "to": "e3"})
+    assert created["ok"]
+    assert created["check"]
+    assert created["winner"] == "Black"
+    assert not moved["ok"]
+    assert moved["error"] == "The game is over."
@@ -0,0 +1,71 @@
+""" Tests of the endgame tablebases, probed with positions of the game. """
+
+import pytest
+
+import bitboard
+import server
+import tablebase
+from pieces import QUEEN
+from tablebase import Tablebase, WIN, DRAW, LOSS
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    """ The King and Queen against King table, which is the quickest to
+    generate. """
+    path = str(tmp_path_factory.mktemp("tablebase") / "kqk.bin")
+    tablebase.build(path, (QUEEN,))
+    with Tablebase(path) as tables:
+        yield tables
+
+
+def _probe(tables, position):
+    """ Probes a position of the game, started from FEN as the server does.
+    """
+    game = server.Game(position)
+    board = game.get_board()
+    return tables.probe(bitboard.from_lists(
+        board.get_black(), board.get_white(), game.get_count() % 2))
+
+
+def test_names(tables):
+    assert tables.get_names() == ["KQK"]
+
+
+@pytest.mark.parametrize("position, result", [
+    ("4k3/8/8/8/8/8/8/3QK3 w - - 0 1", WIN),
+    ("4k3/8/8/8/8/8/8/3QK3 b - - 0 1", LOSS),
+    # The lone King captures the undefended Queen.
+    ("8/8/8/8/8/8/3kQ3/7K b - - 0 1", DRAW),
+    ("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", LOSS),
+    # Stalemate.
+    ("k7/8/1Q6/8/8/8/8/7K b - - 0 1", DRAW),
+    # The stronger team is Black.
+    ("3qk3/8/8/8/8/8/8/4K3 b - - 0 1", WIN),
+    ("3qk3/8/8/8/8/8/8/4K3 w - - 0 1", LOSS)
+])
+def test_probe(tables, position, result):
+    assert _probe(tables, position) == result
+
+
+@pytest.mark.parametrize("position", [
+    # A table which wasn't generated.
+    "4k3/8/8/8/8/8/8/3RK3 w - - 0 1",
+    # Too many pieces.
+    "4k3/8/8/8/8/8/4P3/3QK3 w - - 0 1",
+    # Three pieces, but not both Kings.
+    "4k3/8/8/8/8/8/8/2QQ4 w - - 0 1",
+    "8/8/8/8/8/8/8/2QQK3 b - - 0 1",
+    bitboard.START_FEN
+])
+def test_probe_outside_tables(tables, position):
+    assert _probe(tables, position) is None
+
+
+def test_probe_after_game_moves(tables):
+    game = server.Game("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+    assert game.play((7, 3), (1, 3))
+    board = game.get_board()
+    # Qd7+ is defended by nothing, so the lone King takes the Queen.
+    assert tables.probe(bitboard.from_lists(
+        board.get_black(), board.get_white(), game.get_count() % 2)) == DRAW
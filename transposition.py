@@ -0,0 +1,184 @@
+""" A fixed-size table of searched positions, keyed by Zobrist hash.
+
+The table is a flat array of 64-bit words, allocated once, so its memory
+never grows. Each entry is two words: the entry's data, and the position's
+key combined with the data by exclusive or. An entry whose words were
+written by different stores fails the key check, so the table can be shared
+between processes without locks.
+
+Entries are grouped in buckets of two. Under the "depth" policy, the first
+entry of a bucket is only replaced by a search at least as deep, and the
+second entry takes everything else. Under the "always" policy, a store
+always replaces the first entry.
+"""
+
+from array import array
+
+EXACT, LOWER, UPPER = 1, 2, 3
+ENTRY_SIZE = 16
+POLICIES = ("depth", "always")
+
+_SCORE_OFFSET = 1 << 20
+_MASK = (1 << 64) - 1
+
+
+def _pack(depth, score, bound, move):
+    """ Returns an entry's data packed into a 64-bit word. """
+    return move & 0xFFFF | (depth & 0xFF) << 16 | bound << 24 \
+        | (score + _SCORE_OFFSET) << 26
+
+
+class TranspositionTable(object):
+    def __init__(self, megabytes=16, policy="depth", buffer=None):
+        """ A fixed-size table of searched positions.
+
+        Parameters
+        ----------
+        megabytes : float
+            The memory used by the table, in MB.
+        policy : str
+            The replacement policy, "depth" or "always".
+        buffer : object
+            A writable buffer, such as a multiprocessing.shared_memory
+            block, to hold the table. None to allocate the table. Its size
+            overrides megabytes.
+
+        Raises
+        ------
+        ValueError
+            If the policy isn't known, or the table has fewer than two
+            entries.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replacement policy: {policy!r}")
+        if buffer is None:
+            words = int(megabytes * 2 ** 20) // ENTRY_SIZE * 2
+            self._words = array("Q", bytes(words * 8))
+        else:
+            size = len(memoryview(buffer).cast("B"))
+            self._words = memoryview(buffer).cast("B")[:size // 32 * 32] \
+                .cast("Q")
+        self._buckets = len(self._words) // 4
+        if not self._buckets:
+            raise ValueError("The table must hold at least one bucket.")
+        self._always = policy == "always"
+        self._probes = 0
+        self._hits = 0
+        self._stores = 0
+
+    def __len__(self):
+        return self._buckets * 2
+
+    def get_size(self):
+        """ Returns the memory used by the table, in bytes. """
+        return self._buckets * 2 * ENTRY_SIZE
+
+    def clear(self):
+        """ Empties the table and resets its statistics. """
+        words = self._words
+        for index in range(len(words)):
+            words[index] = 0
+        self._probes = 0
+        self._hits = 0
+        self._stores = 0
+
+    def probe(self, key):
+        """ Looks up a position.
+
+        Parameters
+        ----------
+        key : int
+            The 64-bit Zobrist hash of the position.
+
+        Returns
+        -------
+        tuple[int, int, int, int]
+            The depth, score, bound (EXACT, LOWER or UPPER) and best move
+            stored for the position. None if it isn't stored.
+        """
+        self._probes += 1
+        words = self._words
+        base = key % self._buckets * 4
+        for index in (base, base + 2):
+            data = words[index + 1]
+            if data and words[index] ^ data == key:
+                self._hits += 1
+                return (data >> 16 & 0xFF, (data >> 26) - _SCORE_OFFSET,
+                        data >> 24 & 3, data & 0xFFFF)
+        return None
+
+    def store(self, key, depth, score, bound, move=0):
+        """ Stores the result of searching a position.
+
+        Parameters
+        ----------
+        key : int
+            The 64-bit Zobrist hash of the position.
+        depth : int
+            The depth to which the position was searched.
+        score : int
+            The score of the position, within +/- 2 ** 20.
+        bound : int
+            EXACT if the score is exact, LOWER or UPPER if it is a bound.
+        move : int
+            The best move found, encoded in 16 bits. 0 if there is none.
+        """
+        self._stores += 1
+        words = self._words
+        base = key % self._buckets * 4
+        data = _pack(depth, score, bound, move)
+        index = base
+        if not self._always:
+            first = words[base + 1]
+            if first and words[base] ^ first != key \
+                    and depth < (first >> 16 & 0xFF):
+                index = base + 2
+        words[index] = (key ^ data) & _MASK
+        words[index + 1] = data
+
+    def get_probes(self):
+        """ Returns the number of lookups since the table was cleared. """
+        return self._probes
+
+    def get_hits(self):
+        """ Returns the number of lookups which found their position. """
+        return self._hits
+
+    def get_stores(self):
+        """ Returns the number of stores since the table was cleared. """
+        return self._stores
+
+    def get_hit_rate(self):
+        """ Returns the fraction of lookups which found their position. """
+        return self._hits / self._probes if self._probes else 0.0
+
+    def get_fill_rate(self, sample=1000):
+        """ Returns the fraction of entries in use, estimated from the first
+        entries of the table.
+
+        Parameters
+        ----------
+        sample : int
+            The number of entries to inspect.
+
+        Returns
+        -------
+        float
+            The fraction of the inspected entries which are in use.
+        """
+        count = min(sample, len(self))
+        words = self._words
+        used = sum(1 for index in range(count) if words[index * 2 + 1])
+        return used / count
+
+    def get_stats(self):
+        """ Returns the table's statistics as a dictionary. """
+        return {
+            "entries": len(self),
+            "bytes": self.get_size(),
+            "probes": self._probes,
+            "hits": self._hits,
+            "stores": self._stores,
+            "hit_rate": self.get_hit_rate(),
+            "fill_rate": self.get_fill_rate()
+        }
@@ -0,0 +1,51 @@
+""" Random keys for the Zobrist hashing of Chess positions.
+
+The hash of a position is the exclusive or of the key of each piece on its
+square, the key of each castling right and of the en passant file, and the
+TURN key if it is Black's turn. Moving a piece changes the hash by the keys
+of its old and new squares, so the hash is updated as the position changes
+rather than recomputed. The keys are generated from a fixed seed, so hashes
+are the same in every process.
+
+bitboard.Position hashes all of these, but board.Board, which doesn't track
+castling rights or the en passant square, hashes only the pieces and the
+turn. The two hashes of a position are equal only when it has no castling
+rights and no en passant square; book.get_key leaves both out of a
+Position's hash to compare it with a Board's.
+"""
+
+import random
+
+_random = random.Random(0x5A0B8157)
+
+PIECES = tuple(
+    tuple(tuple(_random.getrandbits(64) for square in range(64))
+          for piece_type in range(6))
+    for team in range(2))
+TURN = _random.getrandbits(64)
+_RIGHTS = tuple(_random.getrandbits(64) for right in range(4))
+CASTLING = tuple(
+    _RIGHTS[0] * (rights & 1) ^ _RIGHTS[1] * (rights >> 1 & 1)
+    ^ _RIGHTS[2] * (rights >> 2 & 1) ^ _RIGHTS[3] * (rights >> 3 & 1)
+    for rights in range(16))
+EN_PASSANT = tuple(_random.getrandbits(64) for column in range(8))
+
+
+def piece_key(team, piece_type, square):
+    """ Returns the key of a piece on a square.
+
+    Parameters
+    ----------
+    team : int
+        The index of the piece's team in pieces.TEAMS.
+    piece_type : int
+        The index of the piece's type in pieces.TYPES.
+    square : int
+        The square index of the piece's cell.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return PIECES[team][piece_type][square]